@@ -1,15 +1,39 @@
+import argparse
+import asyncio
+import sys
+
 import urwid
 from modern_urwid import CompileContext
 from urwid.event_loop.main_loop import ExitMainLoop
 
+from ned.startup import LAUNCHED_AT  # noqa: F401, marks the launch time
 from ned.custom_mu import APILifecycleManager
+from ned.daemon import is_daemon_running, run_daemon
+from ned.remote import RemoteSession
 from ned.session import NedSession
 from ned.utils import RESOURCES_DIR, setup_resources
 
 
 def run():
+    parser = argparse.ArgumentParser(prog="ned")
+    parser.add_argument(
+        "--daemon",
+        action="store_true",
+        help="run headless, for other ned instances and scripts to attach to",
+    )
+    parser.add_argument(
+        "--standalone",
+        action="store_true",
+        help="don't attach to a running daemon",
+    )
+    args = parser.parse_args()
+    if args.daemon:
+        sys.exit(run_daemon())
+
     setup_resources(True)  # TODO: True for dev mode
     context = CompileContext(RESOURCES_DIR)
+    asyncio_loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(asyncio_loop)
     loop = urwid.MainLoop(
         urwid.Text(""),
         palette=[
@@ -23,14 +47,19 @@ def run():
             ("keybind_key", "", "", "", "#ff9905,bold", "#222222"),
             ("keybind_bind", "", "", "", "#df7905", "#222222"),
         ],
+        event_loop=urwid.AsyncioEventLoop(loop=asyncio_loop),
     )
     loop.screen.set_terminal_properties(2**24)
 
-    manager = APILifecycleManager(context, NedSession(), loop)
+    if not args.standalone and is_daemon_running():
+        session = RemoteSession()
+    else:
+        session = NedSession()
+    session.attach_loop(asyncio_loop)
+    session.events.attach_urwid(loop)
+    manager = APILifecycleManager(context, session, loop)
+    # the other layouts are compiled by the preload screen
     manager.register("layouts/preload.xml", "preload")
-    manager.register("layouts/simple.xml", "simple")
-    manager.register("layouts/setup.xml", "setup")
-    manager.register("layouts/logs.xml", "logs")
 
     try:
         manager.run("preload")
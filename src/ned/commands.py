@@ -0,0 +1,108 @@
+import asyncio
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from ned.session import NedSession
+
+SEEK_DEBOUNCE = 0.25
+SKIP_DEBOUNCE = 0.3
+# while a key is held down, still send something at least this often
+MAX_DELAY = 1.0
+
+
+class CommandQueue:
+    """Coalesces bursts of seek and skip commands into as few requests as possible.
+
+    Repeated seeks collapse into a single absolute seek to the last position,
+    and skips in either direction are summed into one batch (a batch that sums
+    to zero is handed back to :meth:`NedSession.undo_skips`). Requests are
+    sent once input has been quiet for the debounce period. Must be used from
+    the session's event loop thread.
+    """
+
+    def __init__(
+        self,
+        session: "NedSession",
+        seek_debounce: float = SEEK_DEBOUNCE,
+        skip_debounce: float = SKIP_DEBOUNCE,
+        max_delay: float = MAX_DELAY,
+    ):
+        self.session = session
+        self.seek_debounce = seek_debounce
+        self.skip_debounce = skip_debounce
+        self.max_delay = max_delay
+
+        self._seek_target: int | None = None
+        self._seek_handle: asyncio.TimerHandle | None = None
+        self._seek_first = 0.0
+        self._skips = 0
+        self._skip_handle: asyncio.TimerHandle | None = None
+        self._skip_first = 0.0
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        return self.session.event_loop
+
+    def _schedule(self, handle, first, debounce, callback):
+        if handle is None:
+            first = self.loop.time()
+        else:
+            handle.cancel()
+        delay = min(debounce, first + self.max_delay - self.loop.time())
+        return self.loop.call_later(max(0.0, delay), callback), first
+
+    def seek(self, position_ms: int):
+        # a seek after skips applies to the new track, so send the skips first;
+        # send_command runs commands in order, the seek waits for the whole batch
+        self.flush_skips()
+        self._seek_target = max(0, position_ms)
+        self._seek_handle, self._seek_first = self._schedule(
+            self._seek_handle, self._seek_first, self.seek_debounce, self.flush_seek
+        )
+
+    def skip(self, count: int = 1):
+        """Queue ``count`` skips forward, or backwards if negative."""
+        # seeking within a track we're about to leave is pointless
+        self.cancel_seek()
+        self._skips += count
+        self._skip_handle, self._skip_first = self._schedule(
+            self._skip_handle, self._skip_first, self.skip_debounce, self.flush_skips
+        )
+
+    def cancel_seek(self):
+        if self._seek_handle:
+            self._seek_handle.cancel()
+            self._seek_handle = None
+        self._seek_target = None
+
+    def flush_seek(self):
+        if self._seek_handle:
+            self._seek_handle.cancel()
+            self._seek_handle = None
+        target, self._seek_target = self._seek_target, None
+        if target is not None:
+            self.session.send_command("seek_to_position", target)
+
+    def flush_skips(self):
+        if self._skip_handle is None:
+            return
+        self._skip_handle.cancel()
+        self._skip_handle = None
+        count, self._skips = self._skips, 0
+        if count:
+            self.session.send_command("skip", count)
+        else:
+            self.session.undo_skips()
+
+    def flush(self):
+        self.flush_skips()
+        self.flush_seek()
+
+    @property
+    def skipping(self) -> bool:
+        """Whether a batch of skips is waiting to be sent."""
+        return self._skip_handle is not None
+
+    @property
+    def pending(self) -> bool:
+        return self._seek_target is not None or self.skipping
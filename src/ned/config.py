@@ -1,36 +1,204 @@
-from cfgsaver import cfgsaver
+import atexit
+import json
+import os
+import shutil
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any
 
 from ned.utils import ROOT_DIR
 
+DEFAULT_MAX_FPS = 10
+CONFIG_PATH = ROOT_DIR / "cfg.json"
+WRITE_DELAY = 0.5  # seconds, changes made within this window share one write
+
+
+class ConfigStore:
+    """Process-wide view of ``cfg.json``.
+
+    The file is read once and kept in memory; reads only stat the file to
+    pick up changes made by other ned processes. Changes are written behind
+    on a timer through a temp file and a rename, so readers never see a
+    partial file and bursts of changes cost a single write. Pending keys are
+    applied on top of the latest file contents, so concurrent processes only
+    overwrite the keys they actually changed.
+    """
+
+    def __init__(self, path: Path = CONFIG_PATH, write_delay: float = WRITE_DELAY):
+        self.path = Path(path)
+        self.write_delay = write_delay
+        self.lock = threading.RLock()
+        self._data: dict[str, Any] | None = None
+        self._mtime_ns: int | None = None
+        self._loaded = False
+        # keys changed since the last write, None to replace the whole file
+        self._changes: dict[str, Any] | None = {}
+        self._timer: threading.Timer | None = None
+
+    def _stat(self) -> int | None:
+        try:
+            return self.path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _read(self, mtime_ns: int | None):
+        if mtime_ns is None:
+            data = None
+        else:
+            try:
+                data = json.loads(self.path.read_text())
+            except (OSError, ValueError):
+                # mid-write by an older version, keep what we have
+                return
+        self._data = data
+        self._mtime_ns = mtime_ns
+        self._loaded = True
+
+    def _refresh(self):
+        if self._changes is None:
+            return  # a pending replace wins over the file
+        mtime_ns = self._stat()
+        if not self._loaded or mtime_ns != self._mtime_ns:
+            self._read(mtime_ns)
+            if self._changes:
+                self._data = {**(self._data or {}), **self._changes}
+
+    @property
+    def exists(self) -> bool:
+        with self.lock:
+            self._refresh()
+            return self._data is not None
+
+    def snapshot(self) -> dict[str, Any] | None:
+        """A copy of the whole config, or None if there is no config file."""
+        with self.lock:
+            self._refresh()
+            return None if self._data is None else dict(self._data)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        with self.lock:
+            self._refresh()
+            if self._data is None:
+                return default
+            return self._data.get(key, default)
+
+    def update(self, **values: Any):
+        with self.lock:
+            self._refresh()
+            if self._data is None:
+                self._data = {}
+            self._data.update(values)
+            if self._changes is not None:
+                self._changes.update(values)
+            self._schedule_write()
+
+    def set(self, key: str, value: Any):
+        self.update(**{key: value})
+
+    def replace(self, config: dict[str, Any]):
+        with self.lock:
+            self._data = dict(config)
+            self._loaded = True
+            self._changes = None
+            self._schedule_write()
+
+    def _schedule_write(self):
+        if self._timer is None:
+            self._timer = threading.Timer(self.write_delay, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self):
+        """Write pending changes now."""
+        with self.lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if self._changes == {}:
+                return
+            if self._changes is not None:
+                # merge into whatever another process may have written since
+                self._read(self._stat())
+                self._data = {**(self._data or {}), **self._changes}
+            self._write(self._data)
+            self._changes = {}
+
+    def _write(self, data: dict[str, Any]):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.path.parent, prefix=".cfg-", suffix=".json")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(data, f, indent=4)
+            os.replace(tmp, self.path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        self._mtime_ns = self._stat()
+
+
+_store: ConfigStore | None = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> ConfigStore:
+    """Return the process-wide config store, loading it on first use."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ConfigStore()
+            atexit.register(_store.flush)
+        return _store
+
 
 def save_config(config):
-    cfgsaver.save("ned", config, ROOT_DIR)
+    get_store().replace(config)
     return config
 
 
 def get_config():
-    return cfgsaver.get("ned", ROOT_DIR)
+    return get_store().snapshot()
+
+
+def get_spotify_creds() -> str | None:
+    return get_store().get("id")
+
+
+def get_device_name() -> str:
+    return get_store().get("device_name", "Ned")
+
+
+def get_librespot_path() -> str | None:
+    """The librespot executable, ``librespot_path`` or librespot on PATH."""
+    return shutil.which(get_store().get("librespot_path") or "librespot")
+
+
+def get_transfer_policy() -> str:
+    """When to move playback to ned: ``always``, ``once`` or ``never``."""
+    return get_store().get("transfer_policy", "once")
+
+
+def get_api_urls() -> tuple[str | None, str | None]:
+    """Web API and accounts base URLs, None for Spotify's own."""
+    store = get_store()
+    return store.get("api_url"), store.get("accounts_url")
 
 
-def get_spotify_creds():
-    config = get_config()
-    if config is None:
-        return None
-    return config.get("id")
+def get_poll_settings() -> tuple[str, dict | None]:
+    store = get_store()
+    return store.get("poll_profile", "default"), store.get("poll_intervals")
 
 
-def get_device_name():
-    return get_config().get("device_name", "Ned")
+def get_max_fps() -> float:
+    return get_store().get("max_fps", DEFAULT_MAX_FPS)
 
 
-def get_cached_token():
-    return get_config().get("token")
+def get_cached_token() -> dict | str | None:
+    return get_store().get("token")
 
 
 def save_cached_token(token):
-    config = get_config()
-    config["token"] = token
-    save_config(config)
+    get_store().set("token", token)
 
 
 def setup_config():
@@ -2,3 +2,4 @@ from .simple import SimpleController
 from .preload import PreloadController
 from .logs import LogsController
 from .setup import SetupController
+from .picker import PickerController
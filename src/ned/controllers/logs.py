@@ -1,6 +1,8 @@
 from modern_urwid import assign_widget
 import urwid
 from ned.custom_mu import APIController
+from ned.events import Event
+from ned.widgets import LogWalker
 
 
 class LogsController(APIController):
@@ -16,29 +18,26 @@ class LogsController(APIController):
     def librespot_info_text(self) -> urwid.Text: ...
 
     def on_load(self):
-        self.update_handle = None
+        self.walker = None
+
+    def set_session(self, session):
+        super().set_session(session)
+        self.walker = LogWalker(self.session.data.logs)
+        self.listbox.body = self.walker
 
     def on_enter(self):
-        self.update_handle = self.manager.loop.set_alarm_in(0.1, self.update_loop)
+        self.watch(Event.LIBRESPOT_STATUS_CHANGED, "header")
+        self.watch(Event.LOG_APPENDED, "logs")
+        self.mark_dirty()
 
     def on_exit(self):
-        if self.update_handle:
-            self.manager.loop.remove_alarm(self.update_handle)
-            self.update_handle = None
-
-    def update_loop(self, mainloop, data):
-        self.update_handle = mainloop.set_alarm_in(0.1, self.update_loop)
-        self.librespot_info_text.set_text(self.session.data.librespot.value)
-        if len(self.session.data.logs) != len(self.listbox.body):
-            self.listbox.body.clear()
-            for log in self.session.data.logs:
-                style = "text_info"
-                if "ERROR" in log:
-                    style = "text_error"
-                elif "WARN" in log:
-                    style = "text_warn"
-                self.listbox.body.append(urwid.Text((style, log)))
-            self.listbox.set_focus(len(self.listbox.body) - 1)
+        self.unwatch_all()
+        self.manager.frames.discard(self)
+
+    def render_frame(self, dirty):
+        self.set_text(self.librespot_info_text, self.session.data.librespot.value)
+        if self.walker.sync():
+            self.listbox.set_focus(len(self.walker) - 1)
 
     def on_unhandled_input(self, data):
         if data == "q":
@@ -0,0 +1,113 @@
+import urwid
+from modern_urwid import assign_widget
+from urwid import Text
+
+from ned.custom_mu import ALL, APIController
+from ned.events import Event
+from ned.search import Document
+from ned.widgets import SearchEdit
+
+MAX_RESULTS = 100
+KIND_LABELS = {"track": "♪", "album": "◎", "playlist": "≡", "artist": "☺"}
+
+
+class PickerController(APIController):
+    name = "picker"
+
+    @assign_widget("root")
+    def root(self) -> urwid.Pile: ...
+
+    @assign_widget("query_edit")
+    def query_edit(self) -> SearchEdit: ...
+
+    @assign_widget("status_text")
+    def status_text(self) -> Text: ...
+
+    @assign_widget("listbox")
+    def listbox(self) -> urwid.ListBox: ...
+
+    @assign_widget("librespot_info_text")
+    def librespot_info_text(self) -> Text: ...
+
+    def on_load(self):
+        self.results: list[Document] = []
+        self.walker = urwid.SimpleFocusListWalker([])
+        self.listbox.body = self.walker
+        urwid.connect_signal(self.query_edit, "postchange", self.on_query_change)
+        urwid.connect_signal(self.query_edit, "navigate", self.on_navigate)
+
+    def on_enter(self):
+        self.watch(Event.LIBRESPOT_STATUS_CHANGED, "header")
+        self.watch(Event.LIBRARY_CHANGED, "results")
+        self.session.library.load()
+        self.root.focus_position = 1  # the query edit
+        self.mark_dirty()
+
+    def on_exit(self):
+        self.unwatch_all()
+        self.manager.frames.discard(self)
+
+    def on_query_change(self, *args):
+        self.mark_dirty("results")
+
+    def on_navigate(self, edit, key):
+        if not self.walker:
+            return
+        step = {"up": -1, "down": 1, "page up": -10, "page down": 10}[key]
+        position = self.walker.focus + step
+        self.walker.set_focus(min(max(position, 0), len(self.walker) - 1))
+
+    def render_frame(self, dirty):
+        everything = ALL in dirty
+        if everything or "header" in dirty:
+            self.set_text(self.librespot_info_text, self.session.data.librespot.value)
+        if everything or "results" in dirty:
+            self.update_results()
+
+    def update_results(self):
+        library = self.session.library
+        query = self.query_edit.get_edit_text()
+        results = library.index.search(query, MAX_RESULTS) if query.strip() else []
+
+        status = f"{len(library.index)} items in library"
+        if query.strip():
+            status = f"{len(results)} results, {status}"
+        if library.loading:
+            status += " (loading...)"
+        self.set_text(self.status_text, status)
+
+        if results == self.results:
+            return
+        self.results = results
+        self.walker[:] = [
+            urwid.AttrMap(
+                Text(
+                    [
+                        f"{KIND_LABELS.get(doc.kind, ' ')} {doc.name}",
+                        ("text_info", f"  {doc.subtitle}" if doc.subtitle else ""),
+                    ],
+                    wrap="ellipsis",
+                ),
+                None,
+                "keybind_bind",
+            )
+            for doc in results
+        ]
+        if self.walker:
+            self.walker.set_focus(0)
+
+    def play_selected(self):
+        if not self.results:
+            return
+        doc = self.results[self.walker.focus]
+        if doc.kind == "track":
+            self.session.play(uris=[doc.uri])
+        else:
+            self.session.play(context_uri=doc.uri)
+        self.manager.switch("simple")
+
+    def on_unhandled_input(self, data):
+        if data == "esc":
+            self.manager.switch("simple")
+        elif data == "enter":
+            self.play_selected()
@@ -1,9 +1,26 @@
+import asyncio
+
 from modern_urwid import assign_widget
 from urwid import Pile, Text
 
-from ned.config import get_config, get_spotify_creds, save_config
+from ned.config import get_librespot_path, get_spotify_creds
 from ned.custom_mu import APIController
-from ned.utils import is_librespot_installed, open_url
+from ned.startup import SkipStage, Stage, StageError, StageStatus, StartupPipeline
+
+# compiled during startup, while the token is being checked
+LAYOUTS = [
+    ("layouts/simple.xml", "simple"),
+    ("layouts/setup.xml", "setup"),
+    ("layouts/logs.xml", "logs"),
+    ("layouts/music_picker.xml", "picker"),
+]
+
+STATUS_STYLES = {
+    StageStatus.RUNNING: "text_info",
+    StageStatus.DONE: "text_success",
+    StageStatus.SKIPPED: "text_warn",
+    StageStatus.FAILED: "text_error",
+}
 
 
 class PreloadController(APIController):
@@ -15,38 +32,86 @@ class PreloadController(APIController):
     @assign_widget("info")
     def info_text(self) -> Text: ...
 
-    def update_text(self, new_text):
-        old_text = self.info_text._text
-        self.info_text.set_text(f"{old_text}\n{new_text}")
-        self.manager.loop.draw_screen()
-
     def on_enter(self):
         self.info_text.set_text("")
-        self.manager.loop.set_alarm_in(0.01, self.preload)
+        self.pipeline = self.build_pipeline()
+        self.session.event_loop.create_task(self.preload())
 
-    def preload(self, *args):
-        self.update_text("Looking for librespot...")
-        installed = is_librespot_installed()
-        if installed:
-            self.update_text("Found librespot installation.")
-        else:
-            self.update_text("Error: librespot not installed.")
-            self.update_text(
-                "Please see the setup instructions at https://github.com/Jackkillian/ned for more details."
+    def build_pipeline(self) -> StartupPipeline:
+        pipeline = StartupPipeline(on_progress=self.show_progress)
+        pipeline.add("librespot", self.find_librespot, label="Looking for librespot")
+        # a small local read, done inline so the token check can start right away
+        pipeline.add("config", get_spotify_creds, on_loop=True, label="Reading config")
+        pipeline.add(
+            "cache",
+            self.session.load_cached_state,
+            on_loop=True,
+            label="Loading cached state",
+        )
+        pipeline.add(
+            "token", self.connect, after=("config",), label="Connecting to API"
+        )
+        pipeline.add(
+            "spawn",
+            self.spawn_librespot,
+            after=("librespot", "token"),
+            label="Starting librespot",
+        )
+        pipeline.add(
+            "layouts", self.compile_layouts, on_loop=True, label="Compiling layouts"
+        )
+        return pipeline
+
+    def find_librespot(self):
+        if self.session.remote:
+            raise SkipStage()  # the daemon runs it
+        if get_librespot_path() is None:
+            raise StageError(
+                "librespot not installed. Please see the setup instructions at https://github.com/Jackkillian/ned for more details."
             )
-            return
-        self.update_text("Connecting to API...")
-
-        # setup all of the threads here
-        client_id = get_spotify_creds()
-        if client_id:
-            self.session.setup(client_id)
-            result, msg = self.session.start_librespot()  # TODO: check result
-            if result:
-                self.update_text("Started Librespot.")
+
+    async def compile_layouts(self):
+        # modern_urwid's compile context isn't thread safe, so layouts are
+        # compiled here one at a time, yielding to the loop in between
+        for path, key in LAYOUTS:
+            await asyncio.sleep(0)
+            if key not in self.manager.layouts:
+                self.manager.register(path, key)
+
+    def connect(self):
+        if not (client_id := self.pipeline.result("config")):
+            raise SkipStage()
+        self.session.setup(client_id)
+
+    def spawn_librespot(self):
+        result, msg = self.session.start_librespot()
+        if not result:
+            raise StageError(msg)
+
+    def show_progress(self, stage: Stage):
+        markup = []
+        for stage in self.pipeline.stages.values():
+            if stage.status == StageStatus.PENDING:
+                continue
+            if stage.status == StageStatus.RUNNING:
+                line = f"{stage.label}..."
+            elif stage.status == StageStatus.FAILED:
+                line = f"{stage.label}: {stage.error}"
+            elif stage.duration is None:
+                line = f"{stage.label}: {stage.status.value}"
             else:
-                self.update_text(f"Error: {msg}")
-        else:
-            self.manager.switch("setup")
+                line = f"{stage.label}: {stage.status.value} ({stage.duration * 1000:.0f} ms)"
+            markup.append((STATUS_STYLES[stage.status], f"{line}\n"))
+        self.info_text.set_text(markup or "")
+        self.manager.loop.draw_screen()
+
+    async def preload(self):
+        ok = await self.pipeline.run()
+        for line in self.pipeline.report():
+            self.session.data.logs.append(f"[startup] {line}")
+        if not ok:
             return
-        self.manager.switch("simple")
+        if self.pipeline.status("token") == StageStatus.SKIPPED:
+            self.manager.switch("setup")
+        else:
+            self.manager.switch("simple")
@@ -3,7 +3,8 @@ from modern_urwid import assign_widget
 from urwid import Text
 
 from ned.constants import ASCII_PAUSE, ASCII_PLAY
-from ned.custom_mu import APIController
+from ned.custom_mu import ALL, APIController
+from ned.events import Event
 from ned.spotify.data import TrackData
 from ned.utils import format_milli
 from ned.widgets import TimeProgressBar
@@ -31,7 +32,7 @@ class SimpleController(APIController):
     def librespot_info_text(self) -> Text: ...
 
     def on_load(self):
-        self.update_handle = None
+        pass
         # keybinds = {
         #     "q": "quit",
         #     "esc": "back",
@@ -47,85 +48,84 @@ class SimpleController(APIController):
         # self.footer_text.set_text("Press [n] to wake up Ned")
 
     def on_enter(self):
-        self.update_track_info(self.manager.loop, None)
+        self.watch(Event.LIBRESPOT_STATUS_CHANGED, "header")
+        self.watch(Event.TRACK_CHANGED, "track", "progress")
+        self.watch(Event.PLAYBACK_CHANGED, "status", "progress")
+        self.mark_dirty()
 
     def on_exit(self):
-        if self.update_handle:
-            self.manager.loop.remove_alarm(self.update_handle)
-            self.update_handle = None
+        self.unwatch_all()
+        self.manager.frames.discard(self)
 
-    def update_track_info(self, mainloop, data):
-        self.update_handle = mainloop.set_alarm_in(0.1, self.update_track_info)
-
-        self.librespot_info_text.set_text(self.session.data.librespot.value)
+    def render_frame(self, dirty):
+        everything = ALL in dirty
+        if everything or "header" in dirty:
+            self.set_text(self.librespot_info_text, self.session.data.librespot.value)
 
         if display_name := self.session.data.user.display_name:
             text = display_name
         else:
             text = "Logging in..."
 
-        if not (playback := self.session.data.playback):
-            self.progressbar.current = 0
-            self.status_text.set_text(ASCII_PLAY)
-            self.song_text.set_text("<Nothing playing>")
-            self.artist_text.set_text("")
-            return
-
+        playback = self.session.data.playback
         if not (item := playback.item):
             self.progressbar.current = 0
-            self.status_text.set_text(ASCII_PLAY)
-            self.song_text.set_text("<Nothing playing>")
-            self.artist_text.set_text("")
+            self.set_text(self.status_text, ASCII_PLAY)
+            self.set_text(self.song_text, "<Nothing playing>")
+            self.set_text(self.artist_text, "")
             return
 
-        artists = "<TODO>"
-        if isinstance(item, TrackData):
-            artists = ", ".join(map(lambda artist: artist.get("name"), item.artists))
+        if everything or "track" in dirty:
+            artists = "<TODO>"
+            if isinstance(item, TrackData):
+                artists = ", ".join(
+                    map(lambda artist: artist.get("name"), item.artists)
+                )
+            text = item.name
+            if item.explicit:
+                text += " (E)"
+            self.set_text(self.song_text, text)
+            self.set_text(self.artist_text, artists)
 
         progress_ms = self.session.timer.get_time()
-        self.progressbar.current = progress_ms
-        self.progressbar.set_current_time(format_milli(progress_ms))
-
-        self.progressbar.done = item.duration_ms
-        self.progressbar.set_max_time(format_milli(item.duration_ms))
-
-        self.status_text.set_text(
-            ASCII_PAUSE if self.session.timer.running else ASCII_PLAY
-        )
-
-        text = item.name
-        if item.explicit:
-            text += " (E)"
-        self.song_text.set_text(text)
-        self.artist_text.set_text(artists)
+        if everything or "progress" in dirty:
+            self.progressbar.done = item.duration_ms
+            self.progressbar.set_max_time(format_milli(item.duration_ms))
+            self.progressbar.current = progress_ms
+            self.progressbar.set_current_time(format_milli(progress_ms))
+
+        if everything or "status" in dirty:
+            self.set_text(
+                self.status_text,
+                ASCII_PAUSE if self.session.timer.running else ASCII_PLAY,
+            )
+
+        if self.session.timer.running:
+            # wake up for the next second on the clock or eighth-block on the bar
+            delay_ms = 1000 - progress_ms % 1000
+            if (bar_ms := self.progressbar.ms_until_change(progress_ms)) is not None:
+                delay_ms = min(delay_ms, bar_ms)
+            self.mark_dirty("progress", delay=delay_ms / 1000)
 
     def on_unhandled_input(self, data):
         if data == "q":
             raise urwid.ExitMainLoop()
         elif data == "l":
             self.manager.switch("logs")
-        elif data == "left" and (playback := self.session.data.playback):
-            self.session.timer.decrement_time(5000)
-            new_ms = self.session.timer.get_time()
-            self.progressbar.current = new_ms
-            self.session.api.seek_to_position(new_ms)
-        elif data == "right" and (playback := self.session.data.playback):
-            self.session.timer.increment_time(5000)
-            new_ms = self.session.timer.get_time()
-            self.progressbar.current = new_ms
-            # TODO: schedule a seek with the timer ?
-            self.session.api.seek_to_position(new_ms)
+        elif data == "/":
+            self.manager.switch("picker")
+        elif data == "left" and self.session.data.playback.item:
+            self.session.seek_relative(-5000)
+            self.mark_dirty("progress")
+        elif data == "right" and self.session.data.playback.item:
+            self.session.seek_relative(5000)
+            self.mark_dirty("progress")
         elif data == "up":
-            self.session.api.skip_to_previous()
+            self.session.skip(-1)
+            self.mark_dirty("progress")
         elif data == "down":
-            self.session.api.skip_to_next()
-        elif data == " " and (playback := self.session.data.playback):
-            if playback.is_playing:
-                self.status_text.set_text(ASCII_PLAY)
-                self.session.timer.stop()
-                self.session.api.pause_playback()
-            else:
-                self.status_text.set_text(ASCII_PAUSE)
-                self.session.timer.start()
-                # TODO: start timer after confirming playback starts?
-                self.session.api.start_playback()
+            self.session.skip(1)
+            self.mark_dirty("progress")
+        elif data == " " and self.session.data.playback.item:
+            self.session.toggle_playback()
+            self.mark_dirty("status", "progress")
@@ -1,14 +1,97 @@
+import time
 from pathlib import Path
 
+import urwid
 from modern_urwid import Controller, LifecycleManager
+
+from .config import get_max_fps
+from .events import Event
 from .session import NedSession
 
+ALL = "all"
+
+
+class FrameScheduler:
+    """Batches controller redraws into frames, at most ``max_fps`` per second.
+
+    Controllers mark parts of their layout dirty; the active controller's
+    :meth:`APIController.render_frame` is then called once per frame with
+    everything that was marked since the last one.
+    """
+
+    def __init__(self, manager: "APILifecycleManager", max_fps: float):
+        self.manager = manager
+        self.max_fps = max_fps
+        self._dirty: dict[str, set[str]] = {}
+        self._handle = None
+        self._due = 0.0
+        self._last_frame = 0.0
+
+    @property
+    def interval(self) -> float:
+        return 1 / self.max_fps
+
+    def mark_dirty(self, controller: "APIController", *keys: str, delay=0.0):
+        self._dirty.setdefault(controller.name, set()).update(keys or (ALL,))
+        self._schedule(delay)
+
+    def _schedule(self, delay):
+        now = time.monotonic()
+        due = max(now + delay, self._last_frame + self.interval)
+        if self._handle is not None:
+            if due >= self._due:
+                return
+            self.manager.loop.remove_alarm(self._handle)
+        self._due = due
+        self._handle = self.manager.loop.set_alarm_in(due - now, self._frame)
+
+    def _frame(self, loop, data):
+        self._handle = None
+        self._last_frame = time.monotonic()
+        current = self.manager.current
+        if current is None or not (dirty := self._dirty.pop(current, None)):
+            return
+        controller: APIController = self.manager.controllers[current]
+        controller.render_frame(dirty)
+
+    def discard(self, controller: "APIController"):
+        self._dirty.pop(controller.name, None)
+
 
 class APIController(Controller):
     session: NedSession
 
     def set_session(self, session: NedSession):
         self.session = session
+        self._texts: dict[urwid.Text, object] = {}
+        self._watches: list[tuple[Event, object]] = []
+
+    def watch(self, event: Event, *keys: str):
+        """Mark ``keys`` dirty whenever the session publishes ``event``."""
+
+        def callback(payload):
+            self.mark_dirty(*keys)
+
+        self.session.events.subscribe(event, callback)
+        self._watches.append((event, callback))
+
+    def unwatch_all(self):
+        for event, callback in self._watches:
+            self.session.events.unsubscribe(event, callback)
+        self._watches.clear()
+
+    def mark_dirty(self, *keys: str, delay=0.0):
+        """Request a :meth:`render_frame` call for ``keys`` (everything if empty)."""
+        self.manager.frames.mark_dirty(self, *keys, delay=delay)
+
+    def render_frame(self, dirty: set[str]):
+        pass
+
+    def set_text(self, widget: urwid.Text, markup):
+        """``widget.set_text``, skipped when the markup hasn't changed."""
+        if self._texts.get(widget) != markup:
+            self._texts[widget] = markup
+            widget.set_text(markup)
 
 
 class APILifecycleManager(LifecycleManager):
@@ -17,9 +100,11 @@ class APILifecycleManager(LifecycleManager):
         context,
         session: NedSession,
         loop=None,
+        max_fps: float | None = None,
     ):
         super().__init__(context, loop)
         self.session = session
+        self.frames = FrameScheduler(self, max_fps or get_max_fps())
 
     def register(self, layout_path: str | Path, key: str):
         super().register(layout_path, key)
@@ -0,0 +1,324 @@
+"""``ned --daemon``: one headless session shared by every ned on the host.
+
+The daemon owns the poll loop, the token and librespot, and serves
+newline-delimited JSON-RPC 2.0 on a UNIX socket. Frontends attach with
+:class:`ned.remote.RemoteSession`; scripts can use any JSON-RPC client, e.g.::
+
+    echo '{"jsonrpc": "2.0", "id": 1, "method": "toggle_playback"}' \\
+        | nc -U ~/.ned/ned.sock
+
+Methods:
+
+- ``snapshot()``: the current state (playback, position, user, status, ...)
+- ``subscribe(log_since=None)``: returns a snapshot, then sends ``event``
+  notifications (``{"event": name, ...changed state}``) for every change,
+  and the log records from ``log_since`` on as ``log_appended`` events
+- ``unsubscribe()``, ``ping()``
+- ``logs(since=0)``: log records with a sequence number of at least ``since``
+- ``search(query, limit=50)``, ``load_library(refresh=False)``
+- playback commands, as on :class:`~ned.session.NedSession`:
+  ``toggle_playback()``, ``set_playing(playing)``, ``seek(position_ms)``,
+  ``seek_relative(offset_ms)``, ``skip(count=1)``,
+  ``set_volume(volume_percent)``, ``play(context_uri=None, uris=None)``
+"""
+
+import asyncio
+import json
+import os
+import signal
+import socket
+from dataclasses import asdict
+from pathlib import Path
+from typing import Any
+
+from ned.config import get_spotify_creds
+from ned.events import Event
+from ned.session import NedSession
+from ned.utils import ROOT_DIR
+
+SOCKET_PATH = ROOT_DIR / "ned.sock"
+MAX_CLIENT_BUFFER = 1 << 20  # bytes queued for a client that stopped reading
+COMMANDS = {
+    "toggle_playback",
+    "set_playing",
+    "seek",
+    "seek_relative",
+    "skip",
+    "set_volume",
+    "play",
+}
+
+# JSON-RPC error codes
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+
+
+class RPCError(Exception):
+    def __init__(self, code: int, message: str):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+def is_daemon_running(path: Path = SOCKET_PATH) -> bool:
+    if not hasattr(socket, "AF_UNIX"):
+        return False  # no daemon mode on this platform, ned runs standalone
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(str(path))
+        except OSError:
+            return False
+    return True
+
+
+class Client:
+    def __init__(self, writer: asyncio.StreamWriter):
+        self.writer = writer
+        self.subscribed = False
+        self.log_seq = 0
+
+    def send(self, message: dict[str, Any]):
+        if self.writer.is_closing():
+            return
+        # a frontend that stops reading is dropped rather than buffered for
+        if self.writer.transport.get_write_buffer_size() > MAX_CLIENT_BUFFER:
+            self.writer.close()
+            return
+        self.writer.write(json.dumps(message).encode() + b"\n")
+
+    def notify(self, method: str, params: dict[str, Any]):
+        self.send({"jsonrpc": "2.0", "method": method, "params": params})
+
+
+class Daemon:
+    def __init__(self, session: NedSession, path: Path = SOCKET_PATH):
+        self.session = session
+        self.path = path
+        self.clients: set[Client] = set()
+        self.server: asyncio.AbstractServer | None = None
+        self.stopped = asyncio.Event()
+        self._printed_seq = 0
+
+    def snapshot(self) -> dict[str, Any]:
+        session = self.session
+        return {
+            **self.playback_state(),
+            "user": session.data.user._raw,
+            "librespot": session.data.librespot.name,
+            "device_id": session.data.device_id,
+            "device_name": session.data.device_name,
+            "library": self.library_state(),
+            "log_seq": session.data.logs.next_seq,
+        }
+
+    def playback_state(self) -> dict[str, Any]:
+        return {
+            "playback": self.session.data.playback.to_dict(),
+            "position_ms": self.session.timer.get_time(),
+            "playing": self.session.timer.running,
+        }
+
+    def library_state(self) -> dict[str, Any]:
+        library = self.session.library
+        return {"size": len(library.index), "loading": library.loading}
+
+    def event_state(self, event: Event) -> dict[str, Any]:
+        if event in (
+            Event.PLAYBACK_CHANGED,
+            Event.TRACK_CHANGED,
+            Event.DEVICE_CHANGED,
+        ):
+            return self.playback_state()
+        if event == Event.USER_CHANGED:
+            return {"user": self.session.data.user._raw}
+        if event == Event.LIBRESPOT_STATUS_CHANGED:
+            return {
+                "librespot": self.session.data.librespot.name,
+                "device_id": self.session.data.device_id,
+            }
+        if event == Event.LIBRARY_CHANGED:
+            return {"library": self.library_state()}
+        return {}
+
+    def on_event(self, event: Event):
+        if event == Event.LOG_APPENDED:
+            for client in list(self.clients):
+                if client.subscribed:
+                    self.send_logs(client)
+            return
+        params = {"event": event.value, **self.event_state(event)}
+        for client in list(self.clients):
+            if client.subscribed:
+                client.notify("event", params)
+
+    def print_logs(self, _=None):
+        # the daemon's own output is the log, like librespot's
+        for record in self.session.data.logs.since(self._printed_seq):
+            print(record.text, flush=True)
+            self._printed_seq = record.seq + 1
+
+    def send_logs(self, client: Client):
+        records = self.session.data.logs.since(client.log_seq)
+        if records:
+            client.log_seq = records[-1].seq + 1
+            client.notify(
+                "event",
+                {
+                    "event": Event.LOG_APPENDED.value,
+                    "records": [asdict(r) for r in records],
+                },
+            )
+
+    async def call(self, client: Client, method: str, params: dict[str, Any]):
+        session = self.session
+        if method in COMMANDS:
+            getattr(session, method)(**params)
+            return None
+        if method == "ping":
+            return "pong"
+        if method == "snapshot":
+            return self.snapshot()
+        if method == "subscribe":
+            client.subscribed = True
+            since = params.get("log_since")
+            client.log_seq = session.data.logs.next_seq if since is None else since
+            # the backlog goes out after the reply
+            asyncio.get_running_loop().call_soon(self.send_logs, client)
+            return self.snapshot()
+        if method == "unsubscribe":
+            client.subscribed = False
+            return None
+        if method == "logs":
+            records = session.data.logs.since(params.get("since", 0))
+            return [asdict(r) for r in records]
+        if method == "search":
+            docs = session.library.index.search(
+                params["query"], params.get("limit", 50)
+            )
+            return [
+                {
+                    "kind": d.kind,
+                    "id": d.id,
+                    "uri": d.uri,
+                    "name": d.name,
+                    "subtitle": d.subtitle,
+                }
+                for d in docs
+            ]
+        if method == "load_library":
+            session.library.load(params.get("refresh", False))
+            return None
+        raise RPCError(METHOD_NOT_FOUND, f"Unknown method {method}")
+
+    async def handle_message(self, client: Client, line: bytes):
+        try:
+            message = json.loads(line)
+        except ValueError:
+            return client.send(self.error(None, PARSE_ERROR, "Parse error"))
+        if not isinstance(message, dict) or not isinstance(message.get("method"), str):
+            return client.send(self.error(None, INVALID_REQUEST, "Invalid request"))
+
+        id = message.get("id")
+        params = message.get("params") or {}
+        try:
+            if not isinstance(params, dict):
+                raise RPCError(INVALID_PARAMS, "params must be an object")
+            result = await self.call(client, message["method"], params)
+        except RPCError as e:
+            response = self.error(id, e.code, e.message)
+        except (TypeError, KeyError) as e:
+            response = self.error(id, INVALID_PARAMS, str(e))
+        except Exception as e:
+            self.session.log_error(f"RPC {message['method']} failed: {e}")
+            response = self.error(id, INTERNAL_ERROR, str(e))
+        else:
+            response = {"jsonrpc": "2.0", "id": id, "result": result}
+        if "id" in message:  # no reply to notifications
+            client.send(response)
+
+    @staticmethod
+    def error(id, code: int, message: str) -> dict[str, Any]:
+        return {"jsonrpc": "2.0", "id": id, "error": {"code": code, "message": message}}
+
+    async def handle_client(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ):
+        client = Client(writer)
+        self.clients.add(client)
+        try:
+            while line := await reader.readline():
+                await self.handle_message(client, line)
+        except (ConnectionError, asyncio.LimitOverrunError, ValueError):
+            pass
+        finally:
+            self.clients.discard(client)
+            writer.close()
+
+    def claim_socket(self):
+        if is_daemon_running(self.path):
+            raise SystemExit(f"A ned daemon is already running at {self.path}")
+        try:
+            os.unlink(self.path)  # left behind by one that crashed
+        except FileNotFoundError:
+            pass
+
+    async def run(self) -> int:
+        loop = asyncio.get_running_loop()
+        session = self.session
+        if not hasattr(socket, "AF_UNIX"):
+            print("ned --daemon needs UNIX sockets, which this platform lacks.")
+            return 1
+        if not (client_id := get_spotify_creds()):
+            print("ned isn't set up yet, run ned once without --daemon first.")
+            return 1
+        self.claim_socket()
+
+        session.attach_loop(loop)
+        # deliver events on this loop, coalesced like the TUI does
+        session.events.attach(
+            lambda: loop.call_soon_threadsafe(session.events.dispatch_pending)
+        )
+        for event in Event:
+            session.events.subscribe(event, lambda _, event=event: self.on_event(event))
+        session.events.subscribe(Event.LOG_APPENDED, self.print_logs)
+        session.data.logs.append(f"[daemon] Starting, pid {os.getpid()}")
+
+        # before setup, whose first poll must win over the cached snapshot
+        session.load_cached_state()
+        await loop.run_in_executor(None, session.setup, client_id)
+        ok, message = await loop.run_in_executor(None, session.start_librespot)
+        session.data.logs.append(f"[daemon] {message}")
+        if not ok:
+            return 1
+
+        # only this user may connect, from the moment the socket exists
+        umask = os.umask(0o077)
+        try:
+            self.server = await asyncio.start_unix_server(
+                self.handle_client, path=str(self.path)
+            )
+        finally:
+            os.umask(umask)
+        print(f"ned daemon listening on {self.path}", flush=True)
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, self.stopped.set)
+
+        await self.stopped.wait()
+        self.server.close()
+        for client in list(self.clients):
+            client.writer.close()
+        session.stop()
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+        return 0
+
+
+def run_daemon() -> int:
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    return loop.run_until_complete(Daemon(NedSession()).run())
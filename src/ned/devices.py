@@ -0,0 +1,166 @@
+import threading
+import time
+from enum import Enum
+from typing import Callable
+
+from ned.spotify.api_instance import SpotifyAPI
+from ned.spotify.data import DeviceData
+
+DEVICE_TTL = 30.0  # seconds a device list is reused for
+MISS_TTL = 3.0  # ...or while the device looked for isn't in it yet
+CONFIRM_TIMEOUT = 6.0  # seconds for a transfer to show up in playback
+RETRY_INITIAL = 2.0
+RETRY_MAX = 60.0
+TRANSFER_POLICIES = ("always", "once", "never")
+
+
+class DeviceRegistry:
+    """Caches ``/me/player/devices`` so the poll loop can ask every time.
+
+    A list is reused for ``ttl`` seconds, or ``miss_ttl`` while the device
+    looked up by name isn't registered yet. :meth:`invalidate` drops it, for
+    when librespot restarts or the device is renamed.
+    """
+
+    def __init__(
+        self,
+        api: SpotifyAPI,
+        ttl: float = DEVICE_TTL,
+        miss_ttl: float = MISS_TTL,
+        on_error: Callable[[str], None] | None = None,
+    ):
+        self.api = api
+        self.ttl = ttl
+        self.miss_ttl = miss_ttl
+        self.on_error = on_error
+        self.lock = threading.Lock()
+        self.requests_sent = 0
+        self._devices: list[DeviceData] | None = None
+        self._expires_at = 0.0
+        self._name: str | None = None
+
+    def invalidate(self):
+        with self.lock:
+            self._devices = None
+
+    def devices(self) -> list[DeviceData] | None:
+        """The current device list, or None if it couldn't be loaded."""
+        with self.lock:
+            if self._devices is not None and time.monotonic() < self._expires_at:
+                return self._devices
+            result = self.api.get_devices()
+            self.requests_sent += 1
+            if not result["ok"]:
+                if self.on_error:
+                    self.on_error(f"Could not load devices: {result['data']}")
+                return None
+            self._devices = [
+                DeviceData.from_dict(d) for d in result["data"].get("devices", [])
+            ]
+            self._expires_at = time.monotonic() + self.ttl
+            return self._devices
+
+    def find(self, name: str) -> str | None:
+        """Id of the device called ``name``, or None if there is none."""
+        if name != self._name:
+            self._name = name  # renamed, the cached list may be outdated
+            self.invalidate()
+        devices = self.devices() or []
+        for device in devices:
+            if device.name == name:
+                return device.id
+        with self.lock:
+            self._expires_at = min(self._expires_at, time.monotonic() + self.miss_ttl)
+        return None
+
+
+class TransferState(Enum):
+    IDLE = "idle"
+    REQUESTED = "requested"
+    CONFIRMED = "confirmed"
+    FAILED = "failed"
+
+
+class PlaybackTransfer:
+    """Decides when to transfer playback to ned's device, and tracks it.
+
+    ``idle -> requested -> confirmed``, or ``failed`` when the request
+    errors or playback doesn't move within ``CONFIRM_TIMEOUT``; failed
+    transfers are retried with an exponential backoff. The policy decides
+    what happens when playback is on another device:
+
+    - ``always``: take it back, even after the user moved it elsewhere.
+    - ``once``: transfer until it has worked once, then leave playback
+      where the user puts it (until :meth:`reset`).
+    - ``never``: don't transfer, ned only controls playback.
+    """
+
+    def __init__(
+        self,
+        api: SpotifyAPI,
+        policy: str = "once",
+        on_error: Callable[[str], None] | None = None,
+    ):
+        if policy not in TRANSFER_POLICIES:
+            policy = "once"
+        self.api = api
+        self.policy = policy
+        self.on_error = on_error
+        self.state = TransferState.IDLE
+        self.attempts = 0
+        self._requested_at = 0.0
+        self._retry_at = 0.0
+        self._backoff = RETRY_INITIAL
+        self._confirmed = False
+
+    def reset(self):
+        """Start over, e.g. for a new librespot process."""
+        self.state = TransferState.IDLE
+        self._backoff = RETRY_INITIAL
+        self._retry_at = 0.0
+        self._confirmed = False
+
+    @property
+    def wanted(self) -> bool:
+        if self.policy == "always":
+            return True
+        return self.policy == "once" and not self._confirmed
+
+    def step(self, device_id: str, active_id: str | None) -> TransferState:
+        """Advance with the latest poll: our device and the playing one."""
+        now = time.monotonic()
+        if active_id == device_id:
+            if self.state != TransferState.CONFIRMED:
+                self.state = TransferState.CONFIRMED
+                self._confirmed = True
+                self._backoff = RETRY_INITIAL
+            return self.state
+
+        if self.state == TransferState.REQUESTED:
+            if now - self._requested_at < CONFIRM_TIMEOUT:
+                return self.state
+            self._fail(now, "playback didn't move to this device")
+        elif self.state == TransferState.CONFIRMED:
+            self.state = TransferState.IDLE  # moved to another device
+
+        if not self.wanted or now < self._retry_at:
+            return self.state
+
+        self.attempts += 1
+        result = self.api.transfer_playback(device_id)
+        if result["ok"]:
+            self.state = TransferState.REQUESTED
+            self._requested_at = now
+        else:
+            self._fail(now, result["data"] or "request failed")
+        return self.state
+
+    def _fail(self, now: float, reason):
+        self.state = TransferState.FAILED
+        self._retry_at = now + self._backoff
+        if self.on_error:
+            self.on_error(
+                f"Could not transfer playback: {reason} "
+                f"(retry in {self._backoff:.0f}s)"
+            )
+        self._backoff = min(self._backoff * 2, RETRY_MAX)
@@ -0,0 +1,110 @@
+import os
+import threading
+from collections import defaultdict
+from enum import Enum
+from typing import Any, Callable
+
+from ned.spotify.data import PlaybackData
+
+Callback = Callable[[Any], None]
+
+
+class Event(Enum):
+    PLAYBACK_CHANGED = "playback_changed"  # play state, position jump, shuffle, ...
+    TRACK_CHANGED = "track_changed"
+    DEVICE_CHANGED = "device_changed"
+    LIBRESPOT_STATUS_CHANGED = "librespot_status_changed"
+    USER_CHANGED = "user_changed"
+    LOG_APPENDED = "log_appended"
+    LIBRARY_CHANGED = "library_changed"
+
+
+def _item_key(playback: PlaybackData):
+    if (item := playback.item) is None:
+        return None
+    return item.type, item.id or item.uri
+
+
+def diff_playback(old: PlaybackData, new: PlaybackData) -> list[Event]:
+    """Events describing what changed between two playback snapshots.
+
+    Position changes while playing are expected and not reported here, the
+    session reports seeks when it has to re-anchor the timer.
+    """
+    events = []
+    if _item_key(old) != _item_key(new):
+        events.append(Event.TRACK_CHANGED)
+    if (
+        old.is_playing != new.is_playing
+        or old.shuffle_state != new.shuffle_state
+        or old.repeat_state != new.repeat_state
+        or old.context.uri != new.context.uri
+        or (old.progress_ms is None) != (new.progress_ms is None)
+    ):
+        events.append(Event.PLAYBACK_CHANGED)
+    if (
+        old.device.id != new.device.id
+        or old.device.name != new.device.name
+        or old.device.volume_percent != new.device.volume_percent
+    ):
+        events.append(Event.DEVICE_CHANGED)
+    return events
+
+
+class EventBus:
+    """Publish/subscribe for session state changes.
+
+    :meth:`publish` may be called from any thread. Until a wakeup is
+    attached, callbacks run immediately on the publishing thread; after
+    :meth:`attach_urwid`, events are queued and delivered on the urwid main
+    loop through a ``watch_pipe``. Repeated events of the same type that
+    arrive before delivery are coalesced, keeping the newest payload.
+    """
+
+    def __init__(self):
+        self._subscribers: dict[Event, list[Callback]] = defaultdict(list)
+        self._pending: dict[Event, Any] = {}
+        self._lock = threading.Lock()
+        self._wakeup: Callable[[], None] | None = None
+
+    def subscribe(self, event: Event, callback: Callback):
+        self._subscribers[event].append(callback)
+
+    def unsubscribe(self, event: Event, callback: Callback):
+        try:
+            self._subscribers[event].remove(callback)
+        except ValueError:
+            pass
+
+    def publish(self, event: Event, payload: Any = None):
+        if self._wakeup is None:
+            self._deliver(event, payload)
+            return
+        with self._lock:
+            wake = not self._pending
+            self._pending[event] = payload
+        if wake:
+            self._wakeup()
+
+    def attach(self, wakeup: Callable[[], None]):
+        """Queue events and call ``wakeup`` (from any thread) when some are
+        waiting; the woken thread must then call :meth:`dispatch_pending`."""
+        self._wakeup = wakeup
+
+    def attach_urwid(self, loop):
+        fd = loop.watch_pipe(self._on_pipe)
+        self.attach(lambda: os.write(fd, b"\n"))
+
+    def _on_pipe(self, data: bytes) -> bool:
+        self.dispatch_pending()
+        return True
+
+    def dispatch_pending(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        for event, payload in pending.items():
+            self._deliver(event, payload)
+
+    def _deliver(self, event: Event, payload: Any):
+        for callback in list(self._subscribers[event]):
+            callback(payload)
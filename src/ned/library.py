@@ -0,0 +1,130 @@
+import threading
+from typing import Callable
+
+from ned.search import SearchIndex
+from ned.spotify.api_instance import SpotifyAPI
+from ned.spotify.cache import MetadataCache
+from ned.spotify.pager import PageError, Pager
+
+BATCH_SIZE = 50  # items indexed (and announced) at a time while loading
+
+
+def _unwrap(key: str):
+    # saved tracks and albums come wrapped as {"added_at": ..., key: {...}}
+    return lambda item: item.get(key)
+
+
+class Library:
+    """The user's saved tracks, saved albums and playlists, kept searchable.
+
+    Loading starts from the metadata cache, which keeps the id list of each
+    collection, and only pages through the Web API when that list is missing
+    or stale. Items are indexed batch by batch as they arrive, and
+    ``on_change`` is called (from the loading thread) after each batch.
+    """
+
+    # kind: (SpotifyAPI method, key of the object inside each item)
+    COLLECTIONS = {
+        "track": ("get_saved_tracks", "track"),
+        "album": ("get_saved_albums", "album"),
+        "playlist": ("get_playlists", None),
+    }
+
+    def __init__(
+        self,
+        api: SpotifyAPI,
+        cache: MetadataCache,
+        on_change: Callable[[], None] | None = None,
+        on_error: Callable[[str], None] | None = None,
+    ):
+        self.api = api
+        self.cache = cache
+        self.index = SearchIndex()
+        self.on_change = on_change
+        self.on_error = on_error
+        self.loading = False
+        self.loaded = False
+        self._pager: Pager | None = None
+        self._stopped = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def load(self, refresh=False):
+        """Load every collection in the background, once unless ``refresh``."""
+        if self._thread and self._thread.is_alive():
+            return
+        if self.loaded and not refresh:
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._load, args=(refresh,), daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._pager:
+            self._pager.cancel()
+
+    def _load(self, refresh):
+        self.loading = True
+        try:
+            for kind in self.COLLECTIONS:
+                if self._stopped.is_set():
+                    return
+                if refresh or not self._load_cached(kind):
+                    self._fetch(kind)
+            self.loaded = True
+        finally:
+            self.loading = False
+            self._changed()
+
+    def _changed(self):
+        if self.on_change:
+            self.on_change()
+
+    def _load_cached(self, kind: str) -> bool:
+        listing = self.cache.get("library", kind)
+        if listing is None:
+            return False
+        ids = listing["ids"]
+        items = self.cache.get_many(kind, ids)
+        if len(items) < len(ids):
+            return False  # some were evicted, fetch the collection again
+        for start in range(0, len(ids), BATCH_SIZE):
+            batch = ids[start : start + BATCH_SIZE]
+            self.index.add_items(kind, (items[id] for id in batch))
+            self._changed()
+        return True
+
+    def _fetch(self, kind: str):
+        method, key = self.COLLECTIONS[kind]
+        transform = _unwrap(key) if key else None
+        self._pager = getattr(self.api, method)(transform=transform)
+        ids = []
+        batch = []
+        try:
+            for item in self._pager:
+                if not item or not item.get("id"):
+                    continue
+                ids.append(item["id"])
+                batch.append(item)
+                if len(batch) >= BATCH_SIZE:
+                    self._store(kind, batch)
+                    batch = []
+        except PageError as e:
+            if self.on_error:
+                self.on_error(f"Could not load saved {kind}s: {e}")
+            return
+        finally:
+            self._pager = None
+        self._store(kind, batch)
+        if self._stopped.is_set():
+            return
+        # drop what was removed from the library since the last load
+        for id in self.index.ids(kind) - set(ids):
+            self.index.remove(kind, id)
+        self.cache.put("library", kind, {"ids": ids})
+
+    def _store(self, kind: str, batch: list):
+        if batch:
+            self.cache.put_items(kind, batch)
+            self.index.add_items(kind, batch)
+            self._changed()
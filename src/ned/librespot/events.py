@@ -0,0 +1,182 @@
+import json
+import os
+import socket
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable
+
+from ned.librespot.hook import SOCKET_ENV
+from ned.utils import ROOT_DIR
+
+HOOK_PATH = ROOT_DIR / "librespot-hook"
+MAX_VOLUME = 65535  # librespot reports volume as an unsigned 16 bit value
+
+HOOK_SCRIPT = f"""#!{sys.executable}
+from ned.librespot.hook import main
+
+main()
+"""
+
+
+def _int(value: str | None) -> int | None:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+@dataclass(slots=True)
+class PlayerEvent:
+    """One librespot player event, see ``PLAYER_EVENT`` in librespot's docs."""
+
+    event: str
+    track_id: str | None = None
+    uri: str | None = None
+    item_type: str = "track"
+    name: str = ""
+    artists: list[str] = field(default_factory=list)
+    album: str = ""
+    show_name: str = ""
+    duration_ms: int | None = None
+    position_ms: int | None = None
+    explicit: bool = False
+    volume_percent: int | None = None
+    shuffle: bool | None = None
+    repeat: str | None = None
+    received: float = 0.0  # time.monotonic()
+
+    @classmethod
+    def from_env(cls, env: dict[str, str]) -> "PlayerEvent":
+        volume = _int(env.get("VOLUME"))
+        repeat = None
+        if "REPEAT" in env:
+            if env.get("REPEAT_TRACK") == "true":
+                repeat = "track"
+            else:
+                repeat = "context" if env["REPEAT"] == "true" else "off"
+        return cls(
+            event=env.get("PLAYER_EVENT", ""),
+            track_id=env.get("TRACK_ID") or None,
+            uri=env.get("URI") or None,
+            item_type=env.get("ITEM_TYPE", "track").lower(),
+            name=env.get("NAME", ""),
+            artists=[a for a in env.get("ARTISTS", "").split("\n") if a],
+            album=env.get("ALBUM", ""),
+            show_name=env.get("SHOW_NAME", ""),
+            duration_ms=_int(env.get("DURATION_MS")),
+            position_ms=_int(env.get("POSITION_MS")),
+            explicit=env.get("IS_EXPLICIT") == "true",
+            volume_percent=(
+                None if volume is None else round(volume * 100 / MAX_VOLUME)
+            ),
+            shuffle=None if "SHUFFLE" not in env else env["SHUFFLE"] == "true",
+            repeat=repeat,
+            received=time.monotonic(),
+        )
+
+    def item_dict(self) -> dict:
+        """The event's item in Web API form, for ``TrackData``/``EpisodeData``."""
+        data = {
+            "id": self.track_id,
+            "uri": self.uri or "",
+            "type": self.item_type,
+            "name": self.name,
+            "duration_ms": self.duration_ms or 0,
+            "explicit": self.explicit,
+        }
+        if self.item_type == "episode":
+            data["show"] = {"name": self.show_name}
+        else:
+            data["artists"] = [{"name": name} for name in self.artists]
+            data["album"] = {"name": self.album}
+        return data
+
+
+def socket_path() -> Path:
+    # one per process, so a second ned doesn't take over this one's events
+    return ROOT_DIR / f"librespot-events-{os.getpid()}.sock"
+
+
+def install_hook(path: Path = HOOK_PATH) -> Path:
+    """Write the executable librespot runs for ``--onevent``."""
+    try:
+        current = path.read_text()
+    except OSError:
+        current = None
+    if current != HOOK_SCRIPT:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(HOOK_SCRIPT)
+        path.chmod(0o755)
+    return path
+
+
+class EventListener:
+    """Receives the player events forwarded by :mod:`ned.librespot.hook`."""
+
+    def __init__(
+        self,
+        on_event: Callable[[PlayerEvent], None],
+        path: Path | None = None,
+    ):
+        self.on_event = on_event
+        self.path = path or socket_path()
+        self.sock: socket.socket | None = None
+        self.thread: threading.Thread | None = None
+        self.last_event: PlayerEvent | None = None
+
+    @property
+    def running(self) -> bool:
+        return self.sock is not None
+
+    def env(self) -> dict[str, str]:
+        """Environment for librespot so its hook finds this listener."""
+        return {SOCKET_ENV: str(self.path)}
+
+    def start(self) -> bool:
+        """Start listening. Returns False where that isn't possible (Windows)."""
+        if self.running:
+            return True
+        if not hasattr(socket, "AF_UNIX"):
+            return False
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        try:
+            sock.bind(str(self.path))
+        except OSError:
+            sock.close()
+            return False
+        self.sock = sock
+        self.thread = threading.Thread(target=self._run, args=(self.sock,), daemon=True)
+        self.thread.start()
+        return True
+
+    def _run(self, sock: socket.socket):
+        while True:
+            try:
+                data = sock.recv(65536)
+            except OSError:
+                return  # closed by stop()
+            try:
+                event = PlayerEvent.from_env(json.loads(data))
+            except ValueError:
+                continue
+            self.last_event = event
+            self.on_event(event)
+
+    def stop(self):
+        if self.sock is None:
+            return
+        sock, self.sock = self.sock, None
+        # recv() doesn't return when the socket is closed from another thread
+        try:
+            sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        sock.close()
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,47 @@
+"""Run by librespot (``--onevent``) for every player event.
+
+Forwards the event's environment variables to the running ned session as a
+JSON datagram. Kept free of other ned imports since it runs once per event.
+"""
+
+import json
+import os
+import socket
+
+SOCKET_ENV = "NED_EVENT_SOCKET"
+# variables librespot sets for player events, see player_event_handler.rs
+EVENT_KEYS = {
+    "PLAYER_EVENT",
+    "TRACK_ID",
+    "URI",
+    "ITEM_TYPE",
+    "NAME",
+    "ARTISTS",
+    "ALBUM",
+    "SHOW_NAME",
+    "DURATION_MS",
+    "POSITION_MS",
+    "IS_EXPLICIT",
+    "VOLUME",
+    "SHUFFLE",
+    "REPEAT",
+    "REPEAT_TRACK",
+    "USER_NAME",
+    "CLIENT_NAME",
+}
+
+
+def main():
+    path = os.environ.get(SOCKET_ENV)
+    if not path or "PLAYER_EVENT" not in os.environ:
+        return
+    payload = json.dumps({k: v for k, v in os.environ.items() if k in EVENT_KEYS})
+    with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as sock:
+        try:
+            sock.sendto(payload.encode(), path)
+        except OSError:
+            pass  # ned isn't listening
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+import os
+import re
+import selectors
+import threading
+import time
+from typing import IO, Callable
+
+from ned.logs import LogRecord, LogStore
+
+# [2024-05-01T12:00:00Z INFO  librespot_core::session] Connecting to AP ...
+LINE_PATTERN = re.compile(
+    r"\[(?P<timestamp>\S+)\s+(?P<level>TRACE|DEBUG|INFO|WARN|ERROR)\s+"
+    r"(?P<module>[^\]\s]+)\]\s?(?P<message>.*)"
+)
+NOISY_LEVELS = {"DEBUG", "TRACE"}
+DEBUG_LIMIT = 50  # debug lines per second kept in full...
+SAMPLE_EVERY = 10  # ...then only every nth one
+READ_SIZE = 65536
+
+
+def parse_line(line: str) -> tuple[str, str, str] | None:
+    """Timestamp, level and module of a librespot log line, or None."""
+    if match := LINE_PATTERN.match(line):
+        return match["timestamp"], match["level"], match["module"]
+    return None
+
+
+class OutputReader:
+    """Reads librespot's stdout and stderr into a :class:`LogStore`.
+
+    Both pipes are multiplexed on one thread with :mod:`selectors`, and
+    every line is parsed into a structured record as it arrives. When
+    librespot floods debug or trace lines (more than ``debug_limit`` a
+    second), only every ``sample_every``th one is kept; ``dropped`` counts
+    the rest and a summary is logged once the burst is over. ``on_record``
+    is called on the reader's thread with every record it stores.
+    """
+
+    def __init__(
+        self,
+        logs: LogStore,
+        debug_limit: int = DEBUG_LIMIT,
+        sample_every: int = SAMPLE_EVERY,
+        on_record: Callable[[LogRecord], None] | None = None,
+    ):
+        self.logs = logs
+        self.debug_limit = debug_limit
+        self.sample_every = sample_every
+        self.on_record = on_record
+        self.dropped = 0
+        self.thread: threading.Thread | None = None
+
+        self._window_start = 0.0
+        self._window_lines = 0
+        self._window_dropped = 0
+
+    def start(self, *pipes: IO[bytes]):
+        if os.name == "nt":
+            # select() only works on sockets there, fall back to a thread each
+            for pipe in pipes:
+                threading.Thread(
+                    target=self._read_blocking, args=(pipe,), daemon=True
+                ).start()
+            return
+        self.thread = threading.Thread(target=self._run, args=(pipes,), daemon=True)
+        self.thread.start()
+
+    def join(self, timeout: float | None = None):
+        if self.thread:
+            self.thread.join(timeout)
+
+    def _run(self, pipes):
+        buffers: dict[int, bytes] = {}
+        with selectors.DefaultSelector() as selector:
+            for pipe in pipes:
+                selector.register(pipe.fileno(), selectors.EVENT_READ)
+                buffers[pipe.fileno()] = b""
+            while selector.get_map():
+                for key, _ in selector.select():
+                    fd = key.fd
+                    data = os.read(fd, READ_SIZE)
+                    if not data:
+                        selector.unregister(fd)
+                        if rest := buffers.pop(fd):
+                            self.ingest(rest.decode(errors="replace"))
+                        continue
+                    *lines, buffers[fd] = (buffers[fd] + data).split(b"\n")
+                    for line in lines:
+                        self.ingest(line.decode(errors="replace"))
+        self._end_window()
+
+    def _read_blocking(self, pipe: IO[bytes]):
+        for line in pipe:
+            self.ingest(line.decode(errors="replace"))
+
+    def ingest(self, line: str):
+        line = line.rstrip()
+        if not line:
+            return
+        parsed = parse_line(line)
+        if parsed is None:
+            record = self.logs.append(line)
+        else:
+            timestamp, level, module = parsed
+            if level in NOISY_LEVELS and not self._admit():
+                return
+            record = self.logs.append(line, level, timestamp, module)
+        if self.on_record:
+            self.on_record(record)
+
+    def _admit(self) -> bool:
+        now = time.monotonic()
+        if now - self._window_start >= 1:
+            self._end_window()
+            self._window_start = now
+        self._window_lines += 1
+        over = self._window_lines - self.debug_limit
+        if over <= 0 or over % self.sample_every == 0:
+            return True
+        self.dropped += 1
+        self._window_dropped += 1
+        return False
+
+    def _end_window(self):
+        if self._window_dropped:
+            self.logs.append(
+                f"[WARN] Skipped {self._window_dropped} librespot debug lines",
+                "WARN",
+            )
+        self._window_lines = 0
+        self._window_dropped = 0
@@ -0,0 +1,182 @@
+import subprocess
+import threading
+import time
+from collections import deque
+from enum import Enum
+from typing import Callable
+
+from ned.librespot.output import OutputReader
+from ned.logs import LogRecord, LogStore
+
+# librespot logs these once it is logged in and its device can be used
+READY_MESSAGES = ("Authenticated as", "Country:")
+BACKOFF_INITIAL = 1.0
+BACKOFF_MAX = 60.0
+STABLE_AFTER = 60.0  # seconds of uptime after which the backoff starts over
+CRASH_LOOP_RESTARTS = 5  # give up after this many restarts...
+CRASH_LOOP_WINDOW = 120.0  # ...within this many seconds
+STOP_TIMEOUT = 1.0
+
+
+class ProcessState(Enum):
+    STOPPED = "stopped"
+    STARTING = "starting"
+    READY = "ready"
+    BACKOFF = "restarting"
+    FAILED = "failed"
+
+
+class Supervisor:
+    """Runs librespot and keeps it running.
+
+    The process counts as ready once its output (or a player event, see
+    :meth:`mark_ready`) shows it has logged in. When it exits on its own it
+    is started again after an exponential backoff, with a fresh command
+    line from ``build_command`` (so a renewed access token is used). If it
+    keeps exiting after ``CRASH_LOOP_RESTARTS`` restarts within
+    ``CRASH_LOOP_WINDOW`` seconds, the supervisor gives up.
+    ``on_state`` is called from the supervisor's threads.
+    """
+
+    def __init__(
+        self,
+        build_command: Callable[[], list[str]],
+        logs: LogStore,
+        env: dict[str, str] | None = None,
+        on_state: Callable[["ProcessState"], None] | None = None,
+    ):
+        self.build_command = build_command
+        self.logs = logs
+        self.env = env
+        self.on_state = on_state
+        self.state = ProcessState.STOPPED
+        self.process: subprocess.Popen | None = None
+        self.output: OutputReader | None = None
+        self.restarts = 0
+        self.last_exit_code: int | None = None
+
+        self._started_at: float | None = None
+        self._backoff = BACKOFF_INITIAL
+        self._recent_exits: deque[float] = deque(maxlen=CRASH_LOOP_RESTARTS + 1)
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+        self._monitor: threading.Thread | None = None
+
+    @property
+    def uptime(self) -> float:
+        """Seconds the current process has been running, 0 if there is none."""
+        if self._started_at is None:
+            return 0.0
+        return time.monotonic() - self._started_at
+
+    @property
+    def running(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+    def _set_state(self, state: ProcessState):
+        if state != self.state:
+            self.state = state
+            if self.on_state:
+                self.on_state(state)
+
+    def start(self) -> bool:
+        """Start librespot and supervise it. Returns False if it exited at once."""
+        self.terminate()
+        self.wait()
+        self._stopping.clear()
+        self._backoff = BACKOFF_INITIAL
+        self._recent_exits.clear()
+        self._spawn()
+        self._monitor = threading.Thread(target=self._supervise, daemon=True)
+        self._monitor.start()
+        return self.process.poll() is None
+
+    def _spawn(self):
+        with self._lock:
+            self._set_state(ProcessState.STARTING)
+            self.process = subprocess.Popen(
+                self.build_command(),
+                env=self.env,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+            )
+            self._started_at = time.monotonic()
+            self.output = OutputReader(self.logs, on_record=self._on_record)
+            self.output.start(self.process.stdout, self.process.stderr)
+
+    def _on_record(self, record: LogRecord):
+        if self.state == ProcessState.STARTING and any(
+            message in record.text for message in READY_MESSAGES
+        ):
+            self.mark_ready()
+
+    def mark_ready(self):
+        if self.state == ProcessState.STARTING:
+            self._set_state(ProcessState.READY)
+
+    def _supervise(self):
+        while True:
+            code = self.process.wait()
+            self.output.join(STOP_TIMEOUT)  # log its last lines before the exit
+            if self._stopping.is_set():
+                return
+            self.last_exit_code = code
+            uptime = self.uptime
+            self._started_at = None
+
+            now = time.monotonic()
+            self._recent_exits.append(now)
+            if uptime >= STABLE_AFTER:
+                self._backoff = BACKOFF_INITIAL
+            if (
+                len(self._recent_exits) > CRASH_LOOP_RESTARTS
+                and now - self._recent_exits[0] < CRASH_LOOP_WINDOW
+            ):
+                self.logs.append(
+                    f"[ERR] librespot exited {len(self._recent_exits)} times in "
+                    f"{now - self._recent_exits[0]:.0f}s, not restarting it again"
+                )
+                self._set_state(ProcessState.FAILED)
+                return
+
+            delay = self._backoff
+            self._backoff = min(self._backoff * 2, BACKOFF_MAX)
+            self.logs.append(
+                f"[WARN] librespot exited with code {code} after {uptime:.1f}s, "
+                f"restarting in {delay:.1f}s"
+            )
+            self._set_state(ProcessState.BACKOFF)
+            if self._stopping.wait(delay):
+                return
+            self.restarts += 1
+            try:
+                self._spawn()
+            except OSError as e:
+                self.logs.append(f"[ERR] Could not restart librespot: {e}")
+                self._set_state(ProcessState.FAILED)
+                return
+
+    def terminate(self):
+        """Ask librespot to exit and stop restarting it, without waiting."""
+        self._stopping.set()
+        with self._lock:
+            if self.process and self.process.poll() is None:
+                self.process.terminate()
+
+    def wait(self, timeout: float = STOP_TIMEOUT):
+        """Wait for librespot to exit after :meth:`terminate`, then kill it."""
+        if self.process is None:
+            return
+        try:
+            self.process.wait(timeout)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+        if self._monitor and self._monitor is not threading.current_thread():
+            self._monitor.join(timeout)
+        self._started_at = None
+        self._set_state(ProcessState.STOPPED)
+
+    def stop(self, timeout: float = STOP_TIMEOUT):
+        self.terminate()
+        self.wait(timeout)
@@ -0,0 +1,94 @@
+import threading
+from collections import Counter, deque
+from dataclasses import dataclass
+from typing import Callable
+
+MAX_LOG_LINES = 5000
+
+LEVEL_STYLES = {
+    "ERROR": "text_error",
+    "WARN": "text_warn",
+    "INFO": "text_info",
+    "DEBUG": "text_info",
+    "TRACE": "text_info",
+}
+
+
+def classify(text: str) -> str:
+    if "ERROR" in text or text.startswith("[ERR]"):
+        return "ERROR"
+    elif "WARN" in text:
+        return "WARN"
+    return "INFO"
+
+
+@dataclass(slots=True)
+class LogRecord:
+    seq: int
+    text: str
+    level: str
+    # parsed from librespot's output, empty for ned's own messages
+    timestamp: str = ""
+    module: str = ""
+
+    @property
+    def style(self) -> str:
+        return LEVEL_STYLES.get(self.level, "text_info")
+
+
+class LogStore:
+    """Thread-safe ring buffer of log records.
+
+    Every record gets an increasing sequence number so readers can ask for
+    whatever arrived since the last record they saw. ``counts`` holds the
+    number of records appended per level.
+    """
+
+    def __init__(self, maxlen: int = MAX_LOG_LINES):
+        self.maxlen = maxlen
+        self.lock = threading.Lock()
+        self._records: deque[LogRecord] = deque(maxlen=maxlen)
+        self._next_seq = 0
+        self.counts: Counter[str] = Counter()
+        self.on_append: Callable[[LogRecord], None] | None = None
+
+    def append(
+        self,
+        text: str,
+        level: str | None = None,
+        timestamp: str = "",
+        module: str = "",
+    ) -> LogRecord:
+        record = LogRecord(0, text, level or classify(text), timestamp, module)
+        with self.lock:
+            record.seq = self._next_seq
+            self._next_seq += 1
+            self._records.append(record)
+            self.counts[record.level] += 1
+        if self.on_append:
+            self.on_append(record)
+        return record
+
+    def since(self, seq: int) -> list[LogRecord]:
+        """Records with a sequence number of at least ``seq``, oldest first."""
+        with self.lock:
+            if not self._records or self._next_seq <= seq:
+                return []
+            new = []
+            for record in reversed(self._records):
+                if record.seq < seq:
+                    break
+                new.append(record)
+        new.reverse()
+        return new
+
+    @property
+    def next_seq(self) -> int:
+        return self._next_seq
+
+    def __len__(self):
+        return len(self._records)
+
+    def __iter__(self):
+        with self.lock:
+            return iter(list(self._records))
@@ -0,0 +1,113 @@
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any
+
+from ned.spotify.data import PlaybackData
+
+MUTATION_TIMEOUT = 6.0
+SEEK_TOLERANCE_MS = 1500
+
+
+@dataclass
+class Mutation:
+    value: Any
+    created: float  # time.monotonic()
+    expires: float
+
+
+class PendingMutations:
+    """Local playback edits that haven't been confirmed by a poll yet.
+
+    Each edit overlays the server snapshot passed to :meth:`apply` until the
+    snapshot agrees with it (confirmed) or it times out (rejected, the server
+    state wins).
+    """
+
+    def __init__(self, timeout: float = MUTATION_TIMEOUT):
+        self.timeout = timeout
+        self.lock = threading.Lock()
+        self._pending: dict[str, Mutation] = {}
+
+    def _add(self, key, value):
+        now = time.monotonic()
+        with self.lock:
+            self._pending[key] = Mutation(value, now, now + self.timeout)
+
+    def set_playing(self, playing: bool):
+        self._add("is_playing", playing)
+
+    def seek(self, position_ms: int):
+        self._add("progress_ms", position_ms)
+
+    def skip(self, from_item_id: str | None):
+        with self.lock:
+            # the skip supersedes any seek on the track we are leaving
+            self._pending.pop("progress_ms", None)
+        self._add("item", from_item_id)
+
+    def cancel_skip(self):
+        with self.lock:
+            self._pending.pop("item", None)
+
+    def set_volume(self, volume_percent: int):
+        self._add("volume_percent", volume_percent)
+
+    def clear(self):
+        with self.lock:
+            self._pending.clear()
+
+    def __bool__(self):
+        return bool(self._pending)
+
+    def apply(self, playback: PlaybackData) -> PlaybackData:
+        """Reconcile ``playback`` (a fresh server snapshot) with pending edits.
+
+        Modifies and returns ``playback``.
+        """
+        now = time.monotonic()
+        with self.lock:
+            # play state first, the expected progress depends on it
+            for key in ("is_playing", "item", "progress_ms", "volume_percent"):
+                if (mutation := self._pending.get(key)) is None:
+                    continue
+                if now >= mutation.expires:
+                    del self._pending[key]
+                elif self._confirms(key, mutation, playback, now):
+                    del self._pending[key]
+                else:
+                    self._overlay(key, mutation, playback, now)
+        return playback
+
+    @staticmethod
+    def _expected_progress(mutation: Mutation, playback: PlaybackData, now):
+        if playback.is_playing:
+            return mutation.value + int((now - mutation.created) * 1000)
+        return mutation.value
+
+    def _confirms(self, key, mutation, playback: PlaybackData, now) -> bool:
+        if key == "is_playing":
+            return playback.is_playing == mutation.value
+        if key == "progress_ms":
+            if playback.progress_ms is None:
+                return False
+            expected = self._expected_progress(mutation, playback, now)
+            return abs(playback.progress_ms - expected) <= SEEK_TOLERANCE_MS
+        if key == "item":
+            return playback.item is not None and playback.item.id != mutation.value
+        if key == "volume_percent":
+            return playback.device.volume_percent == mutation.value
+        return True
+
+    def _overlay(self, key, mutation, playback: PlaybackData, now):
+        if key == "is_playing":
+            playback.is_playing = mutation.value
+        elif key == "progress_ms":
+            playback.progress_ms = self._expected_progress(mutation, playback, now)
+        elif key == "item":
+            # still on the old track, keep counting from the start of the next one
+            playback.progress_ms = self._expected_progress(
+                Mutation(0, mutation.created, mutation.expires), playback, now
+            )
+        elif key == "volume_percent":
+            playback.device.volume_percent = mutation.value
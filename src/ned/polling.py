@@ -0,0 +1,93 @@
+import threading
+import time
+from dataclasses import dataclass, replace
+
+from ned.spotify.data import PlaybackData
+
+
+@dataclass(frozen=True)
+class PollProfile:
+    """Poll intervals, in seconds, used by :class:`PollScheduler`."""
+
+    playing: float = 10.0  # upper bound while playing, track ends wake earlier
+    paused: float = 20.0
+    idle: float = 60.0  # nothing playing, or paused for longer than idle_after
+    idle_after: float = 300.0
+    waiting: float = 2.0  # librespot device not registered yet
+    boost: float = 1.0  # right after a user command...
+    boost_duration: float = 4.0  # ...for this long
+    track_end_margin: float = 0.3  # poll slightly after the predicted end
+    minimum: float = 0.25
+    reconcile: float = 30.0  # librespot pushes player events, polls only catch up
+
+
+POLL_PROFILES = {
+    "default": PollProfile(),
+    "responsive": PollProfile(playing=4.0, paused=8.0, idle=30.0, boost=0.5),
+    "low-traffic": PollProfile(
+        playing=30.0,
+        paused=60.0,
+        idle=300.0,
+        idle_after=120.0,
+        waiting=5.0,
+        boost=2.0,
+        boost_duration=4.0,
+    ),
+}
+
+
+def get_poll_profile(name: str = "default", overrides: dict | None = None):
+    profile = POLL_PROFILES.get(name, POLL_PROFILES["default"])
+    if overrides:
+        profile = replace(profile, **overrides)
+    return profile
+
+
+class PollScheduler:
+    """Decides how long the session should wait before the next playback poll."""
+
+    def __init__(self, profile: PollProfile | None = None):
+        self.profile = profile or POLL_PROFILES["default"]
+        self.wake_event = threading.Event()
+        self._boost_until = 0.0
+        self._paused_since: float | None = None
+
+    def notify_command(self):
+        """Poll quickly for a short while so the result of a command shows up."""
+        self._boost_until = time.monotonic() + self.profile.boost_duration
+        self.wake_event.set()
+
+    def wake(self):
+        self.wake_event.set()
+
+    def next_delay(
+        self, playback: PlaybackData, waiting_for_device=False, events_live=False
+    ) -> float:
+        profile = self.profile
+        now = time.monotonic()
+
+        if playback.is_playing:
+            self._paused_since = None
+        elif self._paused_since is None:
+            self._paused_since = now
+
+        if events_live:
+            delay = profile.reconcile
+        elif now < self._boost_until:
+            delay = profile.boost
+        elif waiting_for_device:
+            delay = profile.waiting
+        elif playback.is_playing and playback.item and playback.progress_ms is not None:
+            remaining_ms = playback.item.duration_ms - playback.progress_ms
+            delay = min(profile.playing, remaining_ms / 1000 + profile.track_end_margin)
+        elif not playback.item or now - self._paused_since >= profile.idle_after:
+            delay = profile.idle
+        else:
+            delay = profile.paused
+        return max(profile.minimum, delay)
+
+    def wait(self, delay: float) -> bool:
+        """Sleep for ``delay`` seconds or until woken. Returns True if woken."""
+        woken = self.wake_event.wait(delay)
+        self.wake_event.clear()
+        return woken
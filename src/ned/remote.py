@@ -0,0 +1,237 @@
+import asyncio
+import itertools
+import json
+import socket
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable
+
+from ned.daemon import SOCKET_PATH
+from ned.events import Event, EventBus
+from ned.search import Document
+from ned.session import SessionData
+from ned.spotify.data import LSStatus, PlaybackData, UserData
+from ned.timer import BackgroundTimer
+
+CALL_TIMEOUT = 5.0
+
+
+class RemoteError(Exception):
+    pass
+
+
+class DaemonClient:
+    """A JSON-RPC connection to ``ned --daemon``.
+
+    Replies and notifications are read on a background thread;
+    ``on_notify(method, params)`` is called from it.
+    """
+
+    def __init__(
+        self,
+        path=SOCKET_PATH,
+        on_notify: Callable[[str, dict[str, Any]], None] | None = None,
+    ):
+        self.path = path
+        self.on_notify = on_notify
+        self.sock: socket.socket | None = None
+        self.lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._waiting: dict[int, Future] = {}
+        self._thread: threading.Thread | None = None
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(str(self.path))
+        self._thread = threading.Thread(target=self._read, daemon=True)
+        self._thread.start()
+
+    def _send(self, message: dict[str, Any]):
+        data = json.dumps({"jsonrpc": "2.0", **message}).encode() + b"\n"
+        with self.lock:
+            self.sock.sendall(data)
+
+    def call(self, method: str, timeout: float = CALL_TIMEOUT, **params) -> Any:
+        id = next(self._ids)
+        future = self._waiting[id] = Future()
+        try:
+            self._send({"id": id, "method": method, "params": params})
+            return future.result(timeout)
+        except (OSError, TimeoutError) as e:
+            raise RemoteError(f"{method} failed: {e}") from e
+        finally:
+            self._waiting.pop(id, None)
+
+    def notify(self, method: str, **params) -> bool:
+        """Send a request without waiting for (or getting) a reply."""
+        try:
+            self._send({"method": method, "params": params})
+        except OSError:
+            return False  # the reader thread reports the lost connection
+        return True
+
+    def _read(self):
+        try:
+            for line in self.sock.makefile("rb"):
+                message = json.loads(line)
+                if "id" not in message:
+                    if self.on_notify:
+                        self.on_notify(message["method"], message.get("params", {}))
+                elif future := self._waiting.get(message["id"]):
+                    if error := message.get("error"):
+                        future.set_exception(RemoteError(error["message"]))
+                    else:
+                        future.set_result(message.get("result"))
+        except (OSError, ValueError):
+            pass
+        for future in list(self._waiting.values()):
+            future.set_exception(RemoteError("Lost the ned daemon"))
+        if self.on_notify:
+            self.on_notify("closed", {})
+
+    def close(self):
+        if self.sock is not None:
+            try:
+                self.sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            self.sock.close()
+
+
+class RemoteIndex:
+    def __init__(self, client: DaemonClient):
+        self.client = client
+        self.size = 0
+
+    def search(self, query: str, limit: int = 50) -> list[Document]:
+        try:
+            docs = self.client.call("search", query=query, limit=limit)
+        except RemoteError:
+            return []
+        return [Document(**doc) for doc in docs]
+
+    def __len__(self):
+        return self.size
+
+
+class RemoteLibrary:
+    """The daemon's saved library, as the picker uses :class:`ned.library.Library`."""
+
+    def __init__(self, client: DaemonClient):
+        self.client = client
+        self.index = RemoteIndex(client)
+        self.loading = False
+
+    def load(self, refresh=False):
+        self.client.notify("load_library", refresh=refresh)
+
+    def update(self, state: dict[str, Any]):
+        self.index.size = state["size"]
+        self.loading = state["loading"]
+
+    def stop(self):
+        pass
+
+
+class RemoteSession:
+    """Stands in for :class:`~ned.session.NedSession` when a daemon runs.
+
+    State is mirrored from the daemon's event notifications, and playback
+    commands are forwarded to it, so the UI code works on either.
+    """
+
+    remote = True
+
+    def __init__(self, path=SOCKET_PATH):
+        self.event_loop: asyncio.AbstractEventLoop | None = None
+        self.events = EventBus()
+        self.data = SessionData()
+        self.data.logs.on_append = lambda record: self.events.publish(
+            Event.LOG_APPENDED, record
+        )
+        self.timer = BackgroundTimer()
+        self.client = DaemonClient(path, on_notify=self._on_notify)
+        self.library = RemoteLibrary(self.client)
+
+    def attach_loop(self, loop: asyncio.AbstractEventLoop):
+        self.event_loop = loop
+
+    def setup(self, client_id=None):
+        self.client.connect()
+        # replay the daemon's log so far, it arrives as notifications
+        state = self.client.call("subscribe", log_since=0)
+        self._apply(state)
+        for event in Event:
+            if event != Event.LOG_APPENDED:
+                self.events.publish(event, None)
+
+    def load_cached_state(self):
+        pass  # the daemon has it
+
+    def start_librespot(self):
+        return True, "Attached to the ned daemon"
+
+    def stop(self):
+        self.client.close()
+
+    def _apply(self, state: dict[str, Any]):
+        if "playback" in state:
+            self.data.playback = PlaybackData.from_dict(
+                state["playback"], self.data.playback
+            )
+            self.timer.set_time(state["position_ms"])
+            if state["playing"]:
+                self.timer.start()
+            else:
+                self.timer.stop()
+        if "user" in state:
+            self.data.user = UserData.from_dict(state["user"])
+        if "librespot" in state:
+            self.data.librespot = LSStatus[state["librespot"]]
+            self.data.device_id = state["device_id"]
+        if "device_name" in state:
+            self.data.device_name = state["device_name"]
+        if "library" in state:
+            self.library.update(state["library"])
+
+    def _on_notify(self, method: str, params: dict[str, Any]):
+        if method == "closed":
+            self.data.librespot = LSStatus.FAILED
+            self.data.logs.append("[ERR] Lost the connection to the ned daemon")
+            self.events.publish(Event.LIBRESPOT_STATUS_CHANGED, self.data.librespot)
+            return
+        if method != "event":
+            return
+        event = Event(params["event"])
+        if event == Event.LOG_APPENDED:
+            for record in params["records"]:
+                self.data.logs.append(
+                    record["text"],
+                    record["level"],
+                    record["timestamp"],
+                    record["module"],
+                )
+            return
+        self._apply(params)
+        self.events.publish(event, self.data.playback)
+
+    def set_playing(self, playing: bool):
+        self.client.notify("set_playing", playing=playing)
+
+    def toggle_playback(self):
+        self.client.notify("toggle_playback")
+
+    def seek(self, position_ms: int):
+        self.client.notify("seek", position_ms=position_ms)
+
+    def seek_relative(self, offset_ms: int):
+        self.client.notify("seek_relative", offset_ms=offset_ms)
+
+    def skip(self, count: int = 1):
+        self.client.notify("skip", count=count)
+
+    def set_volume(self, volume_percent: int):
+        self.client.notify("set_volume", volume_percent=volume_percent)
+
+    def play(self, context_uri: str | None = None, uris: list[str] | None = None):
+        self.client.notify("play", context_uri=context_uri, uris=uris)
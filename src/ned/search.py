@@ -0,0 +1,221 @@
+import heapq
+import re
+import threading
+import unicodedata
+from collections import Counter
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Iterable
+
+_NON_WORD = re.compile(r"[\W_]+")
+
+# share of a term's grams a name must contain, leaves room for typos
+MIN_GRAM_RATIO = 0.5
+KIND_WEIGHTS = {"track": 0.2, "album": 0.15, "playlist": 0.1, "artist": 0.1}
+# rebuild the index once this share of its slots belongs to removed documents
+MAX_DEAD_RATIO = 0.5
+MIN_COMPACT_SLOTS = 1024
+
+
+def normalize(text: str) -> str:
+    """Casefold, drop accents and punctuation: ``"Beyoncé!"`` -> ``"beyonce"``."""
+    text = text.casefold()
+    if not text.isascii():
+        text = "".join(
+            c
+            for c in unicodedata.normalize("NFKD", text)
+            if not unicodedata.combining(c)
+        )
+    return _NON_WORD.sub(" ", text).strip()
+
+
+@lru_cache(maxsize=65536)
+def word_grams(word: str) -> tuple[str, ...]:
+    """Keys a word is indexed under: its 1-2 letter prefixes and its trigrams.
+
+    ``^`` marks the start of the word, so prefix matches share more grams
+    than matches in the middle of a word.
+    """
+    word = f"^{word}"
+    grams = [word[:2]]
+    if len(word) > 2:
+        grams.append(word[:3])
+        grams.extend(word[i : i + 3] for i in range(1, len(word) - 2))
+    return tuple(grams)
+
+
+def term_grams(term: str) -> list[str]:
+    """Keys to look up for a query term (typed so far)."""
+    if len(term) <= 2:
+        return [f"^{term}"]
+    term = f"^{term}"
+    return list(dict.fromkeys(term[i : i + 3] for i in range(len(term) - 2)))
+
+
+@dataclass(slots=True)
+class Document:
+    kind: str  # track, album, artist or playlist
+    id: str
+    uri: str
+    name: str
+    subtitle: str = ""  # artists, owner, ...
+    norm_name: str = ""
+    name_words: tuple[str, ...] = ()
+    grams: frozenset[str] = field(default_factory=frozenset, repr=False)
+
+
+def _names(objects: list[dict[str, Any]] | None) -> str:
+    return ", ".join(o.get("name", "") for o in objects or [] if o)
+
+
+def document_from_item(kind: str, item: dict[str, Any]) -> Document | None:
+    """Build a document from an API object (track, album, artist or playlist)."""
+    if not item or not item.get("id"):
+        return None
+    extra = ""
+    if kind == "track":
+        subtitle = _names(item.get("artists"))
+        extra = (item.get("album") or {}).get("name", "")
+    elif kind == "album":
+        subtitle = _names(item.get("artists"))
+    elif kind == "playlist":
+        subtitle = (item.get("owner") or {}).get("display_name") or ""
+    else:
+        subtitle = ""
+    norm_name = normalize(item.get("name") or "")
+    grams = set()
+    # the album name is searchable but not shown
+    for text in (norm_name, normalize(subtitle), normalize(extra)):
+        for word in text.split():
+            grams.update(word_grams(word))
+    return Document(
+        kind=kind,
+        id=item["id"],
+        uri=item.get("uri", ""),
+        name=item.get("name") or "",
+        subtitle=subtitle,
+        norm_name=norm_name,
+        name_words=tuple(norm_name.split()),
+        grams=frozenset(grams),
+    )
+
+
+class SearchIndex:
+    """In-memory inverted index over library names.
+
+    Documents are indexed under word prefixes and trigrams of their name,
+    subtitle (artists, owner) and album name. A query matches documents that
+    share enough grams with every query term, so prefixes, substrings and
+    small typos all match. Results are ranked by gram overlap, with bonuses
+    for matches at the start of the name. Safe to update from one thread
+    while searching from another.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self._docs: list[Document | None] = []
+        self._ids: dict[tuple[str, str], int] = {}
+        self._postings: dict[str, set[int]] = {}
+
+    def __len__(self):
+        return len(self._ids)
+
+    def add(self, doc: Document):
+        with self.lock:
+            self._add(doc)
+
+    def add_items(self, kind: str, items: Iterable[dict[str, Any]]) -> int:
+        """Index API objects, replacing ones already indexed. Returns the count."""
+        docs = [d for item in items if (d := document_from_item(kind, item))]
+        with self.lock:
+            for doc in docs:
+                self._add(doc)
+        return len(docs)
+
+    def _add(self, doc: Document):
+        key = (doc.kind, doc.id)
+        if key in self._ids:
+            self._remove(key)
+        slot = len(self._docs)
+        self._docs.append(doc)
+        self._ids[key] = slot
+        for gram in doc.grams:
+            self._postings.setdefault(gram, set()).add(slot)
+
+    def remove(self, kind: str, id: str):
+        with self.lock:
+            self._remove((kind, id))
+
+    def _remove(self, key: tuple[str, str]):
+        slot = self._ids.pop(key, None)
+        if slot is None:
+            return
+        for gram in self._docs[slot].grams:
+            postings = self._postings[gram]
+            postings.discard(slot)
+            if not postings:
+                del self._postings[gram]
+        self._docs[slot] = None
+        slots = len(self._docs)
+        if (
+            slots >= MIN_COMPACT_SLOTS
+            and slots - len(self._ids) > slots * MAX_DEAD_RATIO
+        ):
+            self._compact()
+
+    def _compact(self):
+        """Renumber the live documents so removed ones stop taking up slots."""
+        docs = [doc for doc in self._docs if doc is not None]
+        self._docs = []
+        self._ids = {}
+        self._postings = {}
+        for doc in docs:
+            self._add(doc)
+
+    def ids(self, kind: str) -> set[str]:
+        with self.lock:
+            return {id for k, id in self._ids if k == kind}
+
+    def search(self, query: str, limit: int = 50) -> list[Document]:
+        terms = normalize(query).split()
+        if not terms:
+            return []
+        with self.lock:
+            scores: dict[int, float] | None = None
+            for term in terms:
+                grams = term_grams(term)
+                counts = Counter()
+                for gram in grams:
+                    if postings := self._postings.get(gram):
+                        counts.update(postings)
+                need = max(1, round(len(grams) * MIN_GRAM_RATIO))
+                weight = 1 / len(grams)
+                matched = {
+                    slot: count * weight
+                    for slot, count in counts.items()
+                    if count >= need and (scores is None or slot in scores)
+                }
+                if scores is not None:
+                    matched = {slot: s + scores[slot] for slot, s in matched.items()}
+                scores = matched
+                if not scores:
+                    return []
+
+            # gram overlap is cheap to compute for everything, the bonuses
+            # only for the best candidates
+            candidates = heapq.nlargest(limit * 4, scores.items(), key=lambda s: s[1])
+            docs = [(self._docs[slot], score) for slot, score in candidates]
+
+        phrase = " ".join(terms)
+        ranked = []
+        for doc, score in docs:
+            if doc.norm_name == phrase:
+                score += 2
+            elif doc.norm_name.startswith(phrase):
+                score += 1
+            if all(any(w.startswith(t) for w in doc.name_words) for t in terms):
+                score += 0.5
+            score += KIND_WEIGHTS.get(doc.kind, 0)
+            ranked.append((score, doc))
+        ranked.sort(key=lambda r: r[0], reverse=True)
+        return [doc for _, doc in ranked[:limit]]
@@ -1,15 +1,45 @@
+import asyncio
 import atexit
-import shutil
-import subprocess
+import os
 import threading
 import time
+from dataclasses import replace
 
-from ned.config import get_cached_token, get_device_name, save_cached_token
+from ned.commands import CommandQueue
+from ned.config import (
+    get_api_urls,
+    get_cached_token,
+    get_device_name,
+    get_librespot_path,
+    get_poll_settings,
+    get_transfer_policy,
+    save_cached_token,
+)
+from ned.devices import DeviceRegistry, PlaybackTransfer, TransferState
+from ned.events import Event, EventBus, diff_playback
+from ned.librespot.events import EventListener, PlayerEvent, install_hook
+from ned.librespot.supervisor import ProcessState, Supervisor
+from ned.library import Library as SavedLibrary
+from ned.logs import LogStore
+from ned.optimistic import PendingMutations
+from ned.polling import PollScheduler, get_poll_profile
 from ned.spotify.api_instance import SpotifyAPI
+from ned.spotify.async_api import AsyncSpotifyAPI
+from ned.spotify.batch import BatchLookup
+from ned.spotify.cache import get_cache
+from ned.spotify.ratelimit import Deferral, is_rate_limited
 from ned.spotify.scope import Library, Playback, SpotifyConnect, get_scope
+from ned.spotify.token import Token
+from ned.spotify.transport import is_request_failure
 from ned.timer import BackgroundTimer
-from ned.utils import CACHE_DIR, is_librespot_installed
-from ned.spotify.data import LSStatus, UserData, PlaybackData
+from ned.utils import CACHE_DIR
+from ned.spotify.data import (
+    EpisodeData,
+    LSStatus,
+    PlaybackData,
+    TrackData,
+    UserData,
+)
 
 SCOPE = get_scope(
     SpotifyConnect.ReadPlaybackState,
@@ -23,55 +53,142 @@ SCOPE = get_scope(
     Library.Read,
 )
 REDIRECT_URI = "http://127.0.0.1:8080/callback"
-UPDATE_INTERVAL = 2
-DEVICE_UPDATE_INTERVAL = 5  # TODO: this isn't used
+# don't re-anchor the local timer for differences smaller than this
+TIMER_DRIFT_TOLERANCE_MS = 1000
+# refresh the token before (re)starting librespot if it expires sooner
+LIBRESPOT_TOKEN_MARGIN = 600
 
 
 class SessionData:
     device_id: str | None = None
     device_name: str = ""
-    logs: list[str] = []
+    logs: LogStore
+    deferred_requests: int = 0
     user = UserData.from_dict({})
     playback = PlaybackData.from_dict({})
     librespot: LSStatus = LSStatus.CONNECTING
 
+    def __init__(self):
+        self.logs = LogStore()
+
 
 class NedSession:
+    remote = False  # see ned.remote.RemoteSession
+
     def __init__(self):
-        self.librespot_process = None
+        self.event_loop: asyncio.AbstractEventLoop | None = None
+        self.command_lock: asyncio.Lock | None = None
 
+        self.events = EventBus()
         self.data = SessionData()
         self.data.device_name = get_device_name()
+        self.data.logs.on_append = lambda record: self.events.publish(
+            Event.LOG_APPENDED, record
+        )
 
         self.timer = BackgroundTimer()
         self.timer.start()
 
+        self.cache = get_cache()
+        self.user_loaded = False
+
+        self.poller = PollScheduler(get_poll_profile(*get_poll_settings()))
+        self.commands = CommandQueue(self)
+        # position before the current batch of skips, see undo_skips
+        self._skip_origin = (0, 0.0)
+        self.pending = PendingMutations()
+
+        # player events pushed by librespot, see on_player_event
+        self.player_events = EventListener(self.on_player_event)
+        self._player_event_at = 0.0
+        self.librespot = Supervisor(
+            self.librespot_command,
+            self.data.logs,
+            env={**os.environ, **self.player_events.env()},
+            on_state=self.on_librespot_state,
+        )
+
         self.thread_running = False
         self.thread = None
         self.lock = threading.Lock()
 
     def setup(self, client_id):
         self.client_id = client_id
+        api_url, accounts_url = get_api_urls()
         self.api = SpotifyAPI(
             client_id=self.client_id,
             scope=SCOPE,
+            on_token_update=self.on_token_update,
+            api_url=api_url,
+            accounts_url=accounts_url,
         )
-        token = get_cached_token()
-        if token and self.api.is_token_valid(token):
-            self.access_token = token
-            self.api.oauth_token = self.access_token
-        else:
-            self.api.perform_oauth()
-            self.access_token = self.api.oauth_token
-        save_cached_token(self.access_token)
+        self.api.limiter.on_defer = self.on_request_deferred
+        self.aapi = AsyncSpotifyAPI(self.api)
+        # single-id metadata lookups, batched into multi-id requests
+        self.lookup = BatchLookup(self.api, self.cache)
+        self.library = SavedLibrary(
+            self.api,
+            self.cache,
+            on_change=lambda: self.events.publish(Event.LIBRARY_CHANGED),
+            on_error=self.log_error,
+        )
+        self.devices = DeviceRegistry(self.api, on_error=self.log_error)
+        self.transfer = PlaybackTransfer(
+            self.api, get_transfer_policy(), on_error=self.log_error
+        )
+        self.load_token()
 
         self.start_thread()
 
         atexit.register(self.stop)
 
-    def start_librespot(self):
-        cmd = [
-            shutil.which("librespot"),
+    @property
+    def access_token(self) -> str | None:
+        return self.api.oauth_token
+
+    def load_token(self):
+        """Restore the cached token, refreshing or re-authorizing if needed.
+
+        A token with a known expiry is trusted until then without a network
+        round trip; tokens saved by older versions are validated once.
+        """
+        token = Token.from_cached(get_cached_token())
+        if token is None:
+            return self.api.perform_oauth()
+
+        self.api.set_token(token)
+        if token.expires_at is None:
+            if not self.api.is_token_valid(token.access_token):
+                self.api.perform_oauth()
+        elif token.expired and not self.api.tokens.refresh():
+            self.api.perform_oauth()
+
+    def log_error(self, message: str):
+        self.data.logs.append(f"[ERR] {message}")
+
+    def on_token_update(self, token: Token):
+        save_cached_token(token.to_dict())
+
+    def load_cached_state(self):
+        """Show the last known user and playback until the first polls land."""
+        if user := UserData.from_cache(self.cache, "me"):
+            self.data.user = user
+            self.events.publish(Event.USER_CHANGED, user)
+        if playback := PlaybackData.from_cache(self.cache, "last"):
+            # the position is stale, keep it paused until the first poll
+            playback.is_playing = False
+            self.timer.stop()
+            self.timer.set_time(playback.progress_ms or 0)
+            self.set_playback(playback)
+
+    def librespot_command(self) -> list[str]:
+        # librespot can't renew the token itself, hand it one that lasts
+        token = self.api.tokens.token
+        if token and token.expires_in() is not None:
+            if token.expires_in() < LIBRESPOT_TOKEN_MARGIN:
+                self.api.tokens.refresh()
+        command = [
+            get_librespot_path() or "librespot",
             "--name",
             self.data.device_name,
             # "--backend",
@@ -87,108 +204,338 @@ class NedSession:
             "320",
             # "--verbose",
         ]
+        if self.player_events.running:
+            command += ["--onevent", str(install_hook())]
+        return command
 
-        self.stop()
-
-        if not is_librespot_installed():
+    def start_librespot(self):
+        if get_librespot_path() is None:
             print(
                 "Librespot is not installed. Please see the setup instructions at https://github.com/Jackkillian/ned for more details."
             )
             exit(1)
 
-        self.librespot_process = subprocess.Popen(
-            cmd,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            bufsize=1,
-        )
-
-        def log_output(pipe):
-            for line in pipe:
-                self.data.logs.append(line.rstrip())
-
-        threading.Thread(
-            target=log_output, args=(self.librespot_process.stdout,), daemon=True
-        ).start()
-        threading.Thread(
-            target=log_output, args=(self.librespot_process.stderr,), daemon=True
-        ).start()
-
-        # Check if process is still running
-        if self.librespot_process.poll() is not None:
+        if not self.player_events.start():
+            self.data.logs.append(
+                "[WARN] Can't receive librespot's player events here, polling instead"
+            )
+        if not self.librespot.start():
             return (
                 False,
-                f"Librespot exited with code {self.librespot_process.returncode}",
+                f"Librespot exited with code {self.librespot.process.returncode}",
             )
 
         return True, "Successfully started Librespot"
 
+    def on_librespot_state(self, state: ProcessState):
+        if state == ProcessState.READY:
+            self.devices.invalidate()
+            self.poller.wake()  # look for the device now
+        elif state == ProcessState.BACKOFF:
+            # the device goes away with the process
+            self.devices.invalidate()
+            self.transfer.reset()
+            self.data.device_id = None
+            self.set_librespot_status(LSStatus.WAITING)
+        elif state == ProcessState.FAILED:
+            self.set_librespot_status(LSStatus.FAILED)
+
+    def on_request_deferred(self, deferral: Deferral):
+        self.data.deferred_requests += 1
+        action = "Dropped" if deferral.dropped else "Delayed"
+        self.data.logs.append(
+            f"[WARN] {action} {deferral.method} {deferral.path} "
+            f"({deferral.reason}, retry in {deferral.delay:.1f}s)"
+        )
+
+    @property
+    def events_live(self) -> bool:
+        """Whether librespot reports playback changes, so polls can be rare."""
+        return (
+            self.player_events.running
+            and self.data.device_id is not None
+            and self.data.playback.device.id == self.data.device_id
+        )
+
+    def on_player_event(self, event: PlayerEvent):
+        """Apply a librespot player event right away, without a poll.
+
+        Called on the listener's thread. Polls sent before the event don't
+        overwrite what it changed, the next poll reconciles the rest.
+        """
+        self._player_event_at = event.received
+        playback = self.data.playback
+        name = event.event
+
+        if name == "session_connected":
+            self.librespot.mark_ready()
+        elif name == "track_changed":
+            self.on_track_event(event)
+        elif name in ("playing", "paused", "stopped"):
+            playing = name == "playing"
+            if event.position_ms is not None:
+                self.timer.set_time(event.position_ms)
+                playback.progress_ms = event.position_ms
+            if playing:
+                self.timer.start()
+            else:
+                self.timer.stop()
+            playback.is_playing = playing
+            self.events.publish(Event.PLAYBACK_CHANGED, playback)
+        elif name in ("seeked", "position_correction"):
+            if event.position_ms is not None:
+                self.timer.set_time(event.position_ms)
+                playback.progress_ms = event.position_ms
+                self.events.publish(Event.PLAYBACK_CHANGED, playback)
+        elif name == "volume_changed":
+            if self.events_live and event.volume_percent is not None:
+                playback.device.volume_percent = event.volume_percent
+                self.events.publish(Event.DEVICE_CHANGED, playback)
+        elif name == "shuffle_changed" and event.shuffle is not None:
+            playback.shuffle_state = event.shuffle
+            self.events.publish(Event.PLAYBACK_CHANGED, playback)
+        elif name == "repeat_changed" and event.repeat is not None:
+            playback.repeat_state = event.repeat
+            self.events.publish(Event.PLAYBACK_CHANGED, playback)
+        elif name == "unavailable":
+            self.data.logs.append(f"[WARN] {event.uri} is unavailable")
+
+    def on_track_event(self, event: PlayerEvent):
+        if not event.track_id:
+            return
+        kind = "episode" if event.item_type == "episode" else "track"
+        cls = EpisodeData if kind == "episode" else TrackData
+        # the event only carries names, fill in the rest from the cache or
+        # a (batched) lookup
+        cached = cls.from_cache(self.cache, event.track_id)
+        item = cached or cls.from_dict(event.item_dict())
+        self.timer.set_time(0)
+        self.set_playback(replace(self.data.playback, item=item, progress_ms=0))
+        if cached is None:
+            future = self.lookup.get(kind, event.track_id)
+            future.add_done_callback(lambda f: self._fill_item(cls, event.track_id, f))
+
+    def _fill_item(self, cls, id: str, future):
+        if future.exception() is not None or future.result() is None:
+            return
+        playback = self.data.playback
+        if playback.item is None or playback.item.id != id:
+            return  # moved on to another track already
+        playback.item = cls.from_dict(future.result())
+        self.events.publish(Event.TRACK_CHANGED, playback)
+
     def get_device_id(self):
-        if self.data.device_id is not None:
-            return self.data.device_id
-        result = self.api.get_devices()
+        return self.devices.find(self.data.device_name)
+
+    def attach_loop(self, loop: asyncio.AbstractEventLoop):
+        """Set the asyncio loop that :meth:`send_command` schedules onto."""
+        self.event_loop = loop
+        self.command_lock = asyncio.Lock()
+
+    async def _run_command(self, name, *args, **kwargs):
+        # one at a time, so commands reach Spotify in the order they were given
+        async with self.command_lock:
+            try:
+                result = await getattr(self.aapi, name)(*args, **kwargs)
+            except Exception as e:
+                self.data.logs.append(f"[ERR] {name} failed: {e}")
+                return None
         if not result["ok"]:
-            self.data.logs.append(f"[ERR] Could not load devices: {result['data']}")
-            return None
-        for device in result["data"]["devices"]:
-            if device["name"] == self.data.device_name:
-                return device["id"]
-        return None
+            self.data.logs.append(f"[ERR] {name} failed: {result['data']}")
+        self.notify_command()
+        return result
+
+    def send_command(self, name: str, *args, **kwargs):
+        """Run an :class:`AsyncSpotifyAPI` command in the background.
+
+        Commands run one after another, in the order they were sent. Safe to
+        call from the event loop itself or from any other thread.
+        """
+        coro = self._run_command(name, *args, **kwargs)
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is not None and running is self.event_loop:
+            return running.create_task(coro)
+        return asyncio.run_coroutine_threadsafe(coro, self.event_loop)
+
+    def set_playback(self, playback: PlaybackData, seeked=False) -> list[Event]:
+        events = diff_playback(self.data.playback, playback)
+        if seeked and Event.PLAYBACK_CHANGED not in events:
+            events.append(Event.PLAYBACK_CHANGED)
+        self.data.playback = playback
+        for event in events:
+            self.events.publish(event, playback)
+        return events
+
+    def set_librespot_status(self, status: LSStatus):
+        if status != self.data.librespot:
+            self.data.librespot = status
+            self.events.publish(Event.LIBRESPOT_STATUS_CHANGED, status)
+
+    def set_playing(self, playing: bool):
+        self.pending.set_playing(playing)
+        self.data.playback.is_playing = playing
+        self.events.publish(Event.PLAYBACK_CHANGED, self.data.playback)
+        if playing:
+            self.timer.start()
+            self.send_command("start_playback")
+        else:
+            self.timer.stop()
+            self.send_command("pause_playback")
+
+    def toggle_playback(self):
+        self.set_playing(not self.data.playback.is_playing)
+
+    def seek(self, position_ms: int):
+        # settle queued skips first, a batch that cancels out restores the timer
+        self.commands.flush_skips()
+        position_ms = max(0, position_ms)
+        if item := self.data.playback.item:
+            position_ms = min(position_ms, item.duration_ms)
+        self.pending.seek(position_ms)
+        self.timer.set_time(position_ms)
+        self.data.playback.progress_ms = position_ms
+        self.events.publish(Event.PLAYBACK_CHANGED, self.data.playback)
+        self.commands.seek(position_ms)
+
+    def seek_relative(self, offset_ms: int):
+        self.commands.flush_skips()
+        self.seek(self.timer.get_time() + offset_ms)
+
+    def skip(self, count: int = 1):
+        if not self.commands.skipping:
+            self._skip_origin = (self.timer.get_time(), time.monotonic())
+        item = self.data.playback.item
+        self.pending.skip(item.id if item else None)
+        self.timer.set_time(0)
+        self.data.playback.progress_ms = 0
+        self.events.publish(Event.PLAYBACK_CHANGED, self.data.playback)
+        self.commands.skip(count)
+
+    def undo_skips(self):
+        """Called by the command queue when a batch of skips cancels out."""
+        self.pending.cancel_skip()
+        position_ms, skipped_at = self._skip_origin
+        if self.timer.running:
+            position_ms += int((time.monotonic() - skipped_at) * 1000)
+        self.timer.set_time(position_ms)
+        self.data.playback.progress_ms = position_ms
+        self.events.publish(Event.PLAYBACK_CHANGED, self.data.playback)
+
+    def set_volume(self, volume_percent: int):
+        volume_percent = min(100, max(0, volume_percent))
+        self.pending.set_volume(volume_percent)
+        self.data.playback.device.volume_percent = volume_percent
+        self.events.publish(Event.DEVICE_CHANGED, self.data.playback)
+        self.send_command("set_volume", volume_percent)
+
+    def play(self, context_uri: str | None = None, uris: list[str] | None = None):
+        self.send_command("start_playback", context_uri, uris)
+
+    def notify_command(self):
+        """Called after a user command so the next polls pick up its effect."""
+        self.poller.notify_command()
 
     def stop(self):
-        if self.librespot_process:
-            self.librespot_process.terminate()
-            try:
-                self.librespot_process.wait(timeout=3)
-            except subprocess.TimeoutExpired:
-                self.librespot_process.kill()
-                self.librespot_process.wait()
+        # librespot exits while everything else shuts down
+        self.librespot.terminate()
+        self.thread_running = False
+        self.poller.wake()
+        self.player_events.stop()
+        if hasattr(self, "api"):
+            self.api.tokens.cancel_renewal()
+            self.library.stop()
+            self.lookup.close()
+        self.librespot.wait()
 
     def _update_state_loop(self):
         while self.thread_running:
-            time.sleep(UPDATE_INTERVAL)
             with self.lock:
-                user_result = self.api.get_me()
-                if user_result["ok"]:
-                    # TODO: maybe only call this once
-                    self.data.user = UserData.from_dict(user_result["data"])
-                else:
-                    self.data.logs.append(
-                        f"[ERR] Could not load user data: {user_result['data']}"
-                    )
-
-                result = self.api.get_current_playback()
-                if result["ok"] and result["data"]:
-                    self.data.playback = PlaybackData.from_dict(result["data"])
-                    self.timer.set_time(self.data.playback.progress_ms)
-
-                    # TODO: should logic be in this class?
-                    if self.data.playback.is_playing and not self.timer.running:
-                        self.timer.start()
-                    elif not self.data.playback.is_playing and self.timer.running:
-                        self.timer.stop()
-                else:
-                    self.data.playback = PlaybackData.from_dict({})
-
-                if not result["ok"]:
-                    self.data.logs.append(
-                        f"[ERR] Could not load playback: {result['data']}"
-                    )
-
-                self.data.device_id = self.get_device_id()
-                if not self.data.device_id:
-                    self.data.librespot = LSStatus.WAITING
-                elif self.data.playback.device.id == self.data.device_id:
-                    self.data.librespot = LSStatus.CONNECTED
-                else:
-                    self.data.librespot = LSStatus.CONNECTING
-                    result = self.api.transfer_playback(self.data.device_id)
-                    if not result["ok"]:
-                        self.data.logs.append(
-                            f"[ERR] Could not transfer playback: {result['data']}"
-                        )
-                        self.data.librespot = LSStatus.FAILED
+                try:
+                    self._update_state()
+                except Exception as e:
+                    # keep polling, the next attempt may well work
+                    self.log_error(f"Could not update playback state: {e}")
+                delay = self.poller.next_delay(
+                    self.data.playback,
+                    self.data.librespot == LSStatus.WAITING,
+                    self.events_live,
+                )
+            self.poller.wait(max(delay, self.api.limiter.blocked_for()))
+
+    def _update_state(self):
+        # the profile doesn't change during a session, only fetch it once
+        if not self.user_loaded:
+            user_result = self.api.get_me()
+            if user_result["ok"]:
+                self.user_loaded = True
+                self.data.user = UserData.from_dict(user_result["data"])
+                self.cache.put("user", "me", user_result["data"])
+                self.events.publish(Event.USER_CHANGED, self.data.user)
+            else:
+                self.data.logs.append(
+                    f"[ERR] Could not load user data: {user_result['data']}"
+                )
+
+        sent_at = time.monotonic()
+        result = self.api.get_current_playback()
+        if is_rate_limited(result):
+            # no news rather than "nothing playing", keep the last snapshot
+            return
+        if is_request_failure(result):
+            self.log_error(
+                f"Could not load playback: {result['data']['error']['message']}"
+            )
+            return
+        if self._player_event_at > sent_at:
+            pass  # librespot reported something newer while this was in flight
+        elif result["ok"] and result["data"]:
+            playback = self.pending.apply(
+                PlaybackData.from_dict(result["data"], self.data.playback)
+            )
+            seeked = (
+                playback.progress_ms is not None
+                and abs(self.timer.get_time() - playback.progress_ms)
+                > TIMER_DRIFT_TOLERANCE_MS
+            )
+            if seeked:
+                self.timer.set_time(playback.progress_ms)
+
+            # TODO: should logic be in this class?
+            if playback.is_playing and not self.timer.running:
+                self.timer.start()
+            elif not playback.is_playing and self.timer.running:
+                self.timer.stop()
+            if events := self.set_playback(playback, seeked):
+                self.cache.put("playback", "last", result["data"])
+                if Event.TRACK_CHANGED in events and playback.item is not None:
+                    playback.item.to_cache(self.cache)
+        else:
+            self.set_playback(PlaybackData.from_dict({}))
+
+        if not result["ok"]:
+            self.data.logs.append(f"[ERR] Could not load playback: {result['data']}")
+
+        device_id = self.get_device_id()
+        if device_id != self.data.device_id:
+            self.data.device_id = device_id
+            self.events.publish(Event.DEVICE_CHANGED, device_id)
+        if not self.data.device_id:
+            self.set_librespot_status(LSStatus.WAITING)
+            return
+        active_id = self.data.playback.device.id
+        state = self.transfer.step(self.data.device_id, active_id)
+        if state == TransferState.CONFIRMED:
+            self.set_librespot_status(LSStatus.CONNECTED)
+        elif state == TransferState.REQUESTED:
+            self.set_librespot_status(LSStatus.CONNECTING)
+        elif state == TransferState.FAILED:
+            self.set_librespot_status(LSStatus.FAILED)
+        elif active_id is not None:
+            self.set_librespot_status(LSStatus.INACTIVE)
+        # with no device active at all the status stays as it was
 
     def start_thread(self):
         if not self.thread_running:
@@ -198,5 +545,6 @@ class NedSession:
 
     def stop_thread(self):
         self.thread_running = False
+        self.poller.wake()
         if self.thread:
             self.thread.join()
@@ -1,10 +1,15 @@
 from enum import Enum
-from typing import Any, Literal, TypedDict
+from typing import Any, Callable, Literal, TypedDict
 from urllib.parse import urlencode
 
 import requests
 
+from ned.spotify.pager import DEFAULT_MAX_WORKERS, DEFAULT_PAGE_SIZE, Pager
 from ned.spotify.pkce import get_oauth, get_token_from_oauth
+from ned.spotify.ratelimit import Priority, RateLimiter, deferred_response
+from ned.spotify.token import Token, TokenManager
+from ned.spotify.transport import Transport, failed_response, get_transport
+from ned.utils import ROOT_DIR
 
 API = "https://api.spotify.com/v1"
 ACCOUNT_API = "https://accounts.spotify.com/api"
@@ -23,45 +28,85 @@ class APIResult(TypedDict):
 
 
 # TODO: for each request, check if the status code is one of these:
-# 401 (bad token)
 # 403 (bad oauth request)
-# 429 (the app has exceeded its rate limits)
 class SpotifyAPI:
-    def __init__(self, client_id, scope, redirect_uri=REDIRECT_URI):
+    def __init__(
+        self,
+        client_id,
+        scope,
+        redirect_uri=REDIRECT_URI,
+        transport: Transport | None = None,
+        limiter: RateLimiter | None = None,
+        on_token_update: Callable[[Token], None] | None = None,
+        api_url: str | None = None,
+        accounts_url: str | None = None,
+    ):
         self.client_id = client_id
         self.scope = scope
         self.redirect_uri = redirect_uri
+        # overridable to talk to a local stand-in, see tools/mock_spotify.py
+        self.api_url = (api_url or API).rstrip("/")
+        self.accounts_url = (accounts_url or ACCOUNT_API).rstrip("/")
+        self.transport = transport or get_transport()
+        # shared_path lets every ned process on this host honour a 429
+        self.limiter = limiter or RateLimiter(shared_path=ROOT_DIR / "ratelimit")
         self.oauth_token = None
+        self.on_token_update = on_token_update
+        self.tokens = TokenManager(
+            client_id,
+            self.transport,
+            on_update=self._on_token_update,
+            token_url=f"{self.accounts_url}/token",
+        )
 
-    def _get_auth_headers(self):
+    def _on_token_update(self, token: Token):
+        self.oauth_token = token.access_token
+        if self.on_token_update:
+            self.on_token_update(token)
+
+    def set_token(self, token: Token, persist=False):
+        """Use ``token`` for requests and renew it before it expires."""
+        self.oauth_token = token.access_token
+        self.tokens.set_token(token, notify=persist)
+
+    @property
+    def oauth_token(self):
+        return self._oauth_token
+
+    @oauth_token.setter
+    def oauth_token(self, token):
+        # headers are rebuilt only when the token changes, not per request
+        self._oauth_token = token
+        self._auth_headers = self._build_auth_headers(token)
+
+    @staticmethod
+    def _build_auth_headers(token):
         return {
-            "Authorization": f"Bearer  {self.oauth_token}",
+            "Authorization": f"Bearer  {token}",
             "Content-Type": "application/json",
         }
 
-    def _make_req(
+    def _get_auth_headers(self):
+        return self._auth_headers
+
+    def _send(
         self,
         url: str,
-        data: dict[str, Any] = {},
-        type: Literal["get"] | Literal["post"] | Literal["put"] = "get",
-        url_params={},
+        data: dict[str, Any],
+        type: Literal["get"] | Literal["post"] | Literal["put"],
+        url_params: dict[str, Any],
         **kw,
     ):
-        if url.startswith("/"):
-            url = f"{API}{url}"
-        else:
-            url = f"{API}/{url}"
-
         if type == "get":
             if data:
                 url += f"?{urlencode(data)}"
-            return requests.get(
+            return self.transport.get(
                 url,
                 headers=self._get_auth_headers(),
                 **kw,
             )
         elif type == "post":
-            return requests.post(
+            return self.transport.post(
                 url,
                 data,
                 headers=self._get_auth_headers(),
@@ -70,30 +115,72 @@ class SpotifyAPI:
         elif type == "put":
             if url_params:
                 url += f"?{urlencode(url_params)}"
-            return requests.put(
+            return self.transport.put(
                 url,
                 json=data,
                 headers=self._get_auth_headers(),
                 **kw,
             )
 
+    def _make_req(
+        self,
+        url: str,
+        data: dict[str, Any] = {},
+        type: Literal["get"] | Literal["post"] | Literal["put"] = "get",
+        url_params={},
+        priority: Priority | None = None,
+        **kw,
+    ):
+        path = url if url.startswith("/") else f"/{url}"
+        url = f"{self.api_url}{path}"
+        if priority is None:
+            priority = Priority.POLL if type == "get" else Priority.COMMAND
+
+        refreshed = retried = False
+        while True:
+            if delay := self.limiter.acquire(type.upper(), path, priority):
+                return deferred_response(url, delay)
+            sent_token = self.oauth_token
+            try:
+                res = self._send(url, data, type, url_params, **kw)
+            except requests.RequestException as e:
+                return failed_response(url, e)
+            # an expired token is refreshed once (shared with concurrent requests)
+            if res.status_code == 401 and not refreshed:
+                refreshed = True
+                if self.tokens.refresh(sent_token):
+                    continue
+            # commands get one retry after a server-side 429, polls are just dropped
+            if (
+                self.limiter.on_response(res)
+                and priority == Priority.COMMAND
+                and not retried
+            ):
+                retried = True
+                continue
+            return res
+
     def perform_oauth(self):
         code, verifier = get_oauth(self.client_id, self.scope)
-        self.oauth_token = get_token_from_oauth(self.client_id, code, verifier)
+        data = get_token_from_oauth(
+            self.client_id,
+            code,
+            verifier,
+            transport=self.transport,
+            token_url=f"{self.accounts_url}/token",
+        )
+        self.set_token(Token.from_response(data), persist=True)
 
     def is_token_valid(self, token):
-        res = requests.get(
-            f"{API}/me",
-            headers={
-                "Authorization": f"Bearer  {token}",
-                "Content-Type": "application/json",
-            },
+        res = self.transport.get(
+            f"{self.api_url}/me",
+            headers=self._build_auth_headers(token),
         )
         return res.status_code not in [401, 403]
 
     def get_access_token(self, id, secret) -> APIResult:
-        res = requests.post(
-            f"{ACCOUNT_API}/token",
+        res = self.transport.post(
+            f"{self.accounts_url}/token",
             data=f"grant_type=client_credentials&client_id={id}&client_secret={secret}",
             headers={"Content-Type": "application/x-www-form-urlencoded"},
         )
@@ -144,6 +231,51 @@ class SpotifyAPI:
             return APIResult(ok=True, data=res.json().get("items"))
         return APIResult(ok=False, data=res.json())
 
+    def get_several(self, kind: str, ids: list[str]) -> APIResult:
+        """Get tracks, albums, artists, episodes or shows by id, in one request.
+
+        ``data`` has one entry per id, None for ids Spotify doesn't know.
+        See :class:`~ned.spotify.batch.BatchLookup` for the id limits.
+        """
+        res = self._make_req(
+            f"/{kind}s", data={"ids": ",".join(ids)}, priority=Priority.BULK
+        )
+        if res.ok:
+            return APIResult(ok=True, data=res.json().get(f"{kind}s", []))
+        return APIResult(ok=False, data=res.json())
+
+    def page(
+        self,
+        path: str,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        params: dict[str, Any] | None = None,
+        transform=None,
+    ) -> Pager:
+        """Iterate over every item of a paged endpoint, see :class:`Pager`.
+
+        Pages are requested with :attr:`Priority.BULK`, so loading a large
+        library never causes playback polls to be dropped.
+        """
+
+        def fetch_page(offset, limit):
+            payload = {**(params or {}), "offset": offset, "limit": limit}
+            return self._make_req(path, data=payload, priority=Priority.BULK)
+
+        return Pager(fetch_page, page_size, max_workers, transform)
+
+    def get_saved_tracks(self, **kw) -> Pager:
+        """The user's saved tracks, newest first, as ``{"added_at", "track"}`` items."""
+        return self.page("/me/tracks", **kw)
+
+    def get_saved_albums(self, **kw) -> Pager:
+        """The user's saved albums as ``{"added_at", "album"}`` items."""
+        return self.page("/me/albums", **kw)
+
+    def get_playlists(self, **kw) -> Pager:
+        """Playlists owned or followed by the user."""
+        return self.page("/me/playlists", **kw)
+
     def transfer_playback(self, device_id: str, force_play=False):
         res = self._make_req(
             "/me/player", {"device_ids": [device_id], "play": force_play}, "put"
@@ -0,0 +1,75 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from ned.spotify.api_instance import APIResult, SpotifyAPI
+
+DEFAULT_WORKERS = 4
+
+
+class AsyncSpotifyAPI:
+    """Coroutine interface to :class:`SpotifyAPI`.
+
+    Requests are handed to a small worker pool and awaited, so they share the
+    synchronous client's transport, rate limiter and token but never block
+    the event loop that awaits them.
+    """
+
+    def __init__(self, api: SpotifyAPI, max_workers: int = DEFAULT_WORKERS):
+        self.api = api
+        self.executor = ThreadPoolExecutor(max_workers, thread_name_prefix="ned-api")
+
+    async def _call(self, fn, *args, **kwargs) -> APIResult:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.executor, functools.partial(fn, *args, **kwargs)
+        )
+
+    async def get_me(self) -> APIResult:
+        return await self._call(self.api.get_me)
+
+    async def get_user(self, user_id: str) -> APIResult:
+        return await self._call(self.api.get_user, user_id)
+
+    async def get_devices(self) -> APIResult:
+        return await self._call(self.api.get_devices)
+
+    async def get_top(self, *args, **kwargs) -> APIResult:
+        return await self._call(self.api.get_top, *args, **kwargs)
+
+    async def get_current_playback(self) -> APIResult:
+        return await self._call(self.api.get_current_playback)
+
+    async def transfer_playback(self, device_id: str, force_play=False) -> APIResult:
+        return await self._call(self.api.transfer_playback, device_id, force_play)
+
+    async def pause_playback(self, device_id=None) -> APIResult:
+        return await self._call(self.api.pause_playback, device_id)
+
+    async def start_playback(self, *args, **kwargs) -> APIResult:
+        return await self._call(self.api.start_playback, *args, **kwargs)
+
+    async def skip_to_next(self, device_id=None) -> APIResult:
+        return await self._call(self.api.skip_to_next, device_id)
+
+    async def skip_to_previous(self, device_id=None) -> APIResult:
+        return await self._call(self.api.skip_to_previous, device_id)
+
+    async def skip(self, count: int, device_id=None) -> APIResult:
+        """Skip ``count`` tracks forward (backwards if negative) as one batch."""
+        fn = self.api.skip_to_next if count > 0 else self.api.skip_to_previous
+        result = APIResult(ok=True, data=None)
+        for _ in range(abs(count)):
+            result = await self._call(fn, device_id)
+            if not result["ok"]:
+                break
+        return result
+
+    async def seek_to_position(self, position_ms, device_id=None) -> APIResult:
+        return await self._call(self.api.seek_to_position, position_ms, device_id)
+
+    async def set_volume(self, volume_percent, device_id=None) -> APIResult:
+        return await self._call(self.api.set_volume, volume_percent, device_id)
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,138 @@
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any
+
+from ned.spotify.api_instance import SpotifyAPI
+from ned.spotify.cache import MetadataCache
+
+DEFAULT_WINDOW = 0.02  # seconds to wait for more ids before sending a batch
+DEFAULT_WORKERS = 2
+
+# the most ids each multi-id endpoint accepts
+MAX_IDS = {
+    "track": 50,
+    "album": 20,
+    "artist": 50,
+    "episode": 50,
+    "show": 50,
+}
+
+
+class BatchError(Exception):
+    def __init__(self, kind: str, data: Any):
+        super().__init__(f"Looking up {kind}s failed: {data}")
+        self.kind = kind
+        self.data = data
+
+
+class BatchLookup:
+    """Resolves single-id lookups through Spotify's multi-id endpoints.
+
+    :meth:`get` returns a future for one object. Ids asked for within
+    ``window`` seconds of each other are sent together, in as few requests as
+    the endpoint's id limit allows, and an id that is already pending or in
+    flight shares the existing future. Fresh cache entries are used without
+    a request, and everything fetched is written to the cache. Futures
+    resolve to the raw object, or None if Spotify doesn't know the id.
+    """
+
+    def __init__(
+        self,
+        api: SpotifyAPI,
+        cache: MetadataCache | None = None,
+        window: float = DEFAULT_WINDOW,
+        max_workers: int = DEFAULT_WORKERS,
+    ):
+        self.api = api
+        self.cache = cache
+        self.window = window
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers, thread_name_prefix="ned-batch")
+        self.requests_sent = 0
+
+        self._futures: dict[tuple[str, str], Future] = {}
+        self._pending: dict[str, list[str]] = {kind: [] for kind in MAX_IDS}
+        self._timers: dict[str, threading.Timer] = {}
+
+    def get(self, kind: str, id: str) -> Future:
+        if kind not in MAX_IDS:
+            raise ValueError(f"No multi-id endpoint for {kind}")
+        key = (kind, id)
+        with self.lock:
+            if (future := self._futures.get(key)) is not None:
+                return future
+            future = self._futures[key] = Future()
+            pending = self._pending[kind]
+            pending.append(id)
+            if len(pending) >= MAX_IDS[kind]:
+                self._flush(kind)
+            elif kind not in self._timers:
+                timer = threading.Timer(self.window, self.flush, (kind,))
+                timer.daemon = True
+                self._timers[kind] = timer
+                timer.start()
+        return future
+
+    def get_many(self, kind: str, ids: list[str]) -> list[Future]:
+        return [self.get(kind, id) for id in ids]
+
+    def flush(self, kind: str | None = None):
+        """Send pending lookups now, for ``kind`` or every kind."""
+        with self.lock:
+            for k in [kind] if kind else list(MAX_IDS):
+                self._flush(k)
+
+    def _flush(self, kind: str):
+        if timer := self._timers.pop(kind, None):
+            timer.cancel()
+        ids, self._pending[kind] = self._pending[kind], []
+        if ids:
+            self.executor.submit(self._resolve, kind, ids)
+
+    def _finish(self, kind: str, id: str, result=None, error=None):
+        with self.lock:
+            future = self._futures.pop((kind, id), None)
+        if future is None:
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def _resolve(self, kind: str, ids: list[str]):
+        if self.cache is not None:
+            for id, data in self.cache.get_many(kind, ids).items():
+                self._finish(kind, id, data)
+            ids = [id for id in ids if (kind, id) in self._futures]
+
+        size = MAX_IDS[kind]
+        for start in range(0, len(ids), size):
+            chunk = ids[start : start + size]
+            try:
+                result = self.api.get_several(kind, chunk)
+            except Exception as e:
+                for id in chunk:
+                    self._finish(kind, id, error=e)
+                continue
+            self.requests_sent += 1
+            if not result["ok"]:
+                error = BatchError(kind, result["data"])
+                for id in chunk:
+                    self._finish(kind, id, error=error)
+                continue
+
+            items = [item for item in result["data"] if item]
+            if self.cache is not None:
+                self.cache.put_items(kind, items)
+            found = {}
+            for item in items:
+                found[item["id"]] = item
+                # relinked tracks come back under a different id
+                if linked := item.get("linked_from"):
+                    found[linked.get("id")] = item
+            for id in chunk:
+                self._finish(kind, id, found.get(id))
+
+    def close(self):
+        self.flush()
+        self.executor.shutdown(wait=False)
@@ -0,0 +1,205 @@
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Iterable
+
+from ned.utils import CACHE_DIR
+
+CACHE_PATH = CACHE_DIR / "metadata.sqlite3"
+# bump when the table layout changes, older caches are dropped and rebuilt
+SCHEMA_VERSION = 1
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+DAY = 24 * 60 * 60
+# seconds an entry stays fresh, per type
+DEFAULT_TTLS = {
+    "track": 30 * DAY,
+    "episode": 30 * DAY,
+    "album": 30 * DAY,
+    "artist": 7 * DAY,
+    "playlist": 60 * 60,  # edited often, the snapshot_id tells when
+    "user": DAY,
+    "playback": DAY,  # last seen playback state, for a warm start
+    "library": DAY,  # ids of the saved tracks, albums and playlists
+}
+DEFAULT_TTL = DAY
+
+SCHEMA = """
+CREATE TABLE entries (
+    type TEXT NOT NULL,
+    id TEXT NOT NULL,
+    data TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    size INTEGER NOT NULL,
+    PRIMARY KEY (type, id)
+) WITHOUT ROWID;
+CREATE INDEX entries_accessed_at ON entries (accessed_at);
+"""
+
+
+class MetadataCache:
+    """SQLite cache of raw Spotify objects, keyed by type and Spotify id.
+
+    Entries older than their type's TTL are treated as missing. When the
+    stored JSON grows past ``max_bytes``, the least recently read entries are
+    evicted. The database uses WAL mode, so several ned processes can share it.
+    """
+
+    def __init__(
+        self,
+        path: Path = CACHE_PATH,
+        ttls: dict[str, float] | None = None,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+    ):
+        self.path = Path(path)
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(self.path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self._migrate()
+        (self._size,) = self.db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM entries"
+        ).fetchone()
+
+    def _migrate(self):
+        (version,) = self.db.execute("PRAGMA user_version").fetchone()
+        if version == SCHEMA_VERSION:
+            return
+        # it's only a cache, start over rather than converting old rows
+        with self.db:
+            self.db.execute("DROP TABLE IF EXISTS entries")
+            self.db.executescript(SCHEMA)
+            self.db.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+
+    def _ttl(self, type: str) -> float:
+        return self.ttls.get(type, DEFAULT_TTL)
+
+    def get(self, type: str, id: str) -> dict[str, Any] | None:
+        return self.get_many(type, [id]).get(id)
+
+    def get_many(self, type: str, ids: Iterable[str]) -> dict[str, dict[str, Any]]:
+        """Fresh entries for ``ids``, missing and expired ones are left out."""
+        ids = list(dict.fromkeys(ids))
+        if not ids:
+            return {}
+        now = time.time()
+        oldest = now - self._ttl(type)
+        found = {}
+        with self.lock:
+            # stay well below SQLite's default limit of 999 variables
+            for start in range(0, len(ids), 500):
+                chunk = ids[start : start + 500]
+                marks = ",".join("?" * len(chunk))
+                rows = self.db.execute(
+                    f"SELECT id, data FROM entries WHERE type = ? AND id IN ({marks})"
+                    " AND fetched_at >= ?",
+                    (type, *chunk, oldest),
+                ).fetchall()
+                found.update((id, json.loads(data)) for id, data in rows)
+            if found:
+                with self.db:
+                    self.db.executemany(
+                        "UPDATE entries SET accessed_at = ? WHERE type = ? AND id = ?",
+                        [(now, type, id) for id in found],
+                    )
+        return found
+
+    def put(self, type: str, id: str, data: dict[str, Any]):
+        self.put_many(type, [(id, data)])
+
+    def put_many(self, type: str, entries: Iterable[tuple[str, dict[str, Any]]]):
+        now = time.time()
+        rows = []
+        for id, data in entries:
+            if not id:
+                continue
+            text = json.dumps(data, separators=(",", ":"))
+            rows.append((type, id, text, now, now, len(text)))
+        if not rows:
+            return
+        with self.lock, self.db:
+            replaced = self._sizes(type, [row[1] for row in rows])
+            self.db.executemany(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?)", rows
+            )
+            self._size += sum(row[5] for row in rows) - replaced
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def put_items(self, type: str, items: Iterable[dict[str, Any]]):
+        """Store API objects under their own ``id``."""
+        self.put_many(type, ((item.get("id"), item) for item in items if item))
+
+    def _sizes(self, type: str, ids: list[str]) -> int:
+        total = 0
+        for start in range(0, len(ids), 500):
+            chunk = ids[start : start + 500]
+            marks = ",".join("?" * len(chunk))
+            (size,) = self.db.execute(
+                f"SELECT COALESCE(SUM(size), 0) FROM entries"
+                f" WHERE type = ? AND id IN ({marks})",
+                (type, *chunk),
+            ).fetchone()
+            total += size
+        return total
+
+    def _evict(self):
+        # other processes write to the same file, so start from the real size
+        (self._size,) = self.db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM entries"
+        ).fetchone()
+        # drop the least recently read entries until we're at 90% of the limit
+        target = self.max_bytes * 0.9
+        freed = 0
+        victims = []
+        for type, id, size in self.db.execute(
+            "SELECT type, id, size FROM entries ORDER BY accessed_at"
+        ):
+            if self._size - freed <= target:
+                break
+            victims.append((type, id))
+            freed += size
+        self.db.executemany("DELETE FROM entries WHERE type = ? AND id = ?", victims)
+        self._size -= freed
+
+    def delete(self, type: str, id: str):
+        with self.lock, self.db:
+            self._size -= self._sizes(type, [id])
+            self.db.execute("DELETE FROM entries WHERE type = ? AND id = ?", (type, id))
+
+    def clear(self):
+        with self.lock, self.db:
+            self.db.execute("DELETE FROM entries")
+            self._size = 0
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def __len__(self):
+        with self.lock:
+            return self.db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def close(self):
+        with self.lock:
+            self.db.close()
+
+
+_default_cache: MetadataCache | None = None
+_default_lock = threading.Lock()
+
+
+def get_cache() -> MetadataCache:
+    """Return the process-wide cache, opening it on first use."""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = MetadataCache()
+        return _default_cache
@@ -1,6 +1,10 @@
+from dataclasses import asdict, dataclass, field, fields
 from enum import Enum
-from typing import Literal, Any
-from dataclasses import dataclass
+from sys import intern
+from typing import TYPE_CHECKING, Any, ClassVar, Literal
+
+if TYPE_CHECKING:
+    from ned.spotify.cache import MetadataCache
 
 
 class LSStatus(Enum):
@@ -8,17 +12,64 @@ class LSStatus(Enum):
     CONNECTED = "Connected"
     WAITING = "Waiting for Librespot..."
     FAILED = "Failed to connect to Spotify."
+    INACTIVE = "Connected, playing on another device"
+
+
+def _str(data: dict[str, Any], key: str, default: str = "") -> str:
+    value = data.get(key)
+    return intern(value) if isinstance(value, str) else default
+
+
+class LazyField:
+    """A field that is read from the raw API dict when accessed.
+
+    Used for fields the UI rarely (or never) reads, so polls don't have to
+    decode them. Assigning to it stores the value in a copy of the raw dict.
+    """
+
+    def __init__(self, default: Any = None, factory=None):
+        self.default = default
+        self.factory = factory
+
+    def __set_name__(self, owner, name):
+        self.key = name
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        value = obj._raw.get(self.key)
+        if value is None:
+            return self.factory() if self.factory else self.default
+        return value
+
+    def __set__(self, obj, value):
+        obj._raw = {**obj._raw, self.key: value}
 
 
-@dataclass
+@dataclass(slots=True)
 class DataClass:
+    # entry type in the metadata cache, None if the class isn't cached
+    cache_type: ClassVar[str | None] = None
+
+    @classmethod
+    def from_cache(cls, cache: "MetadataCache", id: str):
+        """Build the object from a fresh cache entry, or None if there is none."""
+        if cls.cache_type is None:
+            raise TypeError(f"{cls.__name__} is not cached")
+        data = cache.get(cls.cache_type, id)
+        return None if data is None else cls.from_dict(data)
+
+    def to_cache(self, cache: "MetadataCache"):
+        cache.put(self.cache_type, self.id, self._raw)
+
     def update(self, data: dict[str, Any]) -> None:
+        names = {f.name for f in fields(self)}
         for key, value in data.items():
-            if hasattr(self, key):
+            if key in names or isinstance(getattr(type(self), key, None), LazyField):
                 setattr(self, key, value)
 
 
-@dataclass
+@dataclass(slots=True)
 class DeviceData(DataClass):
     id: str | None
     is_active: bool
@@ -32,164 +83,143 @@ class DeviceData(DataClass):
     @classmethod
     def from_dict(cls, data: dict[str, Any]) -> "DeviceData":
         return cls(
-            id=data.get("id"),
+            id=_str(data, "id", None),
             is_active=data.get("is_active", False),
             is_private_session=data.get("is_private_session", False),
             is_restricted=data.get("is_restricted", False),
-            name=data.get("name", ""),
-            type=data.get("type", ""),
+            name=_str(data, "name"),
+            type=_str(data, "type"),
             volume_percent=data.get("volume_percent"),
             supports_volume=data.get("supports_volume", False),
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class PlaybackActionsData(DataClass):
-    interrupting_playback: bool
-    pausing: bool
-    resuming: bool
-    seeking: bool
-    skipping_next: bool
-    skipping_prev: bool
-    toggling_repeat_context: bool
-    toggling_shuffle: bool
-    toggling_repeat_track: bool
-    transferring_playback: bool
+    _raw: dict[str, Any] = field(default_factory=dict, repr=False)
+
+    interrupting_playback = LazyField(False)
+    pausing = LazyField(False)
+    resuming = LazyField(False)
+    seeking = LazyField(False)
+    skipping_next = LazyField(False)
+    skipping_prev = LazyField(False)
+    toggling_repeat_context = LazyField(False)
+    toggling_shuffle = LazyField(False)
+    toggling_repeat_track = LazyField(False)
+    transferring_playback = LazyField(False)
 
     @classmethod
     def from_dict(cls, data: dict[str, Any]) -> "PlaybackActionsData":
-        return cls(
-            interrupting_playback=data.get("interrupting_playback", False),
-            pausing=data.get("pausing", False),
-            resuming=data.get("resuming", False),
-            seeking=data.get("seeking", False),
-            skipping_next=data.get("skipping_next", False),
-            skipping_prev=data.get("skipping_prev", False),
-            toggling_repeat_context=data.get("toggling_repeat_context", False),
-            toggling_shuffle=data.get("toggling_shuffle", False),
-            toggling_repeat_track=data.get("toggling_repeat_track", False),
-            transferring_playback=data.get("transferring_playback", False),
-        )
+        return cls(_raw=data)
 
 
-@dataclass
+@dataclass(slots=True)
 class ContextData(DataClass):
     type: str
-    href: str
-    external_urls: dict[str, str]
     uri: str
+    _raw: dict[str, Any] = field(default_factory=dict, repr=False)
+
+    href = LazyField("")
+    external_urls = LazyField(factory=dict)
 
     @classmethod
     def from_dict(cls, data: dict[str, Any]) -> "ContextData":
-        return cls(
-            type=data.get("type", ""),
-            href=data.get("href", ""),
-            external_urls=data.get("external_urls", {}),
-            uri=data.get("uri", ""),
-        )
+        return cls(type=_str(data, "type"), uri=_str(data, "uri"), _raw=data)
 
 
-@dataclass
+@dataclass(slots=True)
 class TrackData(DataClass):
-    album: dict[str, str]
+    cache_type = "track"
+
+    id: str
+    name: str
     artists: list[dict[str, str]]
-    available_markets: list[str]
-    disc_number: int
     duration_ms: int
     explicit: bool
-    external_ids: dict[str, str]
-    external_urls: dict[str, str]
-    href: str
-    id: str
-    is_playable: bool
-    linked_from: dict[str, str]
-    restrictions: dict[str, str]
-    name: str
-    popularity: int
-    preview_url: str | None
-    track_number: int
     type: Literal["track"]
     uri: str
     is_local: bool
+    _raw: dict[str, Any] = field(default_factory=dict, repr=False)
+
+    album = LazyField(factory=dict)
+    available_markets = LazyField(factory=list)
+    disc_number = LazyField(0)
+    external_ids = LazyField(factory=dict)
+    external_urls = LazyField(factory=dict)
+    href = LazyField("")
+    is_playable = LazyField(False)
+    linked_from = LazyField(factory=dict)
+    restrictions = LazyField(factory=dict)
+    popularity = LazyField(0)
+    preview_url = LazyField(None)
+    track_number = LazyField(0)
 
     @classmethod
     def from_dict(cls, data: dict[str, Any]) -> "TrackData":
         return cls(
-            album=data.get("album", {}),
+            id=_str(data, "id"),
+            name=_str(data, "name"),
             artists=data.get("artists", []),
-            available_markets=data.get("available_markets", []),
-            disc_number=data.get("disc_number", 0),
             duration_ms=data.get("duration_ms", 0),
             explicit=data.get("explicit", False),
-            external_ids=data.get("external_ids", {}),
-            external_urls=data.get("external_urls", {}),
-            href=data.get("href", ""),
-            id=data.get("id", ""),
-            is_playable=data.get("is_playable", False),
-            linked_from=data.get("linked_from", {}),
-            restrictions=data.get("restrictions", {}),
-            name=data.get("name", ""),
-            popularity=data.get("popularity", 0),
-            preview_url=data.get("preview_url"),
-            track_number=data.get("track_number", 0),
-            type=data.get("type", "track"),
-            uri=data.get("uri", ""),
+            type=_str(data, "type", "track"),
+            uri=_str(data, "uri"),
             is_local=data.get("is_local", False),
+            _raw=data,
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class EpisodeData(DataClass):
-    audio_preview_url: str | None
-    description: str
-    html_description: str
-    duration_ms: int
-    explicit: bool
-    external_urls: dict[str, str]
-    href: str
+    cache_type = "episode"
+
     id: str
-    images: list[dict[str, str | int]]
-    is_externally_hosted: bool
-    is_playable: bool
-    language: str
-    languages: list[str]
     name: str
-    release_date: str
-    release_date_precision: Literal["year"] | Literal["month"] | Literal["day"]
-    resume_point: dict[str, bool | int]
+    duration_ms: int
+    explicit: bool
     type: Literal["episode"]
     uri: str
     show: dict
+    _raw: dict[str, Any] = field(default_factory=dict, repr=False)
+
+    audio_preview_url = LazyField(None)
+    description = LazyField("")
+    html_description = LazyField("")
+    external_urls = LazyField(factory=dict)
+    href = LazyField("")
+    images = LazyField(factory=list)
+    is_externally_hosted = LazyField(False)
+    is_playable = LazyField(False)
+    language = LazyField("")
+    languages = LazyField(factory=list)
+    release_date = LazyField("")
+    release_date_precision = LazyField("day")
+    resume_point = LazyField(factory=dict)
 
     @classmethod
     def from_dict(cls, data: dict[str, Any]) -> "EpisodeData":
         return cls(
-            audio_preview_url=data.get("audio_preview_url"),
-            description=data.get("description", ""),
-            html_description=data.get("html_description", ""),
+            id=_str(data, "id"),
+            name=_str(data, "name"),
             duration_ms=data.get("duration_ms", 0),
             explicit=data.get("explicit", False),
-            external_urls=data.get("external_urls", {}),
-            href=data.get("href", ""),
-            id=data.get("id", ""),
-            images=data.get("images", []),
-            is_externally_hosted=data.get("is_externally_hosted", False),
-            is_playable=data.get("is_playable", False),
-            language=data.get("language", ""),
-            languages=data.get("languages", []),
-            name=data.get("name", ""),
-            release_date=data.get("release_date", ""),
-            release_date_precision=data.get("release_date_precision", "day"),
-            resume_point=data.get("resume_point", {}),
-            type=data.get("type", "episode"),
-            uri=data.get("uri", ""),
+            type=_str(data, "type", "episode"),
+            uri=_str(data, "uri"),
             show=data.get("show", {}),
+            _raw=data,
         )
 
 
-@dataclass
+def _item_key(data: dict[str, Any]) -> tuple[str | None, str | None]:
+    return data.get("type"), data.get("id") or data.get("uri")
+
+
+@dataclass(slots=True)
 class PlaybackData(DataClass):
     # https://developer.spotify.com/documentation/web-api/reference/get-information-about-the-users-current-playback
+    cache_type = "playback"
+
     device: DeviceData
     repeat_state: Literal["off"] | Literal["track"] | Literal["context"]
     shuffle_state: bool
@@ -202,59 +232,91 @@ class PlaybackData(DataClass):
     actions: PlaybackActionsData
 
     @classmethod
-    def from_dict(cls, data: dict[str, Any]) -> "PlaybackData":
+    def from_dict(
+        cls, data: dict[str, Any], previous: "PlaybackData | None" = None
+    ) -> "PlaybackData":
+        """Parse a ``/me/player`` response.
+
+        If ``previous`` is given and still plays the same item, its item
+        object is reused instead of parsing the item again.
+        """
         item_dict = data.get("item", {})
 
         item = None
         if item_dict:
-            item_type = item_dict.get("type")
-            if item_type == "track":
+            key = _item_key(item_dict)
+            if (
+                previous is not None
+                and previous.item is not None
+                and key[1] is not None
+                and key == (previous.item.type, previous.item.id or previous.item.uri)
+            ):
+                item = previous.item
+            elif key[0] == "track":
                 item = TrackData.from_dict(item_dict)
-            elif item_type == "episode":
+            elif key[0] == "episode":
                 item = EpisodeData.from_dict(item_dict)
 
         return cls(
             device=DeviceData.from_dict(data.get("device", {})),
-            repeat_state=data.get("repeat_state", ""),
+            repeat_state=_str(data, "repeat_state"),
             shuffle_state=data.get("shuffle_state", False),
-            context=ContextData.from_dict(data.get("context", {})),
+            context=ContextData.from_dict(data.get("context") or {}),
             timestamp=data.get("timestamp", 0),
             progress_ms=data.get("progress_ms", None),
             is_playing=data.get("is_playing", False),
             item=item,
-            currently_playing_type=data.get("currently_playing_type", ""),
+            currently_playing_type=_str(data, "currently_playing_type"),
             actions=PlaybackActionsData.from_dict(data.get("actions", {})),
         )
 
+    def to_dict(self) -> dict[str, Any]:
+        """The snapshot in ``/me/player`` form, for :meth:`from_dict`."""
+        return {
+            "device": asdict(self.device),
+            "repeat_state": self.repeat_state,
+            "shuffle_state": self.shuffle_state,
+            "context": {
+                **self.context._raw,
+                "type": self.context.type,
+                "uri": self.context.uri,
+            },
+            "timestamp": self.timestamp,
+            "progress_ms": self.progress_ms,
+            "is_playing": self.is_playing,
+            "item": self.item._raw if self.item else None,
+            "currently_playing_type": self.currently_playing_type,
+            "actions": self.actions._raw,
+        }
+
 
-@dataclass
+@dataclass(slots=True)
 class UserData(DataClass):
+    cache_type = "user"
+
     country: str
     display_name: str
-    email: str
-    explicit_content: dict[str, bool]
-    external_urls: dict[str, str]
-    followers: dict[str, str | int]
-    href: str
     id: str
-    images: list[dict[str, str | int]]
     product: str
     type: Literal["user"]
     uri: str
+    _raw: dict[str, Any] = field(default_factory=dict, repr=False)
+
+    email = LazyField("")
+    explicit_content = LazyField(factory=dict)
+    external_urls = LazyField(factory=dict)
+    followers = LazyField(factory=dict)
+    href = LazyField("")
+    images = LazyField(factory=list)
 
     @classmethod
     def from_dict(cls, data: dict[str, Any]) -> "UserData":
         return cls(
-            country=data.get("country", ""),
-            display_name=data.get("display_name", ""),
-            email=data.get("email", ""),
-            explicit_content=data.get("explicit_content", {}),
-            external_urls=data.get("external_urls", {}),
-            followers=data.get("followers", {}),
-            href=data.get("href", ""),
-            id=data.get("id", ""),
-            images=data.get("images", []),
-            product=data.get("product", ""),
-            type=data.get("type", "user"),
-            uri=data.get("uri", ""),
+            country=_str(data, "country"),
+            display_name=_str(data, "display_name"),
+            id=_str(data, "id"),
+            product=_str(data, "product"),
+            type=_str(data, "type", "user"),
+            uri=_str(data, "uri"),
+            _raw=data,
         )
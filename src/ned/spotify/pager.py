@@ -0,0 +1,121 @@
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Iterator
+
+import requests
+
+from ned.spotify.ratelimit import parse_retry_after
+
+DEFAULT_PAGE_SIZE = 50  # the maximum for every library endpoint
+DEFAULT_MAX_WORKERS = 4
+MAX_RETRIES = 5
+
+FetchPage = Callable[[int, int], requests.Response]
+
+
+class PageError(Exception):
+    def __init__(self, offset: int, status: int, data: Any):
+        super().__init__(f"Page at offset {offset} failed with {status}: {data}")
+        self.offset = offset
+        self.status = status
+        self.data = data
+
+
+class PagerCancelled(Exception):
+    pass
+
+
+class Pager:
+    """Iterates over every item of a Spotify paging object.
+
+    The first page is fetched on the calling thread so items are yielded right
+    away. Once it reveals ``total``, the remaining offsets are fetched by a
+    pool of ``max_workers`` threads, at most ``max_workers * 2`` pages ahead
+    of the consumer. Items are always yielded in order.
+
+    Calling :meth:`cancel` (from any thread) or closing the iterator stops
+    fetching; pages already in flight are discarded.
+    """
+
+    def __init__(
+        self,
+        fetch_page: FetchPage,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        transform: Callable[[dict], Any] | None = None,
+    ):
+        self.fetch_page = fetch_page
+        self.page_size = page_size
+        self.max_workers = max_workers
+        self.transform = transform
+        self.total: int | None = None
+        self.fetched = 0  # items yielded so far
+        self._cancelled = threading.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def _fetch(self, offset: int) -> list:
+        for _ in range(MAX_RETRIES):
+            if self.cancelled:
+                raise PagerCancelled()
+            res = self.fetch_page(offset, self.page_size)
+            if res.status_code == 429:
+                # deferred by the limiter or limited by Spotify, try again later
+                self._cancelled.wait(parse_retry_after(res))
+                continue
+            data = res.json() if res.content else {}
+            if not res.ok:
+                raise PageError(offset, res.status_code, data)
+            if self.total is None:
+                self.total = data.get("total", 0)
+            items = data.get("items") or []
+            if self.transform:
+                items = [self.transform(item) for item in items]
+            return items
+        raise PageError(offset, 429, "rate limited")
+
+    def __iter__(self) -> Iterator:
+        if self.cancelled:
+            return
+        try:
+            first = self._fetch(0)
+        except PagerCancelled:
+            return
+        yield from self._emit(first)
+
+        offsets = iter(range(self.page_size, self.total or 0, self.page_size))
+        pool = ThreadPoolExecutor(self.max_workers, thread_name_prefix="pager")
+        window: deque[Future] = deque()
+
+        def fill():
+            while len(window) < self.max_workers * 2:
+                if (offset := next(offsets, None)) is None:
+                    return
+                window.append(pool.submit(self._fetch, offset))
+
+        try:
+            fill()
+            while window and not self.cancelled:
+                try:
+                    items = window.popleft().result()
+                except PagerCancelled:
+                    return
+                fill()
+                yield from self._emit(items)
+        finally:
+            if window:
+                self.cancel()  # stopped early, drop the pages in flight
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def _emit(self, items: list) -> Iterator:
+        for item in items:
+            if self.cancelled:
+                return
+            self.fetched += 1
+            yield item
@@ -1,4 +1,4 @@
-import requests
+from ned.spotify.transport import Transport, get_transport
 
 from .auth import PKCEAuth
 
@@ -20,9 +20,12 @@ def get_token_from_oauth(
     client_id: str,
     code: str,
     code_verifier: str,
+    transport: Transport | None = None,
+    token_url: str = SPOTIFY_TOKEN_URL,
 ) -> dict:
-    res = requests.post(
-        SPOTIFY_TOKEN_URL,
+    transport = transport or get_transport()
+    res = transport.post(
+        token_url,
         data={
             "client_id": client_id,
             "grant_type": "authorization_code",
@@ -34,6 +37,25 @@ def get_token_from_oauth(
         timeout=10,
     )
     res.raise_for_status()
-    if res.ok:
-        return res.json().get("access_token")
+    return res.json()
+
+
+def refresh_access_token(
+    client_id: str,
+    refresh_token: str,
+    transport: Transport | None = None,
+    token_url: str = SPOTIFY_TOKEN_URL,
+) -> dict:
+    transport = transport or get_transport()
+    res = transport.post(
+        token_url,
+        data={
+            "client_id": client_id,
+            "grant_type": "refresh_token",
+            "refresh_token": refresh_token,
+        },
+        headers={"Content-Type": "application/x-www-form-urlencoded"},
+        timeout=10,
+    )
+    res.raise_for_status()
     return res.json()
@@ -0,0 +1,245 @@
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass
+from enum import IntEnum
+from pathlib import Path
+from typing import Callable
+
+import requests
+
+DEFAULT_RETRY_AFTER = 1.0
+MAX_COMMAND_WAIT = 5.0
+
+
+class Priority(IntEnum):
+    BULK = -1  # paging through large collections, waits but never holds up polls
+    POLL = 0  # background refreshes, safe to drop
+    COMMAND = 1  # user initiated, queued until allowed
+
+
+@dataclass
+class Deferral:
+    method: str
+    path: str
+    endpoint_class: str
+    priority: Priority
+    delay: float
+    reason: str
+    dropped: bool
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, now) -> float:
+        """Seconds until a token is available (0 if one is available now)."""
+        self._refill(now)
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def take(self):
+        self.tokens -= 1
+
+
+# (tokens per second, burst capacity)
+DEFAULT_BUCKETS = {
+    "player": (2.0, 6),
+    "user": (0.5, 3),
+    "library": (5.0, 10),
+    "metadata": (5.0, 10),
+    "default": (1.0, 5),
+}
+
+
+def classify(path: str) -> str:
+    if path.startswith("/me/player"):
+        return "player"
+    if path.startswith(("/me/tracks", "/me/albums", "/me/playlists", "/playlists")):
+        return "library"
+    if path.startswith(("/tracks", "/albums", "/artists", "/episodes", "/shows")):
+        return "metadata"
+    if path == "/me" or path.startswith("/users"):
+        return "user"
+    return "default"
+
+
+def deferred_response(url: str, delay: float) -> requests.Response:
+    """Build a 429 response for a request the limiter refused to send."""
+    res = requests.Response()
+    res.status_code = 429
+    res.url = url
+    res.reason = "Deferred"
+    res.headers["Retry-After"] = str(max(1, round(delay)))
+    res._content = json.dumps(
+        {"error": {"status": 429, "message": "Deferred by local rate limiter"}}
+    ).encode()
+    return res
+
+
+def is_rate_limited(result) -> bool:
+    """Whether an API result is a 429, from Spotify or the local limiter."""
+    data = result["data"]
+    error = data.get("error") if isinstance(data, dict) else None
+    return not result["ok"] and isinstance(error, dict) and error.get("status") == 429
+
+
+def parse_retry_after(res: requests.Response) -> float:
+    try:
+        return max(0.0, float(res.headers.get("Retry-After", DEFAULT_RETRY_AFTER)))
+    except ValueError:
+        return DEFAULT_RETRY_AFTER
+
+
+class RateLimiter:
+    """Client-side limiter shared by every request a :class:`SpotifyAPI` makes.
+
+    Each endpoint class gets a token bucket. A 429 from Spotify pauses all
+    classes until ``Retry-After`` has passed; with ``shared_path`` set, the
+    pause is written to disk so other ned processes using the same client ID
+    back off too. Polls are dropped while limited (or while a command is
+    waiting), commands wait up to ``max_command_wait`` seconds. Bulk requests
+    wait like commands but also give way to waiting commands, and don't
+    cause polls to be dropped.
+    """
+
+    def __init__(
+        self,
+        buckets: dict[str, tuple[float, float]] | None = None,
+        max_command_wait: float = MAX_COMMAND_WAIT,
+        shared_path: Path | None = None,
+        on_defer: Callable[[Deferral], None] | None = None,
+    ):
+        self.buckets = {
+            name: TokenBucket(rate, capacity)
+            for name, (rate, capacity) in (buckets or DEFAULT_BUCKETS).items()
+        }
+        self.max_command_wait = max_command_wait
+        self.shared_path = shared_path
+        self.on_defer = on_defer
+
+        self.cond = threading.Condition()
+        self.waiting_commands = 0
+        self._blocked_until = 0.0  # time.monotonic()
+        self._shared_mtime = None
+
+    def _bucket(self, endpoint_class: str) -> TokenBucket:
+        return self.buckets.get(endpoint_class) or self.buckets["default"]
+
+    def _read_shared(self, now):
+        if self.shared_path is None:
+            return
+        try:
+            mtime = os.stat(self.shared_path).st_mtime_ns
+        except OSError:
+            return
+        if mtime == self._shared_mtime:
+            return
+        self._shared_mtime = mtime
+        try:
+            until = float(self.shared_path.read_text())
+        except (OSError, ValueError):
+            return
+        self._blocked_until = max(self._blocked_until, now + until - time.time())
+
+    def _write_shared(self, delay):
+        if self.shared_path is None:
+            return
+        try:
+            tmp = self.shared_path.with_suffix(f".{os.getpid()}.tmp")
+            tmp.write_text(str(time.time() + delay))
+            os.replace(tmp, self.shared_path)
+        except OSError:
+            pass
+
+    def _wait_time(self, endpoint_class, now) -> tuple[float, str]:
+        self._read_shared(now)
+        if (blocked := self._blocked_until - now) > 0:
+            return blocked, "retry-after"
+        return self._bucket(endpoint_class).wait_time(now), "bucket"
+
+    def _defer(self, method, path, endpoint_class, priority, delay, reason, dropped):
+        if self.on_defer:
+            self.on_defer(
+                Deferral(method, path, endpoint_class, priority, delay, reason, dropped)
+            )
+
+    def acquire(self, method: str, path: str, priority: Priority) -> float:
+        """Reserve a slot for a request.
+
+        Returns 0 when the request may be sent, otherwise the number of
+        seconds the caller should wait before trying again (the request
+        must then be dropped).
+        """
+        endpoint_class = classify(path)
+        with self.cond:
+            if priority == Priority.POLL:
+                delay, reason = self._wait_time(endpoint_class, time.monotonic())
+                if not delay and self.waiting_commands:
+                    delay, reason = 1 / self._bucket(endpoint_class).rate, "command"
+                if delay:
+                    self._defer(
+                        method, path, endpoint_class, priority, delay, reason, True
+                    )
+                    return delay
+                self._bucket(endpoint_class).take()
+                return 0.0
+
+            deadline = time.monotonic() + self.max_command_wait
+            reported = False
+            command = priority == Priority.COMMAND
+            if command:
+                self.waiting_commands += 1
+            try:
+                while True:
+                    now = time.monotonic()
+                    delay, reason = self._wait_time(endpoint_class, now)
+                    if not delay and not command and self.waiting_commands:
+                        delay, reason = 1 / self._bucket(endpoint_class).rate, "command"
+                    if not delay:
+                        self._bucket(endpoint_class).take()
+                        return 0.0
+                    if now + delay > deadline:
+                        self._defer(
+                            method, path, endpoint_class, priority, delay, reason, True
+                        )
+                        return delay
+                    # bulk transfers wait on the bucket all the time, only
+                    # report them when they are refused
+                    if command and not reported:
+                        self._defer(
+                            method, path, endpoint_class, priority, delay, reason, False
+                        )
+                        reported = True
+                    self.cond.wait(delay)
+            finally:
+                if command:
+                    self.waiting_commands -= 1
+
+    def blocked_for(self) -> float:
+        """Seconds left on the current Retry-After pause, if any."""
+        with self.cond:
+            now = time.monotonic()
+            self._read_shared(now)
+            return max(0.0, self._blocked_until - now)
+
+    def on_response(self, res: requests.Response) -> float:
+        """Record the outcome of a request. Returns the Retry-After delay on 429."""
+        if res.status_code != 429:
+            return 0.0
+        delay = parse_retry_after(res)
+        with self.cond:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + delay)
+            self._write_shared(delay)
+            self.cond.notify_all()
+        return delay
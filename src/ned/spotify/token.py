@@ -0,0 +1,176 @@
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import asdict, dataclass
+from typing import Any, Callable
+
+from ned.spotify.pkce import SPOTIFY_TOKEN_URL, refresh_access_token
+from ned.spotify.transport import Transport
+
+# renew this many seconds before the recorded expiry
+REFRESH_MARGIN = 120
+RETRY_DELAY = 30
+REFRESH_WAIT = 15
+
+
+@dataclass
+class Token:
+    access_token: str
+    refresh_token: str | None = None
+    expires_at: float | None = None  # unix time, None if unknown
+    scope: str | None = None
+    token_type: str = "Bearer"
+
+    @classmethod
+    def from_response(
+        cls, data: dict[str, Any], previous: "Token | None" = None
+    ) -> "Token":
+        """Build a token from a ``/api/token`` response.
+
+        Spotify doesn't always rotate the refresh token, so the previous one is
+        kept when the response has none.
+        """
+        expires_in = data.get("expires_in")
+        return cls(
+            access_token=data["access_token"],
+            refresh_token=data.get("refresh_token")
+            or (previous.refresh_token if previous else None),
+            expires_at=time.time() + expires_in if expires_in else None,
+            scope=data.get("scope"),
+            token_type=data.get("token_type", "Bearer"),
+        )
+
+    @classmethod
+    def from_cached(cls, data: dict[str, Any] | str | None) -> "Token | None":
+        if not data:
+            return None
+        if isinstance(data, str):
+            # saved by older versions, which only kept the access token
+            return cls(access_token=data)
+        return cls(
+            access_token=data["access_token"],
+            refresh_token=data.get("refresh_token"),
+            expires_at=data.get("expires_at"),
+            scope=data.get("scope"),
+            token_type=data.get("token_type", "Bearer"),
+        )
+
+    def to_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+    def expires_in(self) -> float | None:
+        if self.expires_at is None:
+            return None
+        return self.expires_at - time.time()
+
+    @property
+    def expired(self) -> bool:
+        return (remaining := self.expires_in()) is not None and remaining <= 0
+
+
+class TokenManager:
+    """Owns the current token and renews it with the refresh token.
+
+    A background timer renews the token shortly before it expires. Requests
+    that get a 401 call :meth:`refresh` with the token they used; concurrent
+    callers share a single in-flight refresh.
+    """
+
+    def __init__(
+        self,
+        client_id: str,
+        transport: Transport,
+        on_update: Callable[[Token], None] | None = None,
+        refresh_margin: float = REFRESH_MARGIN,
+        token_url: str = SPOTIFY_TOKEN_URL,
+    ):
+        self.client_id = client_id
+        self.transport = transport
+        self.token_url = token_url
+        self.on_update = on_update
+        self.refresh_margin = refresh_margin
+        self.token: Token | None = None
+
+        self._lock = threading.Lock()
+        self._in_flight: Future | None = None
+        self._timer: threading.Timer | None = None
+
+    @property
+    def access_token(self) -> str | None:
+        return self.token.access_token if self.token else None
+
+    @property
+    def can_refresh(self) -> bool:
+        return bool(self.token and self.token.refresh_token)
+
+    def set_token(self, token: Token, notify=True):
+        self.token = token
+        if notify and self.on_update:
+            self.on_update(token)
+        self._schedule_renewal()
+
+    def _schedule_renewal(self, delay: float | None = None):
+        self.cancel_renewal()
+        if not self.can_refresh:
+            return
+        if delay is None:
+            if (remaining := self.token.expires_in()) is None:
+                return
+            delay = max(0.0, remaining - self.refresh_margin)
+        self._timer = threading.Timer(delay, self._renew)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def cancel_renewal(self):
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
+
+    def _renew(self):
+        if self.refresh() is None:
+            self._schedule_renewal(RETRY_DELAY)
+
+    def refresh(self, stale_access_token: str | None = None) -> Token | None:
+        """Renew the access token, or wait for a renewal already in progress.
+
+        If ``stale_access_token`` is given and the current token is already
+        different, it was refreshed in the meantime and is returned as is.
+        Returns ``None`` if the token can't be refreshed.
+        """
+        with self._lock:
+            if (
+                stale_access_token is not None
+                and self.token is not None
+                and self.token.access_token != stale_access_token
+            ):
+                return self.token
+            if not self.can_refresh:
+                return None
+            leader = self._in_flight is None
+            if leader:
+                self._in_flight = Future()
+            future = self._in_flight
+
+        if not leader:
+            try:
+                return future.result(timeout=REFRESH_WAIT)
+            except Exception:
+                return None
+
+        token = None
+        try:
+            data = refresh_access_token(
+                self.client_id,
+                self.token.refresh_token,
+                transport=self.transport,
+                token_url=self.token_url,
+            )
+            token = Token.from_response(data, self.token)
+            self.set_token(token)
+        except Exception:
+            token = None
+        finally:
+            with self._lock:
+                self._in_flight = None
+            future.set_result(token)
+        return token
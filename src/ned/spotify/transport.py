@@ -0,0 +1,96 @@
+import json
+import threading
+from typing import Any
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# (connect, read) timeouts in seconds, applied to every request unless overridden
+DEFAULT_TIMEOUT = (3.05, 10)
+DEFAULT_POOL_CONNECTIONS = 2  # api.spotify.com and accounts.spotify.com
+DEFAULT_POOL_MAXSIZE = 4
+
+
+class Transport:
+    """Keep-alive HTTP transport shared by everything that talks to Spotify."""
+
+    def __init__(
+        self,
+        pool_connections: int = DEFAULT_POOL_CONNECTIONS,
+        pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+        timeout: float | tuple[float, float] | None = DEFAULT_TIMEOUT,
+        headers: dict[str, str] | None = None,
+    ):
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=pool_connections, pool_maxsize=pool_maxsize
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        if headers:
+            self.session.headers.update(headers)
+
+    def request(self, method: str, url: str, **kw: Any) -> requests.Response:
+        kw.setdefault("timeout", self.timeout)
+        return self.session.request(method, url, **kw)
+
+    def get(self, url: str, **kw: Any) -> requests.Response:
+        return self.request("GET", url, **kw)
+
+    def post(self, url: str, data=None, **kw: Any) -> requests.Response:
+        return self.request("POST", url, data=data, **kw)
+
+    def put(self, url: str, data=None, **kw: Any) -> requests.Response:
+        return self.request("PUT", url, data=data, **kw)
+
+    def close(self):
+        self.session.close()
+
+
+def failed_response(url: str, error: requests.RequestException) -> requests.Response:
+    """Build a 503 response for a request that got no answer (timeout, ...)."""
+    res = requests.Response()
+    res.status_code = 503
+    res.url = url
+    res.reason = "Request failed"
+    res._content = json.dumps(
+        {
+            "error": {
+                "status": 503,
+                "message": f"{type(error).__name__}: {error}",
+                "reason": "REQUEST_FAILED",
+            }
+        }
+    ).encode()
+    return res
+
+
+def is_request_failure(result) -> bool:
+    """Whether an API result is a :func:`failed_response`."""
+    data = result["data"]
+    error = data.get("error") if isinstance(data, dict) else None
+    return isinstance(error, dict) and error.get("reason") == "REQUEST_FAILED"
+
+
+_default_transport: Transport | None = None
+_default_lock = threading.Lock()
+
+
+def get_transport() -> Transport:
+    """Return the process-wide transport, creating it on first use."""
+    global _default_transport
+    with _default_lock:
+        if _default_transport is None:
+            _default_transport = Transport()
+        return _default_transport
+
+
+def set_transport(transport: Transport) -> Transport:
+    """Replace the process-wide transport (e.g. to resize the pool)."""
+    global _default_transport
+    with _default_lock:
+        old, _default_transport = _default_transport, transport
+    if old is not None and old is not transport:
+        old.close()
+    return transport
@@ -0,0 +1,151 @@
+import asyncio
+import inspect
+import time
+from dataclasses import dataclass
+from enum import Enum
+from typing import Any, Callable
+
+# imported by ned.app first thing, so this is close enough to process start
+LAUNCHED_AT = time.perf_counter()
+
+
+class StageStatus(Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    SKIPPED = "skipped"
+    FAILED = "failed"
+
+
+class StageError(Exception):
+    """Raised by a stage to fail the pipeline with a readable message."""
+
+
+class SkipStage(Exception):
+    """Raised by a stage that has nothing to do; its dependents are skipped too."""
+
+
+@dataclass
+class Stage:
+    name: str
+    func: Callable[[], Any]
+    after: tuple[str, ...] = ()
+    on_loop: bool = False  # run on the event loop instead of a worker thread
+    label: str = ""
+    status: StageStatus = StageStatus.PENDING
+    result: Any = None
+    error: BaseException | None = None
+    started: float | None = None
+    finished: float | None = None
+
+    @property
+    def duration(self) -> float | None:
+        if self.started is None or self.finished is None:
+            return None
+        return self.finished - self.started
+
+
+class StartupPipeline:
+    """Runs startup stages concurrently, each one as soon as its dependencies
+    are done.
+
+    Stages run on the default executor unless ``on_loop`` is set, in which
+    case they run on the event loop (they may be coroutines that yield
+    between steps). ``on_progress`` is called on the event loop whenever a
+    stage changes status.
+    """
+
+    def __init__(self, on_progress: Callable[[Stage], None] | None = None):
+        self.on_progress = on_progress
+        self.stages: dict[str, Stage] = {}
+        self.started: float | None = None
+        self.finished: float | None = None
+
+    def add(
+        self,
+        name: str,
+        func: Callable[[], Any],
+        after: tuple[str, ...] = (),
+        on_loop=False,
+        label: str | None = None,
+    ) -> Stage:
+        for dependency in after:
+            if dependency not in self.stages:
+                raise ValueError(f"Stage '{name}' depends on unknown '{dependency}'")
+        stage = Stage(name, func, after, on_loop, label or name)
+        self.stages[name] = stage
+        return stage
+
+    def result(self, name: str) -> Any:
+        return self.stages[name].result
+
+    def status(self, name: str) -> StageStatus:
+        return self.stages[name].status
+
+    async def run(self) -> bool:
+        """Run every stage, returns whether none of them failed."""
+        self.started = time.perf_counter()
+        tasks: dict[str, asyncio.Task] = {}
+        for stage in self.stages.values():
+            tasks[stage.name] = asyncio.create_task(
+                self._run_stage(stage, [tasks[name] for name in stage.after])
+            )
+        await asyncio.gather(*tasks.values())
+        self.finished = time.perf_counter()
+        return all(s.status != StageStatus.FAILED for s in self.stages.values())
+
+    def _set_status(self, stage: Stage, status: StageStatus):
+        stage.status = status
+        if self.on_progress:
+            self.on_progress(stage)
+
+    async def _run_stage(self, stage: Stage, dependencies: list[asyncio.Task]) -> bool:
+        if all(task.done() for task in dependencies):
+            # don't give up the loop to a long on_loop stage before starting
+            ready = [task.result() for task in dependencies]
+        else:
+            ready = await asyncio.gather(*dependencies)
+        if not all(ready):
+            self._set_status(stage, StageStatus.SKIPPED)
+            return False
+
+        stage.started = time.perf_counter()
+        self._set_status(stage, StageStatus.RUNNING)
+        try:
+            if stage.on_loop:
+                result = stage.func()
+                if inspect.isawaitable(result):
+                    result = await result
+            else:
+                loop = asyncio.get_running_loop()
+                result = await loop.run_in_executor(None, stage.func)
+        except SkipStage:
+            status = StageStatus.SKIPPED
+        except Exception as e:
+            stage.error = e
+            status = StageStatus.FAILED
+        else:
+            stage.result = result
+            status = StageStatus.DONE
+        stage.finished = time.perf_counter()
+        self._set_status(stage, status)
+        return status == StageStatus.DONE
+
+    def report(self) -> list[str]:
+        """Per-stage timings, offsets are relative to the start of the run."""
+        lines = []
+        for stage in self.stages.values():
+            if stage.duration is None:
+                lines.append(f"{stage.name:<10} {stage.status.value:>8}")
+                continue
+            offset = stage.started - self.started
+            lines.append(
+                f"{stage.name:<10} {stage.status.value:>8} "
+                f"{stage.duration * 1000:7.1f} ms  (at +{offset * 1000:.1f} ms)"
+            )
+        if self.finished is not None:
+            lines.append(
+                f"{'total':<10} {'':>8} {(self.finished - self.started) * 1000:7.1f} ms"
+                f"  ({(self.finished - LAUNCHED_AT) * 1000:.1f} ms since launch)"
+            )
+        return lines
@@ -3,45 +3,59 @@ import time
 
 
 class BackgroundTimer:
+    """Playback clock anchored to ``time.monotonic_ns()``.
+
+    Instead of ticking in a background thread, the timer stores the position
+    it had when it was last started (or set) and the monotonic time of that
+    moment, and derives the current position on demand.
+    """
+
     def __init__(self):
-        self.milliseconds = 0
         self.running = False
-        self.thread = None
         self.lock = threading.Lock()
+        self._position_ms = 0
+        self._anchor_ns = 0
+
+    def _elapsed_ms(self):
+        return (time.monotonic_ns() - self._anchor_ns) // 1_000_000
+
+    def _current(self):
+        if self.running:
+            return self._position_ms + self._elapsed_ms()
+        return self._position_ms
 
-    def _timer_loop(self):
-        while self.running:
-            time.sleep(0.001)
-            with self.lock:
-                self.milliseconds += 1
+    @property
+    def milliseconds(self):
+        return self.get_time()
 
     def start(self):
-        if not self.running:
-            self.running = True
-            self.thread = threading.Thread(target=self._timer_loop, daemon=True)
-            self.thread.start()
+        with self.lock:
+            if not self.running:
+                self._anchor_ns = time.monotonic_ns()
+                self.running = True
 
     def stop(self):
-        self.running = False
-        if self.thread:
-            self.thread.join()
+        with self.lock:
+            if self.running:
+                self._position_ms = self._current()
+                self.running = False
 
     def get_time(self):
         with self.lock:
-            return self.milliseconds
+            return self._current()
 
     def set_time(self, value):
         with self.lock:
-            self.milliseconds = value
+            self._position_ms = value
+            self._anchor_ns = time.monotonic_ns()
 
     def increment_time(self, value):
         with self.lock:
-            self.milliseconds += value
+            self._position_ms += value
 
     def decrement_time(self, value):
         with self.lock:
-            self.milliseconds -= value
+            self._position_ms -= value
 
     def reset(self):
-        with self.lock:
-            self.milliseconds = 0
+        self.set_time(0)
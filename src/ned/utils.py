@@ -1,3 +1,4 @@
+import hashlib
 import json
 import os
 import shutil
@@ -23,22 +24,40 @@ def format_milli(milli: int) -> str:
         return f"{min}:{sec:02}"
 
 
-def is_librespot_installed():
-    return shutil.which("librespot") is not None
+def is_librespot_installed(path: str = "librespot"):
+    return shutil.which(path) is not None
 
 
-def setup_resources(override=False) -> Path:
+def _file_digest(path: Path) -> bytes | None:
+    try:
+        return hashlib.blake2b(path.read_bytes()).digest()
+    except OSError:
+        return None
+
+
+def setup_resources(override=False) -> int:
+    """Copy the packaged resources to RESOURCES_DIR.
+
+    With ``override``, files whose contents differ from the packaged ones are
+    replaced. Returns the number of files copied.
+    """
     resources_package = files("ned.resources")
+    copied = 0
     with as_file(resources_package) as src_path:
         if not RESOURCES_DIR.exists():
             shutil.copytree(src_path, RESOURCES_DIR)
+            return sum(1 for f in RESOURCES_DIR.rglob("*") if f.is_file())
         elif override:
             for src_file in src_path.rglob("*"):
-                if src_file.is_file():
+                if src_file.is_file() and "__pycache__" not in src_file.parts:
                     relative_path = src_file.relative_to(src_path)
                     dest_file = RESOURCES_DIR / relative_path
+                    if _file_digest(src_file) == _file_digest(dest_file):
+                        continue
                     dest_file.parent.mkdir(parents=True, exist_ok=True)
                     shutil.copy2(src_file, dest_file)
+                    copied += 1
+    return copied
 
 
 def open_url(url):
@@ -3,6 +3,8 @@ from modern_urwid import WidgetBuilder
 from modern_urwid.compiler import create_wrapper
 from urwid.canvas import CompositeCanvas
 
+from ned.logs import LogStore
+
 
 class TimeProgressBar(urwid.ProgressBar):
     def __init__(
@@ -12,52 +14,144 @@ class TimeProgressBar(urwid.ProgressBar):
     ) -> None:
         self.current_time = urwid.Text("0:00")
         self.max_time = urwid.Text("0:00", align="right")
-        self.columns = urwid.Columns([self.current_time, self.max_time])
+        self._rendered_cols: int | None = None
+        self._rendered_cell: tuple[int, int] | None = None
+        self._cache_key: tuple | None = None
+        self._cache_canvas: urwid.TextCanvas | None = None
 
         super().__init__("pb_empty", "pb_full", current, done, "pb_satt")
 
+    def _cell(self, maxcol: int, current) -> tuple[int, int]:
+        """The (column, eighth) the bar ends at for a given completion."""
+        if self.done <= 0:
+            return 0, 0
+        cf = float(current) * maxcol / self.done
+        ccol = int(cf)
+        return ccol, int((cf - ccol) * 8)
+
+    def ms_until_change(self, current) -> float | None:
+        """Milliseconds of progress until the bar moves by an eighth-block."""
+        if not self._rendered_cols or self.done <= 0:
+            return None
+        step = self.done / (self._rendered_cols * 8)
+        return step - current % step
+
+    def set_completion(self, current) -> None:
+        # only invalidate when the visible cell or eighth-block changes
+        if self._rendered_cols is not None and self._rendered_cell == self._cell(
+            self._rendered_cols, current
+        ):
+            self._current = current
+            return
+        super().set_completion(current)
+
+    current = property(lambda self: self._current, set_completion)
+
+    @property
+    def done(self) -> int:
+        return self._done
+
+    @done.setter
+    def done(self, done: int) -> None:
+        if done != self._done:
+            self._done = done
+            self._invalidate()
+
     def set_current_time(self, time):
-        self.current_time.set_text(time)
+        if time != self.current_time.text:
+            self.current_time.set_text(time)
+            self._invalidate()
 
     def set_max_time(self, time):
-        self.max_time.set_text(time)
+        if time != self.max_time.text:
+            self.max_time.set_text(time)
+            self._invalidate()
+
+    def _time_row(self, maxcol: int) -> str:
+        # same layout Columns gives the two halves, without rendering them
+        right_cols = maxcol // 2
+        left_cols = maxcol - right_cols
+        left = self.current_time.text[:left_cols]
+        right = self.max_time.text[:right_cols]
+        return left.ljust(left_cols) + right.rjust(right_cols)
+
+    def _render_canvas(self, maxcol: int, ccol: int, cs: int) -> urwid.TextCanvas:
+        row = self._time_row(maxcol)
+        if ccol < 0 or (ccol == cs == 0):
+            attr = [(self.normal, maxcol)]
+        elif ccol >= maxcol:
+            attr = [(self.complete, maxcol)]
+        elif cs and row[ccol] == " ":
+            row = row[:ccol] + self.eighths[cs] + row[ccol + 1 :]
+            cenc_len = len(self.eighths[cs].encode("utf-8"))
+            attr = []
+            if ccol > 0:
+                attr.append((self.complete, ccol))
+            attr.append((self.satt, cenc_len))
+            if maxcol - ccol - 1 > 0:
+                attr.append((self.normal, maxcol - ccol - 1))
+        elif ccol == 0:
+            attr = [(self.normal, maxcol)]
+        else:
+            attr = [(self.complete, ccol), (self.normal, maxcol - ccol)]
+        text = row.encode("utf-8")
+        return urwid.TextCanvas([text], [attr], [[(None, len(text))]], maxcol=maxcol)
 
     def render(
         self,
         size: tuple[int],  # type: ignore[override]
         focus: bool = False,
     ) -> urwid.TextCanvas:
-        # pylint: disable=protected-access
         (maxcol,) = size
+        ccol, cs = self._cell(maxcol, self.current)
+        self._rendered_cols = maxcol
+        self._rendered_cell = (ccol, cs)
 
-        c = urwid.TextCanvas(self.columns.render(size).text)
+        key = (maxcol, ccol, cs, self.current_time.text, self.max_time.text)
+        if key != self._cache_key:
+            self._cache_key = key
+            self._cache_canvas = self._render_canvas(maxcol, ccol, cs)
+        return self._cache_canvas
 
-        cf = float(self.current) * maxcol / self.done
-        ccol_dirty = int(cf)
-        ccol = len(c._text[0][:ccol_dirty].decode("utf-8", "ignore").encode("utf-8"))
-        cs = int((cf - ccol) * 8)
-        if ccol < 0 or (ccol == cs == 0):
-            c._attr = [[(self.normal, maxcol)]]
-        elif ccol >= maxcol:
-            c._attr = [[(self.complete, maxcol)]]
-        elif cs and c._text[0][ccol] == 32:
-            t = c._text[0]
-            cenc = self.eighths[cs].encode("utf-8")
-            c._text[0] = t[:ccol] + cenc + t[ccol + 1 :]
-            a = []
-            if ccol > 0:
-                a.append((self.complete, ccol))
-            a.append((self.satt, len(cenc)))
-            if maxcol - ccol - 1 > 0:
-                a.append((self.normal, maxcol - ccol - 1))
-            c._attr = [a]
-            c._cs = [[(None, len(c._text[0]))]]
-        else:
-            if ccol == 0:
-                c._attr = [[(self.normal, maxcol)]]
-            else:
-                c._attr = [[(self.complete, ccol), (self.normal, maxcol - ccol)]]
-        return c
+
+class LogWalker(urwid.SimpleFocusListWalker):
+    """List walker that mirrors a :class:`~ned.logs.LogStore`.
+
+    :meth:`sync` only builds widgets for records added since the last call
+    and drops the ones that have fallen out of the store's ring buffer.
+    """
+
+    def __init__(self, store: LogStore):
+        super().__init__([])
+        self.store = store
+        self.next_seq = 0
+
+    def sync(self) -> bool:
+        records = self.store.since(self.next_seq)
+        if not records:
+            return False
+        self.next_seq = records[-1].seq + 1
+        self.extend(urwid.Text((record.style, record.text)) for record in records)
+        if (overflow := len(self) - self.store.maxlen) > 0:
+            del self[:overflow]
+        return True
+
+
+class SearchEdit(urwid.Edit):
+    """Single line edit that hands navigation keys to its owner.
+
+    Up/down and page keys emit ``"navigate"`` instead of moving the focus
+    out of the edit, so the query keeps focus while results are browsed.
+    """
+
+    signals = [*urwid.Edit.signals, "navigate"]
+    NAVIGATION_KEYS = ("up", "down", "page up", "page down")
+
+    def keypress(self, size, key):
+        if key in self.NAVIGATION_KEYS:
+            urwid.emit_signal(self, "navigate", self, key)
+            return None
+        return super().keypress(size, key)
 
 
 class TimeProgressBarBuilder(WidgetBuilder):
@@ -67,6 +161,14 @@ class TimeProgressBarBuilder(WidgetBuilder):
         return TimeProgressBar()
 
 
+class SearchEditBuilder(WidgetBuilder):
+    tag = "searchedit"
+
+    def build(self, **kwargs):
+        kwargs.update(self.resolve_attrs())
+        return SearchEdit(**kwargs)
+
+
 class CenteredButton(WidgetBuilder):
     tag = "centeredbutton"
 
@@ -0,0 +1,35 @@
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import pytest
+
+# ned resolves ~/.ned on import, keep the tests out of the real one
+HOME = Path(tempfile.mkdtemp(prefix="ned-tests-"))
+os.environ["HOME"] = str(HOME)
+
+
+@pytest.fixture
+def config():
+    """Write a set up config (client id and a valid token), return a writer."""
+    write_config()
+    return write_config
+
+
+def write_config(**values):
+    config = {
+        "id": "test",
+        "device_name": "Ned",
+        "token": {
+            "access_token": "test",
+            "refresh_token": "test",
+            "expires_at": time.time() + 3600,
+            "scope": None,
+            "token_type": "Bearer",
+        },
+        **values,
+    }
+    (HOME / ".ned").mkdir(parents=True, exist_ok=True)
+    (HOME / ".ned" / "cfg.json").write_text(json.dumps(config))
@@ -0,0 +1,76 @@
+import asyncio
+import time
+
+from ned.session import NedSession
+from ned.spotify.async_api import AsyncSpotifyAPI
+
+
+class SlowAPI:
+    """Stands in for AsyncSpotifyAPI, the earlier a command the slower it is."""
+
+    def __init__(self):
+        self.log: list[tuple[str, str]] = []
+        self.delay = 0.05
+
+    def __getattr__(self, name):
+        async def command(*args):
+            self.log.append(("start", name))
+            delay, self.delay = self.delay, max(0.0, self.delay - 0.01)
+            await asyncio.sleep(delay)
+            self.log.append(("end", name))
+            return {"ok": True, "data": None}
+
+        return command
+
+
+def make_session(loop) -> tuple[NedSession, SlowAPI]:
+    session = NedSession()
+    session.aapi = SlowAPI()
+    session.attach_loop(loop)
+    return session, session.aapi
+
+
+def test_commands_run_in_order():
+    async def main():
+        session, api = make_session(asyncio.get_running_loop())
+        names = ["pause_playback", "start_playback", "pause_playback", "set_volume"]
+        tasks = [session.send_command(name) for name in names]
+        await asyncio.gather(*tasks)
+        return names, api.log
+
+    names, log = asyncio.run(main())
+    # each command ends before the next one starts
+    assert log == [(step, name) for name in names for step in ("start", "end")]
+
+
+class SlowSkips:
+    """Stands in for SpotifyAPI, where every skip is a slow round trip."""
+
+    def __init__(self):
+        self.log: list[str] = []
+
+    def skip_to_next(self, device_id=None):
+        time.sleep(0.1)
+        self.log.append("next")
+        return {"ok": True, "data": None}
+
+    def seek_to_position(self, position_ms, device_id=None):
+        self.log.append(f"seek {position_ms}")
+        return {"ok": True, "data": None}
+
+
+def test_seek_waits_for_skips():
+    async def main():
+        session = NedSession()
+        api = SlowSkips()
+        session.aapi = AsyncSpotifyAPI(api)
+        session.attach_loop(asyncio.get_running_loop())
+        session.commands.skip_debounce = session.commands.seek_debounce = 0.01
+        for _ in range(3):
+            session.skip()
+        session.seek(30000)
+        while len(api.log) < 4:
+            await asyncio.sleep(0.01)
+        return api.log
+
+    assert asyncio.run(main()) == ["next", "next", "next", "seek 30000"]
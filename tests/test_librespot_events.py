@@ -0,0 +1,51 @@
+import os
+import subprocess
+import sys
+import time
+
+from ned.librespot.events import EventListener
+
+
+def send_event(listener: EventListener, event: str):
+    # the way librespot runs the hook: event in the environment
+    env = {**os.environ, **listener.env(), "PLAYER_EVENT": event}
+    code = "from ned.librespot.hook import main; main()"
+    subprocess.run([sys.executable, "-c", code], env=env, check=True)
+
+
+def wait_for(received: list, count: int):
+    deadline = time.monotonic() + 5
+    while len(received) < count and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_each_process_gets_its_own_socket():
+    listener = EventListener(lambda event: None)
+    assert listener.path.name == f"librespot-events-{os.getpid()}.sock"
+
+
+def test_second_listener_leaves_the_first_alone(tmp_path):
+    first, second = [], []
+    a = EventListener(first.append, tmp_path / "a.sock")
+    b = EventListener(second.append, tmp_path / "b.sock")
+    assert a.start() and b.start()
+    try:
+        send_event(a, "playing")
+        send_event(b, "paused")
+        wait_for(first, 1)
+        wait_for(second, 1)
+        assert [e.event for e in first] == ["playing"]
+        assert [e.event for e in second] == ["paused"]
+
+        # a listener that can't bind doesn't take the socket over
+        clash = EventListener(second.append, tmp_path / "a.sock")
+        assert not clash.start()
+        b.stop()
+        send_event(a, "stopped")
+        wait_for(first, 2)
+        assert [e.event for e in first] == ["playing", "stopped"]
+        assert (tmp_path / "a.sock").exists()
+        assert not (tmp_path / "b.sock").exists()
+    finally:
+        a.stop()
+        b.stop()
@@ -0,0 +1,82 @@
+import json
+import threading
+import time
+from urllib.parse import urlparse
+
+import requests
+
+from ned.session import NedSession
+from ned.spotify.api_instance import SpotifyAPI
+from ned.spotify.transport import set_transport
+
+PLAYBACK = {
+    "device": {"id": "ned", "name": "Ned", "is_active": True, "volume_percent": 50},
+    "is_playing": True,
+    "progress_ms": 1000,
+    "currently_playing_type": "track",
+    "item": {"id": "t1", "type": "track", "name": "Song", "duration_ms": 200000},
+}
+ROUTES = {
+    "/v1/me": {"id": "user", "display_name": "User"},
+    "/v1/me/player": PLAYBACK,
+    "/v1/me/player/devices": {"devices": [PLAYBACK["device"]]},
+}
+
+
+class FlakyTransport:
+    """Times out on the first ``failures`` playback polls, then answers them."""
+
+    def __init__(self, failures: int):
+        self.failures = failures
+        self.lock = threading.Lock()
+
+    def request(self, method, url, **kw):
+        path = urlparse(url).path
+        if method == "GET" and path == "/v1/me/player":
+            with self.lock:
+                self.failures -= 1
+                if self.failures >= 0:
+                    raise requests.ReadTimeout("Read timed out")
+        res = requests.Response()
+        res.url = url
+        body = ROUTES.get(path) if method == "GET" else None
+        res.status_code = 200 if body is not None else 204
+        res._content = json.dumps(body).encode() if body is not None else b""
+        return res
+
+    def get(self, url, **kw):
+        return self.request("GET", url, **kw)
+
+    def post(self, url, data=None, **kw):
+        return self.request("POST", url, **kw)
+
+    def put(self, url, data=None, **kw):
+        return self.request("PUT", url, **kw)
+
+    def close(self):
+        pass
+
+
+def test_timeout_becomes_an_error_result(config):
+    api = SpotifyAPI("test", "", transport=FlakyTransport(failures=1))
+    result = api.get_current_playback()
+    assert not result["ok"]
+    assert "ReadTimeout" in result["data"]["error"]["message"]
+    assert api.get_current_playback()["ok"]
+
+
+def test_poll_loop_survives_timeouts(config):
+    set_transport(FlakyTransport(failures=2))
+    session = NedSession()
+    session.setup("test")
+    try:
+        deadline = time.monotonic() + 10
+        while session.data.playback.item is None:
+            assert time.monotonic() < deadline, "the poll loop stopped"
+            session.poller.wake()
+            time.sleep(0.05)
+        assert session.thread.is_alive()
+        assert session.data.playback.item.name == "Song"
+        assert any("ReadTimeout" in record.text for record in session.data.logs)
+    finally:
+        session.stop()
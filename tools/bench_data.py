@@ -0,0 +1,132 @@
+"""Parse time and allocations for one playback poll.
+
+    python tools/bench_data.py [iterations]
+
+Parses a realistic ``/me/player`` payload (a track with ~180 markets) the way
+the session does on every poll: first cold, then with the previous snapshot
+for the same track, which is the common case.
+"""
+
+import copy
+import json
+import sys
+import timeit
+import tracemalloc
+
+from ned.spotify.data import PlaybackData
+
+MARKETS = [f"{a}{b}" for a in "ABCDEFGHIJKLMN" for b in "ABCDEFGHIJKLM"][:180]
+ARTIST = {
+    "external_urls": {
+        "spotify": "https://open.spotify.com/artist/0OdUWJ0sBjDrqHygGUXeCF"
+    },
+    "href": "https://api.spotify.com/v1/artists/0OdUWJ0sBjDrqHygGUXeCF",
+    "id": "0OdUWJ0sBjDrqHygGUXeCF",
+    "name": "Band of Horses",
+    "type": "artist",
+    "uri": "spotify:artist:0OdUWJ0sBjDrqHygGUXeCF",
+}
+PAYLOAD = {
+    "device": {
+        "id": "5fbb3ba6aa454b5534c4ba43a8c7e8e45a63ad0e",
+        "is_active": True,
+        "is_private_session": False,
+        "is_restricted": False,
+        "name": "Ned",
+        "type": "Computer",
+        "volume_percent": 100,
+        "supports_volume": True,
+    },
+    "shuffle_state": False,
+    "repeat_state": "off",
+    "timestamp": 1700000000000,
+    "context": {
+        "external_urls": {
+            "spotify": "https://open.spotify.com/album/4m2880jivSbbyEGAKfITCa"
+        },
+        "href": "https://api.spotify.com/v1/albums/4m2880jivSbbyEGAKfITCa",
+        "type": "album",
+        "uri": "spotify:album:4m2880jivSbbyEGAKfITCa",
+    },
+    "progress_ms": 44272,
+    "item": {
+        "album": {
+            "album_type": "album",
+            "artists": [ARTIST],
+            "available_markets": MARKETS,
+            "external_urls": {
+                "spotify": "https://open.spotify.com/album/4m2880jivSbbyEGAKfITCa"
+            },
+            "href": "https://api.spotify.com/v1/albums/4m2880jivSbbyEGAKfITCa",
+            "id": "4m2880jivSbbyEGAKfITCa",
+            "images": [
+                {"height": s, "url": f"https://i.scdn.co/image/{s}", "width": s}
+                for s in (640, 300, 64)
+            ],
+            "name": "Cease To Begin",
+            "release_date": "2007-10-09",
+            "release_date_precision": "day",
+            "total_tracks": 10,
+            "type": "album",
+            "uri": "spotify:album:4m2880jivSbbyEGAKfITCa",
+        },
+        "artists": [ARTIST],
+        "available_markets": MARKETS,
+        "disc_number": 1,
+        "duration_ms": 226600,
+        "explicit": False,
+        "external_ids": {"isrc": "USSUB0779705"},
+        "external_urls": {
+            "spotify": "https://open.spotify.com/track/6UFivO2zqqPFPoQ7dLRpHZ"
+        },
+        "href": "https://api.spotify.com/v1/tracks/6UFivO2zqqPFPoQ7dLRpHZ",
+        "id": "6UFivO2zqqPFPoQ7dLRpHZ",
+        "is_local": False,
+        "name": "No One's Gonna Love You",
+        "popularity": 62,
+        "preview_url": None,
+        "track_number": 4,
+        "type": "track",
+        "uri": "spotify:track:6UFivO2zqqPFPoQ7dLRpHZ",
+    },
+    "currently_playing_type": "track",
+    "actions": {"disallows": {"resuming": True}},
+    "is_playing": True,
+}
+
+
+def allocations(fn):
+    data = json.loads(json.dumps(PAYLOAD))
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    result = fn(data)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    stats = after.compare_to(before, "lineno")
+    blocks = sum(s.count_diff for s in stats if s.count_diff > 0)
+    size = sum(s.size_diff for s in stats if s.size_diff > 0)
+    del result
+    return blocks, size
+
+
+def main():
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    previous = PlaybackData.from_dict(copy.deepcopy(PAYLOAD))
+
+    def cold(data):
+        return PlaybackData.from_dict(data)
+
+    def warm(data):
+        return PlaybackData.from_dict(data, previous)
+
+    for name, fn in (("cold parse", cold), ("same track", warm)):
+        seconds = timeit.timeit(lambda: fn(PAYLOAD), number=number)
+        blocks, size = allocations(fn)
+        print(
+            f"{name:<11} {seconds / number * 1e6:6.2f} us/poll"
+            f"  {blocks:4d} blocks  {size:6d} bytes retained by the model"
+        )
+
+
+if __name__ == "__main__":
+    main()
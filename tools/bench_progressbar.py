@@ -0,0 +1,55 @@
+"""Render cost of :class:`ned.widgets.TimeProgressBar`.
+
+    python tools/bench_progressbar.py [iterations]
+
+"miss" renders after the visible cell or timestamp changed, "hit" renders
+again with an unchanged key (e.g. after an invalidation that didn't change
+what the bar shows). urwid's own canvas cache is bypassed in both cases.
+"""
+
+import sys
+import timeit
+
+from ned.utils import format_milli
+from ned.widgets import TimeProgressBar
+
+WIDTHS = (40, 80, 160, 300)
+DURATIONS = (215_000, 3 * 3600_000 + 59 * 60_000)  # 3:35 and 3:59:00
+
+
+def bench(maxcol, duration, number):
+    bar = TimeProgressBar(done=duration)
+    bar.set_max_time(format_milli(duration))
+    step = max(1, duration // number)
+    positions = iter(range(0, duration * 2, step))
+
+    def miss():
+        progress = next(positions) % duration
+        bar._cache_key = None
+        bar.current = progress
+        bar.set_current_time(format_milli(progress))
+        bar._invalidate()
+        bar.render((maxcol,))
+
+    def hit():
+        bar._invalidate()
+        bar.render((maxcol,))
+
+    bar.render((maxcol,))
+    return (
+        timeit.timeit(miss, number=number) / number * 1e6,
+        timeit.timeit(hit, number=number) / number * 1e6,
+    )
+
+
+def main():
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    print(f"{'width':>5} {'duration':>9} {'miss us':>9} {'hit us':>8}")
+    for duration in DURATIONS:
+        for maxcol in WIDTHS:
+            miss, hit = bench(maxcol, duration, number)
+            print(f"{maxcol:>5} {format_milli(duration):>9} {miss:>9.2f} {hit:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+"""Run a headless NedSession against tools/mock_spotify.py and measure it.
+
+    python tools/bench_session.py [--idle S] [--presses N] [--latency S]
+                                  [--librespot]
+
+Reports, for a session left alone for ``--idle`` seconds:
+
+- Web API calls per minute, by endpoint (counted by the mock server)
+- CPU seconds used per idle minute by the session's process
+
+and then, for each key binding that sends a command, the time from calling
+the session method the key triggers to the request reaching the server
+(median and p95 over ``--presses`` presses). Seeks and skips include the
+command queue's debounce. With ``--librespot`` the session also runs
+tools/fake_librespot.py, so its player events drive the state.
+
+Runs in a temporary home directory, so the real config and caches are
+left alone.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from pathlib import Path
+
+TOOLS_DIR = Path(__file__).resolve().parent
+
+
+def get_json(url: str):
+    with urllib.request.urlopen(url) as res:
+        return json.load(res)
+
+
+def start_mock(latency: float) -> tuple[subprocess.Popen, str]:
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            str(TOOLS_DIR / "mock_spotify.py"),
+            "--port",
+            "0",
+            "--latency",
+            str(latency),
+        ],
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    url = process.stdout.readline().rsplit(" ", 1)[-1].strip()
+    return process, url
+
+
+def write_config(home: Path, url: str, librespot: bool):
+    config = {
+        "id": "bench",
+        "device_name": "Ned",
+        "api_url": f"{url}/v1",
+        "accounts_url": f"{url}/api",
+        "token": {
+            "access_token": "bench",
+            "refresh_token": "bench",
+            "expires_at": time.time() + 3600,
+            "scope": None,
+            "token_type": "Bearer",
+        },
+    }
+    if librespot:
+        config["librespot_path"] = str(TOOLS_DIR / "fake_librespot.py")
+    (home / ".ned").mkdir(parents=True, exist_ok=True)
+    (home / ".ned" / "cfg.json").write_text(json.dumps(config))
+
+
+def wait_for_request(url: str, since: float, method: str, path: str, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        for request in get_json(f"{url}/_mock/requests?since={since}"):
+            if request["method"] == method and request["path"] == path:
+                return request["time"]
+        time.sleep(0.005)
+    return None
+
+
+def percentile(values: list[float], share: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * share))]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--idle", type=float, default=60.0, help="seconds")
+    parser.add_argument("--presses", type=int, default=10)
+    parser.add_argument(
+        "--latency", type=float, default=0.02, help="mock latency per request"
+    )
+    parser.add_argument("--librespot", action="store_true")
+    args = parser.parse_args()
+
+    home = Path(tempfile.mkdtemp(prefix="ned-bench-"))
+    mock, url = start_mock(args.latency)
+    write_config(home, url, args.librespot)
+    # ned resolves its directories from the home directory on import
+    os.environ["HOME"] = str(home)
+    from ned.session import NedSession
+
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    session = NedSession()
+    try:
+        session.attach_loop(loop)
+        session.setup("bench")
+        if args.librespot:
+            session.start_librespot()
+
+        deadline = time.monotonic() + 10
+        while session.data.device_id is None or session.data.playback.item is None:
+            if time.monotonic() > deadline:
+                sys.exit("The session never found the mock's device")
+            time.sleep(0.05)
+
+        stats = get_json(f"{url}/_mock/stats")
+        cpu = time.process_time()
+        time.sleep(args.idle)
+        cpu = time.process_time() - cpu
+        after = get_json(f"{url}/_mock/stats")
+        per_minute = 60 / args.idle
+
+        mode = "player events" if args.librespot else "polling only"
+        print(
+            f"Idle for {args.idle:.0f}s ({mode}, {args.latency * 1000:.0f} ms latency)"
+        )
+        print(
+            f"  API calls: {(after['requests'] - stats['requests']) * per_minute:.1f}/min"
+        )
+        for endpoint, count in sorted(after["endpoints"].items()):
+            count -= stats["endpoints"].get(endpoint, 0)
+            if count:
+                print(f"    {endpoint}: {count * per_minute:.1f}/min")
+        print(f"  CPU: {cpu * per_minute:.3f} s/min")
+
+        volume = session.data.playback.device.volume_percent or 50
+
+        def toggle_target():
+            playing = session.data.playback.is_playing
+            return "PUT", f"/v1/me/player/{'pause' if playing else 'play'}"
+
+        # name, what the key calls, the request it should cause
+        actions = [
+            ("play/pause", session.toggle_playback, toggle_target),
+            (
+                "volume",
+                lambda: session.set_volume(volume),
+                lambda: ("PUT", "/v1/me/player/volume"),
+            ),
+            (
+                "seek",
+                lambda: session.seek_relative(5000),
+                lambda: ("PUT", "/v1/me/player/seek"),
+            ),
+            ("skip", lambda: session.skip(1), lambda: ("POST", "/v1/me/player/next")),
+        ]
+        print("Key press to request")
+        for name, action, target in actions:
+            latencies = []
+            for _ in range(args.presses):
+                method, path = target()
+                sent = time.time()
+                loop.call_soon_threadsafe(action)
+                received = wait_for_request(url, sent, method, path)
+                if received is not None:
+                    latencies.append((received - sent) * 1000)
+                time.sleep(0.6)  # let the command queue settle
+            if latencies:
+                print(
+                    f"  {name}: median {statistics.median(latencies):.1f} ms, "
+                    f"p95 {percentile(latencies, 0.95):.1f} ms "
+                    f"({len(latencies)}/{args.presses} arrived)"
+                )
+            else:
+                print(f"  {name}: no requests arrived")
+    finally:
+        session.stop()
+        mock.terminate()
+        mock.wait()
+        shutil.rmtree(home, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Compare per-call latency of one-shot ``requests`` calls against the pooled
+:class:`ned.spotify.transport.Transport` using a local stub server.
+
+    python tools/bench_transport.py [calls]
+
+The stub adds a fixed handshake delay on every new connection to stand in for
+the TCP+TLS setup cost of api.spotify.com, which keep-alive avoids.
+"""
+
+import socketserver
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from ned.spotify.transport import Transport
+
+HANDSHAKE_DELAY = 0.02  # seconds, roughly one extra RTT for TLS on a LAN
+BODY = b'{"is_playing": true, "progress_ms": 1000}'
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        time.sleep(HANDSHAKE_DELAY)
+        super().setup()
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(BODY)))
+        self.end_headers()
+        self.wfile.write(BODY)
+
+    def log_message(self, *args, **kwargs):
+        pass
+
+
+def measure(fn, calls):
+    samples = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        fn().raise_for_status()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def report(name, samples):
+    print(
+        f"{name:<12} mean {statistics.mean(samples):7.2f} ms"
+        f"  median {statistics.median(samples):7.2f} ms"
+        f"  max {max(samples):7.2f} ms"
+    )
+
+
+def main():
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    socketserver.TCPServer.allow_reuse_address = True
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/v1/me/player"
+
+    transport = Transport()
+    try:
+        one_shot = measure(lambda: requests.get(url, timeout=10), calls)
+        pooled = measure(lambda: transport.get(url), calls)
+    finally:
+        transport.close()
+        server.shutdown()
+
+    print(f"{calls} calls, {HANDSHAKE_DELAY * 1000:.0f} ms simulated handshake")
+    report("requests.get", one_shot)
+    report("Transport", pooled)
+    print(
+        f"speedup      {statistics.mean(one_shot) / statistics.mean(pooled):.1f}x"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""Stand-in for librespot that plays a scripted session without Spotify.
+
+    python tools/fake_librespot.py [librespot args] [--track-seconds N]
+                                   [--crash-after N]
+
+Accepts (and mostly ignores) librespot's command line, logs in librespot's
+format and runs the ``--onevent`` program for each scripted player event,
+with the same environment variables librespot sets. Point ned at it with
+``"librespot_path": "/path/to/tools/fake_librespot.py"`` in the config.
+``--crash-after`` makes it panic like librespot would, to exercise restarts.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+
+TRACKS = [
+    ("4uLU6hMCjMI75M1A2tKUQC", "Never Gonna Give You Up", ["Rick Astley"], 213573),
+    (
+        "7GhIk7Il098yCjg4BQjzvb",
+        "Never Gonna Give You Up (Live)",
+        ["Rick Astley"],
+        238000,
+    ),
+    ("0VjIjW4GlUZAMYd2vXMi3b", "Blinding Lights", ["The Weeknd"], 200040),
+]
+
+
+def log(level: str, message: str, module: str = "librespot"):
+    now = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    print(f"[{now} {level:<5} {module}] {message}", file=sys.stderr, flush=True)
+
+
+def crash():
+    print(
+        "thread 'main' panicked at 'called `Result::unwrap()` on an `Err` value'",
+        file=sys.stderr,
+        flush=True,
+    )
+    os._exit(101)
+
+
+def track_env(index: int) -> dict[str, str]:
+    id, name, artists, duration = TRACKS[index % len(TRACKS)]
+    return {
+        "TRACK_ID": id,
+        "URI": f"spotify:track:{id}",
+        "ITEM_TYPE": "Track",
+        "NAME": name,
+        "ARTISTS": "\n".join(artists),
+        "ALBUM": name,
+        "DURATION_MS": str(duration),
+        "IS_EXPLICIT": "false",
+    }
+
+
+class Player:
+    def __init__(self, onevent: str | None):
+        self.onevent = onevent
+        self.track = 0
+        self.started = 0.0
+        self.offset_ms = 0
+        self.playing = False
+
+    @property
+    def position_ms(self) -> int:
+        if not self.playing:
+            return self.offset_ms
+        return self.offset_ms + int((time.monotonic() - self.started) * 1000)
+
+    def emit(self, event: str, **env: str):
+        log("DEBUG", f"Player event: {event}", "librespot_playback::player")
+        if not self.onevent:
+            return
+        env = {**os.environ, "PLAYER_EVENT": event, **env}
+        subprocess.run([self.onevent], env=env, check=False)
+
+    def track_id(self) -> dict[str, str]:
+        id = TRACKS[self.track % len(TRACKS)][0]
+        return {"TRACK_ID": id, "URI": f"spotify:track:{id}"}
+
+    def load(self, index: int):
+        self.track = index
+        self.offset_ms = 0
+        self.started = time.monotonic()
+        log("INFO", f"Loading <{TRACKS[index % len(TRACKS)][1]}>", "librespot_playback")
+        self.emit("track_changed", **track_env(index))
+        self.emit("playing", **self.track_id(), POSITION_MS="0")
+        self.playing = True
+
+    def pause(self):
+        self.offset_ms = self.position_ms
+        self.playing = False
+        self.emit("paused", **self.track_id(), POSITION_MS=str(self.offset_ms))
+
+    def resume(self):
+        self.started = time.monotonic()
+        self.playing = True
+        self.emit("playing", **self.track_id(), POSITION_MS=str(self.offset_ms))
+
+    def seek(self, position_ms: int):
+        self.offset_ms = position_ms
+        self.started = time.monotonic()
+        self.emit("seeked", **self.track_id(), POSITION_MS=str(position_ms))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--name", default="Librespot")
+    parser.add_argument("--onevent")
+    parser.add_argument(
+        "--track-seconds",
+        type=float,
+        default=8.0,
+        help="how long each scripted track plays before the next one",
+    )
+    parser.add_argument(
+        "--crash-after",
+        type=float,
+        help="exit with librespot's panic code after this many seconds",
+    )
+    args, _ = parser.parse_known_args()
+    if args.crash_after is not None:
+        threading.Timer(args.crash_after, crash).start()
+
+    log("INFO", f"librespot 0.6.0 fake (Built on {datetime.now():%Y-%m-%d})")
+    log(
+        "INFO",
+        "Using Rodio sink with format: S16",
+        "librespot_playback::audio_backend::rodio",
+    )
+    log("INFO", "Authenticated as 'ned-test' !", "librespot_core::session")
+    player = Player(args.onevent)
+    player.emit("session_connected", USER_NAME="ned-test", CLIENT_NAME=args.name)
+    player.emit("volume_changed", VOLUME="32768")
+
+    step = args.track_seconds / 4
+    try:
+        while True:
+            player.load(player.track)
+            time.sleep(step)
+            player.pause()
+            time.sleep(step)
+            player.resume()
+            player.seek(player.position_ms + 30000)
+            player.emit("volume_changed", VOLUME=str(16384 * (1 + player.track % 3)))
+            time.sleep(step * 2)
+            player.emit("end_of_track", **player.track_id())
+            player.track += 1
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,385 @@
+"""Local stand-in for the parts of the Spotify Web API ned uses.
+
+    python tools/mock_spotify.py [--port N] [--latency S] [--jitter S]
+                                 [--rate-limit P] [--fail P] [--script FILE]
+
+Serves ``/v1/me``, ``/v1/me/player`` (state, devices, transfer, play, pause,
+seek, next, previous, volume, shuffle, repeat), ``/v1/tracks`` and the token
+endpoint ``/api/token``, with a simulated player behind them. Point ned at
+it with ``"api_url": "http://127.0.0.1:N/v1"`` and
+``"accounts_url": "http://127.0.0.1:N/api"`` in the config.
+
+Responses can be slowed down and made to fail: ``--latency``/``--jitter``
+delay every request, ``--rate-limit`` and ``--fail`` answer that share of
+requests with a 429 or 500, and ``--script`` loads rules for specific
+endpoints, e.g.::
+
+    [{"method": "GET", "path": "/v1/me/player", "status": 429,
+      "retry_after": 2, "times": 3},
+     {"path": "/v1/me/player/devices", "latency": 0.5}]
+
+Rules match on method and path prefix; ``probability`` (default 1) and
+``times`` (default unlimited) limit how often they apply. More rules can be
+added while running with ``POST /_mock/rules``. ``GET /_mock/stats`` returns
+request counts per endpoint and ``GET /_mock/requests?since=T`` the requests
+received after the unix time ``T``.
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from collections import Counter, deque
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+DEVICE_NAME = "Ned"
+TRACKS = [
+    ("4uLU6hMCjMI75M1A2tKUQC", "Never Gonna Give You Up", "Rick Astley", 213573),
+    ("0VjIjW4GlUZAMYd2vXMi3b", "Blinding Lights", "The Weeknd", 200040),
+    ("7qiZfU4dY1lWllzX7mPBI3", "Shape of You", "Ed Sheeran", 233712),
+]
+MAX_LOGGED_REQUESTS = 10000
+
+
+def track_object(index: int) -> dict:
+    id, name, artist, duration = TRACKS[index % len(TRACKS)]
+    return {
+        "id": id,
+        "name": name,
+        "type": "track",
+        "uri": f"spotify:track:{id}",
+        "duration_ms": duration,
+        "explicit": False,
+        "is_local": False,
+        "artists": [{"name": artist, "id": f"artist{index}", "type": "artist"}],
+        "album": {"name": name, "id": f"album{index}", "images": []},
+    }
+
+
+@dataclass
+class Rule:
+    path: str = "/"
+    method: str | None = None
+    status: int | None = None
+    latency: float = 0.0
+    retry_after: float = 1.0
+    probability: float = 1.0
+    times: int | None = None
+
+    def matches(self, method: str, path: str) -> bool:
+        if self.times is not None and self.times <= 0:
+            return False
+        if self.method and self.method.upper() != method:
+            return False
+        return path.startswith(self.path) and random.random() < self.probability
+
+
+class Player:
+    """Playback state as Spotify would report it, advancing in real time."""
+
+    def __init__(self, device_name: str = DEVICE_NAME):
+        self.lock = threading.Lock()
+        self.devices = [
+            {"id": "ned-device", "name": device_name, "type": "Computer"},
+            {"id": "phone-device", "name": "Phone", "type": "Smartphone"},
+        ]
+        self.active = "ned-device"
+        self.volume = 50
+        self.track = 0
+        self.playing = True
+        self.shuffle = False
+        self.repeat = "off"
+        self._offset_ms = 0
+        self._started = time.monotonic()
+
+    def position_ms(self) -> int:
+        if not self.playing:
+            return self._offset_ms
+        position = self._offset_ms + int((time.monotonic() - self._started) * 1000)
+        duration = TRACKS[self.track % len(TRACKS)][3]
+        while position >= duration:  # next track once this one ends
+            position -= duration
+            self.track += 1
+            self._offset_ms = position
+            self._started = time.monotonic()
+            duration = TRACKS[self.track % len(TRACKS)][3]
+        return position
+
+    def seek(self, position_ms: int):
+        self._offset_ms = max(0, position_ms)
+        self._started = time.monotonic()
+
+    def set_playing(self, playing: bool):
+        self._offset_ms = self.position_ms()
+        self._started = time.monotonic()
+        self.playing = playing
+
+    def skip(self, count: int):
+        self.track = max(0, self.track + count)
+        self.seek(0)
+
+    def device_list(self) -> list[dict]:
+        return [
+            {
+                **device,
+                "is_active": device["id"] == self.active,
+                "is_private_session": False,
+                "is_restricted": False,
+                "volume_percent": self.volume,
+                "supports_volume": True,
+            }
+            for device in self.devices
+        ]
+
+    def state(self) -> dict:
+        position = self.position_ms()
+        device = next(d for d in self.device_list() if d["is_active"])
+        return {
+            "device": device,
+            "repeat_state": self.repeat,
+            "shuffle_state": self.shuffle,
+            "context": None,
+            "timestamp": int(time.time() * 1000),
+            "progress_ms": position,
+            "is_playing": self.playing,
+            "item": track_object(self.track),
+            "currently_playing_type": "track",
+            "actions": {"disallows": {}},
+        }
+
+
+class MockSpotify(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address=("127.0.0.1", 0),
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        rate_limit: float = 0.0,
+        fail: float = 0.0,
+        rules: list[Rule] | None = None,
+        device_name: str = DEVICE_NAME,
+    ):
+        super().__init__(address, MockHandler)
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit = rate_limit
+        self.fail = fail
+        self.rules = rules or []
+        self.player = Player(device_name)
+        self.lock = threading.Lock()
+        self.counts: Counter[str] = Counter()
+        self.requests: deque[dict] = deque(maxlen=MAX_LOGGED_REQUESTS)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def record(self, method: str, path: str, query: dict, status: int):
+        with self.lock:
+            self.counts[f"{method} {path}"] += 1
+            self.requests.append(
+                {
+                    "time": time.time(),
+                    "method": method,
+                    "path": path,
+                    "query": query,
+                    "status": status,
+                }
+            )
+
+    def pick_rule(self, method: str, path: str) -> Rule | None:
+        with self.lock:
+            for rule in self.rules:
+                if rule.matches(method, path):
+                    if rule.times is not None:
+                        rule.times -= 1
+                    return rule
+        return None
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: MockSpotify
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self.handle_request("GET")
+
+    def do_POST(self):
+        self.handle_request("POST")
+
+    def do_PUT(self):
+        self.handle_request("PUT")
+
+    def send_json(self, status: int, body=None, headers: dict | None = None):
+        data = b"" if body is None else json.dumps(body).encode()
+        self.send_response(status)
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        if data:
+            self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def handle_request(self, method: str):
+        url = urlparse(self.path)
+        path = url.path
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+
+        if path.startswith("/_mock/"):
+            return self.handle_control(method, path, query, body)
+
+        server = self.server
+        rule = server.pick_rule(method, path)
+        delay = server.latency + random.uniform(0, server.jitter)
+        if rule:
+            delay += rule.latency
+        if delay:
+            time.sleep(delay)
+
+        status = rule.status if rule and rule.status else None
+        if status is None and random.random() < server.rate_limit:
+            status = 429
+        if status is None and random.random() < server.fail:
+            status = 500
+        if status is not None:
+            server.record(method, path, query, status)
+            retry_after = rule.retry_after if rule else 1
+            headers = {"Retry-After": str(int(retry_after))} if status == 429 else {}
+            error = {"error": {"status": status, "message": "mocked error"}}
+            return self.send_json(status, error, headers)
+
+        if path == "/api/token":
+            status, data = 200, self.token()
+        else:
+            status, data = self.api(method, path, query, body)
+        server.record(method, path, query, status)
+        self.send_json(status, data)
+
+    def token(self) -> dict:
+        return {
+            "access_token": f"mock-{random.getrandbits(64):x}",
+            "token_type": "Bearer",
+            "expires_in": 3600,
+            "refresh_token": "mock-refresh",
+            "scope": "",
+        }
+
+    def api(self, method: str, path: str, query: dict, body: bytes):
+        player = self.server.player
+        if not self.headers.get("Authorization", "").startswith("Bearer"):
+            return 401, {"error": {"status": 401, "message": "No token provided"}}
+        if path == "/v1/me":
+            return 200, {
+                "id": "mock-user",
+                "display_name": "Mock User",
+                "country": "US",
+                "product": "premium",
+                "type": "user",
+                "uri": "spotify:user:mock-user",
+            }
+        if path == "/v1/tracks":
+            ids = query.get("ids", "").split(",")
+            known = {track_object(i)["id"]: track_object(i) for i in range(len(TRACKS))}
+            return 200, {"tracks": [known.get(id) for id in ids]}
+
+        with player.lock:
+            if path == "/v1/me/player" and method == "GET":
+                return (200, player.state()) if player.active else (204, None)
+            if path == "/v1/me/player/devices":
+                return 200, {"devices": player.device_list()}
+            if path == "/v1/me/player" and method == "PUT":
+                ids = json.loads(body or b"{}").get("device_ids") or [None]
+                if ids[0] not in {d["id"] for d in player.devices}:
+                    return 404, {
+                        "error": {"status": 404, "message": "Device not found"}
+                    }
+                player.active = ids[0]
+                return 204, None
+            if path == "/v1/me/player/play":
+                player.set_playing(True)
+            elif path == "/v1/me/player/pause":
+                player.set_playing(False)
+            elif path == "/v1/me/player/seek":
+                player.seek(int(query.get("position_ms", 0)))
+            elif path == "/v1/me/player/next":
+                player.skip(1)
+            elif path == "/v1/me/player/previous":
+                player.skip(-1)
+            elif path == "/v1/me/player/volume":
+                player.volume = int(query.get("volume_percent", player.volume))
+            elif path == "/v1/me/player/shuffle":
+                player.shuffle = query.get("state") == "true"
+            elif path == "/v1/me/player/repeat":
+                player.repeat = query.get("state", "off")
+            else:
+                return 404, {"error": {"status": 404, "message": "Not mocked"}}
+        return 204, None
+
+    def handle_control(self, method: str, path: str, query: dict, body: bytes):
+        server = self.server
+        if path == "/_mock/stats":
+            with server.lock:
+                stats = {
+                    "requests": sum(server.counts.values()),
+                    "endpoints": dict(server.counts),
+                }
+            return self.send_json(200, stats)
+        if path == "/_mock/requests":
+            since = float(query.get("since", 0))
+            with server.lock:
+                requests = [r for r in server.requests if r["time"] >= since]
+            return self.send_json(200, requests)
+        if path == "/_mock/rules" and method == "POST":
+            rules = [Rule(**rule) for rule in json.loads(body or b"[]")]
+            with server.lock:
+                server.rules.extend(rules)
+            return self.send_json(204)
+        self.send_json(404, {"error": "unknown control endpoint"})
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765, help="0 picks a free port")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="seconds")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="share of 429s")
+    parser.add_argument("--fail", type=float, default=0.0, help="share of 500s")
+    parser.add_argument("--script", help="JSON file with a list of rules")
+    parser.add_argument("--device-name", default=DEVICE_NAME)
+    args = parser.parse_args()
+
+    rules = []
+    if args.script:
+        with open(args.script) as f:
+            rules = [Rule(**rule) for rule in json.load(f)]
+    server = MockSpotify(
+        (args.host, args.port),
+        latency=args.latency,
+        jitter=args.jitter,
+        rate_limit=args.rate_limit,
+        fail=args.fail,
+        rules=rules,
+        device_name=args.device_name,
+    )
+    print(f"Mock Spotify listening on {server.url}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()